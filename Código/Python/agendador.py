@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def validar_dependencias(dependencias):
+    """Confere se todas as dependências existem e se a ordem declarada é topológica"""
+    vistas = set()
+    for fase, deps in dependencias.items():
+        for dep in deps:
+            if dep not in dependencias:
+                raise ValueError(f"Fase {fase} depende de fase inexistente: {dep}")
+            if dep not in vistas:
+                raise ValueError(f"Fase {fase} declarada antes da sua dependência {dep}")
+        vistas.add(fase)
+
+
+def _cronometrar(rodar, fase):
+    inicio = time.perf_counter()
+    rodar(fase)
+    return inicio, time.perf_counter()
+
+
+def executar_fases(dependencias, rodar, paralelismo=1):
+    """Executa as fases respeitando as dependências, com até `paralelismo` fases ao mesmo tempo.
+
+    dependencias é um dicionário {fase: (fases das quais depende)} em ordem topológica;
+    entre as fases prontas, a ordem declarada define a prioridade. rodar(fase) é chamada
+    numa thread do pool. Devolve {fase: (inicio, fim)} medidos com time.perf_counter().
+    Se uma fase falhar, nenhuma fase nova é iniciada e o erro é propagado depois que as
+    fases em andamento terminarem.
+    """
+    validar_dependencias(dependencias)
+    tempos = {}
+    pendentes = list(dependencias)
+    em_andamento = {}
+
+    with ThreadPoolExecutor(max_workers=paralelismo) as executor:
+        while pendentes or em_andamento:
+            prontas = [fase for fase in pendentes
+                       if all(dep in tempos for dep in dependencias[fase])]
+            for fase in prontas[:paralelismo - len(em_andamento)]:
+                pendentes.remove(fase)
+                em_andamento[executor.submit(_cronometrar, rodar, fase)] = fase
+
+            concluidas, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in concluidas:
+                fase = em_andamento.pop(futuro)
+                tempos[fase] = futuro.result()
+
+    return tempos
+
+
+def caminho_critico(dependencias, tempos):
+    """Maior cadeia de dependências somando a duração de cada fase"""
+    termino = {}
+    anterior = {}
+    for fase, deps in dependencias.items():
+        duracao = tempos[fase][1] - tempos[fase][0]
+        dep_mais_longa = max(deps, key=lambda dep: termino[dep], default=None)
+        termino[fase] = duracao + (termino[dep_mais_longa] if dep_mais_longa else 0.0)
+        anterior[fase] = dep_mais_longa
+
+    fase = max(termino, key=termino.get)
+    total = termino[fase]
+    caminho = []
+    while fase:
+        caminho.append(fase)
+        fase = anterior[fase]
+    return list(reversed(caminho)), total
+
+
+def imprimir_relatorio(dependencias, tempos):
+    """Mostra a duração de cada fase, o caminho crítico e o ganho do paralelismo"""
+    inicio_geral = min(inicio for inicio, _ in tempos.values())
+    fim_geral = max(fim for _, fim in tempos.values())
+
+    print("\nFase                      Início (s)  Duração (s)")
+    for fase in dependencias:
+        inicio, fim = tempos[fase]
+        print(f"{fase:<25} {inicio - inicio_geral:>10.2f}  {fim - inicio:>11.2f}")
+
+    caminho, duracao_caminho = caminho_critico(dependencias, tempos)
+    soma = sum(fim - inicio for inicio, fim in tempos.values())
+    print(f"\nCaminho crítico ({duracao_caminho:.2f} s): {' -> '.join(caminho)}")
+    print(f"Tempo total: {fim_geral - inicio_geral:.2f} s (soma das fases: {soma:.2f} s)")
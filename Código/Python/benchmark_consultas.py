@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+import psycopg2
+
+import consultas
+import resetar_bd
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Uma consulta regride quando a métrica passa do valor da linha base vezes o limite
+# e a diferença é maior que a folga (evita falsos alarmes em consultas de ~1 ms)
+LIMITE_REGRESSAO = 1.25
+FOLGA_MS = 1.0
+
+
+def popular(escala, semente, opcoes_carga, arquivos_esquema):
+    """Reseta o banco e popula na escala pedida com o popular_bd"""
+    resetar_bd.resetar('auto', arquivos_esquema)
+    comando = [sys.executable, os.path.join(DIRETORIO, 'popular_bd.py'),
+               '--escala', str(escala), '--semente', str(semente)] + shlex.split(opcoes_carga)
+    subprocess.run(comando, cwd=DIRETORIO, check=True, stdout=subprocess.DEVNULL)
+
+
+def percentis(tempos_ms):
+    cortes = statistics.quantiles(tempos_ms, n=100, method='inclusive')
+    return {
+        'p50_ms': cortes[49],
+        'p95_ms': cortes[94],
+        'p99_ms': cortes[98],
+        'media_ms': statistics.fmean(tempos_ms),
+    }
+
+
+def medir_consulta(cur, sql_consulta, aquecimento, repeticoes):
+    """Executa a consulta (aquecimento + repetições) e devolve percentis e o plano"""
+    for _ in range(aquecimento):
+        cur.execute(sql_consulta)
+        cur.fetchall()
+
+    tempos_ms = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        cur.execute(sql_consulta)
+        linhas = len(cur.fetchall())
+        tempos_ms.append((time.perf_counter() - inicio) * 1000)
+
+    cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql_consulta)
+    plano = cur.fetchone()[0]
+    resultado = percentis(tempos_ms)
+    resultado['linhas'] = linhas
+    resultado['plano'] = plano
+    return resultado
+
+
+def medir_escala(selecionadas, aquecimento, repeticoes):
+    con = psycopg2.connect(**DB_CONFIG)
+    try:
+        cur = con.cursor()
+        cur.execute("ANALYZE")
+        con.commit()
+        resultados = {}
+        for nome, sql_consulta in selecionadas.items():
+            resultados[nome] = medir_consulta(cur, sql_consulta, aquecimento, repeticoes)
+            r = resultados[nome]
+            print(f"  {nome[:50]:<50} p50 {r['p50_ms']:>9.2f}  p95 {r['p95_ms']:>9.2f}  "
+                  f"p99 {r['p99_ms']:>9.2f} ms")
+        con.rollback()
+        cur.close()
+        return resultados
+    finally:
+        con.close()
+
+
+def comparar(resultados, linha_base, metrica, limite, folga_ms):
+    """Lista as regressões (escala, consulta, base, atual) em relação à linha base"""
+    regressoes = []
+    for escala, por_consulta in resultados.items():
+        base_escala = linha_base.get(escala, {})
+        for nome, atual in por_consulta.items():
+            if nome not in base_escala:
+                continue
+            base = base_escala[nome][metrica]
+            if atual[metrica] > base * limite and atual[metrica] - base > folga_ms:
+                regressoes.append((escala, nome, base, atual[metrica]))
+    return regressoes
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Mede as consultas de consultas.sql em várias escalas")
+    parser.add_argument('--escalas', default='1',
+                        help="Escalas do popular_bd separadas por vírgula (ex.: 1,10,100)")
+    parser.add_argument('--sem-carga', action='store_true',
+                        help="Mede o banco atual, sem resetar nem popular (escala 'atual')")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--particionado', action='store_true',
+                        help="Recria o banco com as tabelas particionadas (SQL/tabelas_particionadas.sql)")
+    parser.add_argument('--indices', action='store_true',
+                        help="Recria o banco com o pacote de índices opcionais (SQL/indices.sql)")
+    parser.add_argument('--resumos', action='store_true',
+                        help="Recria o banco com as tabelas de resumo (SQL/resumos.sql)")
+    parser.add_argument('--arquivo', default=consultas.ARQUIVO_CONSULTAS,
+                        help="Arquivo .sql com as consultas (ex.: SQL/consultas_resumos.sql)")
+    parser.add_argument('--opcoes-carga', default='--modo-carga copy',
+                        help="Opções extras repassadas ao popular_bd")
+    parser.add_argument('--aquecimento', type=int, default=3)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--consultas', action='append', default=[], metavar='TRECHO',
+                        help="Mede só as consultas cujo nome contém o trecho; pode repetir")
+    parser.add_argument('--saida', default='benchmark_consultas.json',
+                        help="Arquivo JSON com percentis e planos de cada consulta")
+    parser.add_argument('--linha-base', help="JSON de uma execução anterior usado como referência")
+    parser.add_argument('--salvar-linha-base', action='store_true',
+                        help="Grava os resultados em --linha-base em vez de comparar")
+    parser.add_argument('--metrica', choices=('p50_ms', 'p95_ms', 'p99_ms'), default='p95_ms')
+    parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO,
+                        help="Razão máxima aceita entre o tempo atual e o da linha base")
+    parser.add_argument('--folga-ms', type=float, default=FOLGA_MS)
+    args = parser.parse_args()
+    if args.repeticoes < 2:
+        parser.error("--repeticoes precisa ser pelo menos 2")
+    return args
+
+
+def main():
+    args = ler_argumentos()
+    todas = consultas.ler_consultas(args.arquivo)
+    selecionadas = {nome: sql_consulta for nome, sql_consulta in todas.items()
+                    if not args.consultas or any(t.lower() in nome.lower() for t in args.consultas)}
+
+    arquivos_esquema = [resetar_bd.ARQUIVO_ESQUEMA]
+    if args.particionado:
+        arquivos_esquema.append(resetar_bd.ARQUIVO_PARTICIONADO)
+    if args.indices:
+        arquivos_esquema.append(resetar_bd.ARQUIVO_INDICES)
+    if args.resumos:
+        arquivos_esquema.append(resetar_bd.ARQUIVO_RESUMOS)
+    escalas = ['atual'] if args.sem_carga else [e.strip() for e in args.escalas.split(',')]
+    resultados = {}
+    for escala in escalas:
+        if escala != 'atual':
+            print(f"Populando o banco na escala {escala}...")
+            popular(float(escala), args.semente, args.opcoes_carga, arquivos_esquema)
+        print(f"Escala {escala}: {len(selecionadas)} consultas, {args.repeticoes} repetições")
+        resultados[escala] = medir_escala(selecionadas, args.aquecimento, args.repeticoes)
+
+    relatorio = {
+        'semente': args.semente,
+        'aquecimento': args.aquecimento,
+        'repeticoes': args.repeticoes,
+        'resultados': resultados,
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {args.saida}")
+
+    if not args.linha_base:
+        return
+    if args.salvar_linha_base:
+        with open(args.linha_base, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"Linha base gravada em {args.linha_base}")
+        return
+
+    with open(args.linha_base, encoding='utf-8') as f:
+        linha_base = json.load(f)['resultados']
+    regressoes = comparar(resultados, linha_base, args.metrica, args.limite, args.folga_ms)
+    for escala, nome, base, atual in regressoes:
+        print(f"REGRESSÃO escala {escala}: {nome}: {args.metrica} {base:.2f} -> {atual:.2f} ms")
+    if regressoes:
+        sys.exit(1)
+    print(f"Nenhuma regressão acima de {args.limite:.2f}x em {args.metrica}")
+
+
+if __name__ == "__main__":
+    main()
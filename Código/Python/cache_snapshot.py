@@ -0,0 +1,222 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+import metricas
+import particoes
+import resetar_bd
+import retomada
+
+# Cada snapshot é um diretório com um arquivo COPY (formato texto) comprimido por
+# tabela e um manifesto com o hash e a contagem de linhas de cada arquivo. A chave
+# do snapshot é o hash dos parâmetros que definem os dados (semente, volumes, opções
+# de geração) e do esquema em tabelas_postgresql.sql.
+
+DIRETORIO_PADRAO = os.path.join(os.path.expanduser('~'), '.cache', 'lar_temporario')
+LIMITE_PADRAO_GB = 10.0
+MANIFESTO = 'manifesto.json'
+NIVEL_COMPRESSAO = 6
+TAMANHO_LEITURA = 1024 * 1024
+
+_CREATE_TABLE = re.compile(r'^\s*CREATE TABLE (\w+)', re.MULTILINE | re.IGNORECASE)
+
+
+def tabelas_do_esquema(caminho=resetar_bd.ARQUIVO_ESQUEMA):
+    """Tabelas na ordem de criação do esquema, que respeita as chaves estrangeiras"""
+    with open(caminho, encoding='utf-8') as f:
+        return _CREATE_TABLE.findall(f.read())
+
+
+def chave_snapshot(parametros):
+    """Chave do snapshot: hash dos parâmetros de geração e do esquema"""
+    _, hash_esquema = resetar_bd.ler_esquema([resetar_bd.ARQUIVO_ESQUEMA])
+    dados = json.dumps(dict(parametros, esquema=hash_esquema), sort_keys=True)
+    return hashlib.sha256(dados.encode()).hexdigest()[:20]
+
+
+def _hash_arquivo(caminho):
+    hash_ = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_LEITURA), b''):
+            hash_.update(bloco)
+    return hash_.hexdigest()
+
+
+def _ler_manifesto(caminho):
+    with open(os.path.join(caminho, MANIFESTO), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _gravar_manifesto(caminho, manifesto):
+    temporario = os.path.join(caminho, MANIFESTO + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(caminho, MANIFESTO))
+
+
+def verificar(caminho):
+    """Confere o manifesto e o hash de cada arquivo; devolve a lista de problemas"""
+    try:
+        manifesto = _ler_manifesto(caminho)
+    except (OSError, ValueError) as e:
+        return [f"manifesto ilegível: {e}"]
+    problemas = []
+    for tabela, dados in manifesto['tabelas'].items():
+        arquivo = os.path.join(caminho, dados['arquivo'])
+        if not os.path.exists(arquivo):
+            problemas.append(f"{tabela}: arquivo ausente")
+        elif _hash_arquivo(arquivo) != dados['sha256']:
+            problemas.append(f"{tabela}: hash diferente do manifesto")
+    return problemas
+
+
+def procurar(diretorio, chave):
+    """Caminho do snapshot íntegro com a chave, ou None; snapshots corrompidos são removidos"""
+    caminho = os.path.join(diretorio, chave)
+    if not os.path.isdir(caminho):
+        return None
+    problemas = verificar(caminho)
+    if problemas:
+        print(f"Snapshot {chave} descartado: {'; '.join(problemas)}")
+        shutil.rmtree(caminho, ignore_errors=True)
+        return None
+    return caminho
+
+
+def gravar(conexao, diretorio, chave, parametros):
+    """Exporta as tabelas da carga para um snapshot novo com COPY ... TO STDOUT"""
+    final = os.path.join(diretorio, chave)
+    temporario = f"{final}.tmp-{os.getpid()}"
+    os.makedirs(temporario, exist_ok=True)
+    tabelas = {}
+    try:
+        with conexao.cursor() as cursor:
+            for tabela in tabelas_do_esquema():
+                arquivo = f"{tabela}.copy.gz"
+                caminho = os.path.join(temporario, arquivo)
+                with gzip.open(caminho, 'wb', compresslevel=NIVEL_COMPRESSAO) as saida:
+                    # SELECT * funciona também com tabelas particionadas
+                    cursor.copy_expert(f"COPY (SELECT * FROM {tabela}) TO STDOUT", saida)
+                tabelas[tabela] = {
+                    'arquivo': arquivo,
+                    'linhas': cursor.rowcount,
+                    'bytes': os.path.getsize(caminho),
+                    'sha256': _hash_arquivo(caminho),
+                }
+                if tabela in particoes.TABELAS_PARTICIONADAS:
+                    # Meses cobertos, para criar as partições antes de carregar numa
+                    # variante particionada do esquema
+                    cursor.execute(f"SELECT min({particoes.TABELAS_PARTICIONADAS[tabela]})::date::text, "
+                                   f"max({particoes.TABELAS_PARTICIONADAS[tabela]})::date::text FROM {tabela}")
+                    tabelas[tabela]['intervalo'] = cursor.fetchone()
+        conexao.commit()
+        agora = time.time()
+        _gravar_manifesto(temporario, {
+            'chave': chave, 'parametros': parametros, 'criado_em': agora, 'usado_em': agora,
+            'tabelas': tabelas,
+        })
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(temporario, final)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    return final
+
+
+def carregar(conexao, caminho):
+    """Carrega um snapshot no banco vazio com COPY ... FROM STDIN, tabela a tabela.
+
+    Os arquivos são descomprimidos enquanto são enviados, sem passar pelo Faker nem
+    ficar inteiros em memória. Cada tabela é medida como uma fase (metricas.py), e a
+    contagem de linhas é conferida com o manifesto.
+    """
+    manifesto = _ler_manifesto(caminho)
+    with conexao.cursor() as cursor:
+        for tabela, dados in manifesto['tabelas'].items():
+            if dados.get('intervalo') and dados['intervalo'][0] and particoes.esta_particionada(cursor, tabela):
+                cursor.execute("SELECT criar_particoes(%s, %s, %s)", (tabela, *dados['intervalo']))
+            with metricas.medir_fase(tabela):
+                with gzip.open(os.path.join(caminho, dados['arquivo']), 'rb') as entrada:
+                    cursor.copy_expert(f"COPY {tabela} FROM STDIN", entrada, size=TAMANHO_LEITURA)
+                metricas.registrar_linhas(cursor.rowcount)
+            if cursor.rowcount != dados['linhas']:
+                raise ValueError(f"{tabela}: {cursor.rowcount} linhas carregadas, "
+                                 f"{dados['linhas']} no manifesto")
+    conexao.commit()
+    retomada.ajustar_sequencias(conexao)
+
+    manifesto['usado_em'] = time.time()
+    _gravar_manifesto(caminho, manifesto)
+    return {tabela: dados['linhas'] for tabela, dados in manifesto['tabelas'].items()}
+
+
+def listar(diretorio):
+    """Snapshots do diretório como [(chave, manifesto, bytes)], do menos para o mais recente"""
+    snapshots = []
+    if not os.path.isdir(diretorio):
+        return snapshots
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if '.tmp-' in nome or not os.path.isdir(caminho):
+            continue
+        try:
+            manifesto = _ler_manifesto(caminho)
+        except (OSError, ValueError):
+            manifesto = {'usado_em': 0, 'tabelas': {}}
+        tamanho = sum(os.path.getsize(os.path.join(caminho, arquivo)) for arquivo in os.listdir(caminho))
+        snapshots.append((nome, manifesto, tamanho))
+    return sorted(snapshots, key=lambda snapshot: snapshot[1].get('usado_em', 0))
+
+
+def despejar(diretorio, limite_bytes, manter=None):
+    """Remove os snapshots usados há mais tempo até o cache caber no limite"""
+    snapshots = listar(diretorio)
+    total = sum(tamanho for _, _, tamanho in snapshots)
+    removidos = []
+    for chave, _, tamanho in snapshots:
+        if total <= limite_bytes:
+            break
+        if chave == manter:
+            continue
+        shutil.rmtree(os.path.join(diretorio, chave), ignore_errors=True)
+        total -= tamanho
+        removidos.append(chave)
+    return removidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista, confere e limpa o cache de snapshots do popular_bd")
+    parser.add_argument('--diretorio', default=DIRETORIO_PADRAO)
+    parser.add_argument('--verificar', action='store_true', help="Confere o hash de todos os arquivos")
+    parser.add_argument('--limite-gb', type=float,
+                        help="Remove os snapshots usados há mais tempo até o cache caber no limite")
+    parser.add_argument('--limpar', action='store_true', help="Remove todos os snapshots")
+    args = parser.parse_args()
+
+    if args.limpar:
+        shutil.rmtree(args.diretorio, ignore_errors=True)
+        print(f"Cache {args.diretorio} removido")
+        return
+    if args.limite_gb is not None:
+        for chave in despejar(args.diretorio, args.limite_gb * 2**30):
+            print(f"Removido: {chave}")
+
+    for chave, manifesto, tamanho in listar(args.diretorio):
+        parametros = manifesto.get('parametros', {})
+        linhas = sum(dados['linhas'] for dados in manifesto['tabelas'].values())
+        usado = time.strftime('%Y-%m-%d %H:%M', time.localtime(manifesto.get('usado_em', 0)))
+        situacao = ''
+        if args.verificar:
+            problemas = verificar(os.path.join(args.diretorio, chave))
+            situacao = 'OK' if not problemas else 'CORROMPIDO: ' + '; '.join(problemas)
+        print(f"{chave}  semente={parametros.get('semente')}  {linhas} linhas  "
+              f"{tamanho / 2**20:.1f} MiB  usado em {usado}  {situacao}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import io
+import threading
+import time
+
+from psycopg2.extras import execute_values
+
+import metricas
+
+try:
+    import psycopg
+except ImportError:  # o modo 'pipeline' precisa do psycopg 3 (pip install "psycopg[binary]")
+    psycopg = None
+
+MODOS_CARGA = ('insert', 'lote', 'copy', 'pipeline')
+TAMANHO_BLOCO = 5000
+TAMANHO_LEITURA = 50000
+
+modo_carga = 'insert'
+
+# Modo 'pipeline': cada thread de fase tem a sua conexão psycopg 3, que envia os INSERTs
+# preparados em pipeline e é confirmada no fim de cada fase (confirmar_pipeline).
+_config_pipeline = None
+_local = threading.local()
+_conexoes_pipeline = []
+_trava = threading.Lock()
+
+
+def definir_modo_carga(modo, db_config=None):
+    """Define o modo usado por todos os escritores de tabela.
+
+    O modo 'pipeline' abre conexões psycopg 3 próprias e precisa de db_config
+    (o mesmo dicionário usado com psycopg2.connect).
+    """
+    global modo_carga, _config_pipeline
+    if modo not in MODOS_CARGA:
+        raise ValueError(f"Modo de carga inválido: {modo} (opções: {', '.join(MODOS_CARGA)})")
+    if modo == 'pipeline':
+        if psycopg is None:
+            raise ValueError('O modo pipeline precisa do psycopg 3 (pip install "psycopg[binary]")')
+        # libpq chama o banco de dbname; psycopg2 aceita também database
+        _config_pipeline = {('dbname' if chave == 'database' else chave): valor
+                            for chave, valor in (db_config or {}).items()}
+    modo_carga = modo
+
+
+def conexao_pipeline():
+    """Conexão psycopg 3 da thread atual, aberta na primeira vez"""
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None or conexao.closed:
+        conexao = psycopg.connect(**_config_pipeline)
+        _local.conexao = conexao
+        with _trava:
+            _conexoes_pipeline.append(conexao)
+    return conexao
+
+
+def confirmar_pipeline(confirmar=True):
+    """Confirma (ou desfaz) o que a conexão pipeline da thread atual gravou na fase"""
+    conexao = getattr(_local, 'conexao', None)
+    if conexao is None or conexao.closed:
+        return
+    if confirmar:
+        conexao.commit()
+    else:
+        conexao.rollback()
+
+
+def _escritores_ativos():
+    if not hasattr(_local, 'escritores'):
+        _local.escritores = []
+    return _local.escritores
+
+
+def descarregar_escritores():
+    """Envia as linhas pendentes de todos os escritores abertos na thread atual"""
+    for escritor in _escritores_ativos():
+        escritor.descarregar()
+
+
+def fechar_pipeline():
+    with _trava:
+        for conexao in _conexoes_pipeline:
+            conexao.close()
+        _conexoes_pipeline.clear()
+
+
+def _valor_copy(valor):
+    """Converte um valor Python para o formato texto do COPY"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    texto = str(valor)
+    return (texto.replace('\\', '\\\\')
+                 .replace('\t', '\\t')
+                 .replace('\n', '\\n')
+                 .replace('\r', '\\r'))
+
+
+def reservar_ids(cursor, tabela, quantidade, coluna='id'):
+    """Reserva um bloco de ids da sequência SERIAL da tabela numa única consulta"""
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+        (tabela, coluna, quantidade)
+    )
+    return [linha[0] for linha in cursor.fetchall()]
+
+
+def ler_em_registros(conexao, consulta, registros, parametros=None, tamanho=None):
+    """Lê o resultado da consulta em blocos com um cursor no servidor (DECLARE/FETCH).
+
+    Cada coluna do resultado é acrescentada ao registro correspondente (por exemplo,
+    um registros.RegistroChaves), então a memória usada fica nos registros compactos
+    e no bloco em leitura, nunca no resultado inteiro como em fetchall().
+    """
+    tamanho = tamanho or TAMANHO_LEITURA
+    with conexao.cursor(name='ler_em_registros') as cursor:
+        cursor.execute(consulta, parametros)
+        while True:
+            bloco = cursor.fetchmany(tamanho)
+            if not bloco:
+                break
+            for registro, coluna in zip(registros, zip(*bloco)):
+                registro.extend(coluna)
+
+
+class EscritorTabela:
+    """Acumula as linhas de uma tabela e as envia ao banco em blocos.
+
+    No modo 'insert' cada linha vira um INSERT (comportamento original); no modo
+    'lote' cada bloco vira um único INSERT com várias linhas; no modo 'copy' cada
+    bloco é serializado num buffer e enviado com COPY ... FROM STDIN.
+
+    Para tabelas com chave SERIAL, passe em registro_ids a lista que guarda as
+    chaves geradas: os ids de cada bloco são reservados com nextval antes do envio,
+    incluídos nas linhas e acrescentados à lista na mesma ordem das linhas.
+
+    Para tabelas particionadas, passe um roteador (particoes.Roteador): cada bloco é
+    separado por partição e cada grupo é gravado direto na partição de destino.
+
+    No modo 'pipeline' as linhas vão por uma conexão psycopg 3 em modo pipeline, como
+    INSERTs preparados no servidor: os comandos de um bloco são enviados sem esperar
+    a resposta de cada um, e o banco processa um bloco enquanto o próximo é gerado.
+    As respostas são conferidas ao sair do escritor. As partições também são criadas
+    por essa conexão, para que os INSERTs as enxerguem antes do commit.
+    """
+
+    def __init__(self, cursor, tabela, colunas, tamanho_bloco=None, registro_ids=None, roteador=None):
+        self.cursor = cursor
+        self.tabela = tabela
+        self.colunas = tuple(colunas)
+        self.registro_ids = registro_ids
+        if registro_ids is not None:
+            self.colunas = ('id',) + self.colunas
+        self.roteador = roteador
+        if roteador is not None:
+            self._coluna_roteamento = self.colunas.index(roteador.coluna)
+        self.tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO
+        self.modo = modo_carga
+        self.total = 0
+        self._bloco = []
+        self._pipeline = None
+        if self.modo == 'pipeline':
+            self._conexao_pipeline = conexao_pipeline()
+            self._cursor_pipeline = self._conexao_pipeline.cursor()
+            if roteador is not None:
+                roteador.cursor = self._cursor_pipeline
+
+    def __enter__(self):
+        _escritores_ativos().append(self)
+        if self.modo == 'pipeline':
+            self._pipeline = self._conexao_pipeline.pipeline()
+            self._pipeline.__enter__()
+        return self
+
+    def __exit__(self, tipo_erro, erro, traceback):
+        _escritores_ativos().remove(self)
+        try:
+            if tipo_erro is None:
+                self.descarregar()
+        finally:
+            if self._pipeline is not None:
+                # Sai do pipeline esperando as respostas pendentes; um erro no banco
+                # aparece aqui
+                inicio, cpu = time.perf_counter(), time.thread_time()
+                self._pipeline.__exit__(tipo_erro, erro, traceback)
+                metricas.registrar_comando(time.perf_counter() - inicio, time.thread_time() - cpu, 0)
+                self._pipeline = None
+
+    def escrever(self, linha):
+        self._bloco.append(linha)
+        if len(self._bloco) >= self.tamanho_bloco:
+            self.descarregar()
+
+    def escrever_varias(self, linhas):
+        for linha in linhas:
+            self.escrever(linha)
+
+    def descarregar(self):
+        if not self._bloco:
+            return
+        if self.registro_ids is not None:
+            ids = reservar_ids(self.cursor, self.tabela, len(self._bloco))
+            self._bloco = [(id_,) + tuple(linha) for id_, linha in zip(ids, self._bloco)]
+        for destino, linhas in self._destinos(self._bloco):
+            if self.modo == 'copy':
+                self._copiar(destino, linhas)
+            elif self.modo == 'pipeline':
+                self._enviar_pipeline(destino, linhas)
+            elif self.modo == 'lote':
+                self._inserir_lote(destino, linhas)
+            else:
+                self._inserir(destino, linhas)
+        if self.registro_ids is not None:
+            self.registro_ids.extend(ids)
+        self.total += len(self._bloco)
+        metricas.registrar_linhas(len(self._bloco))
+        self._bloco = []
+
+    def _destinos(self, bloco):
+        """Separa o bloco em (tabela de destino, linhas), mantendo a ordem das linhas"""
+        if self.roteador is None:
+            return [(self.tabela, bloco)]
+        grupos = {}
+        for linha in bloco:
+            destino = self.roteador.particao(linha[self._coluna_roteamento])
+            grupos.setdefault(destino, []).append(linha)
+        return list(grupos.items())
+
+    def _inserir(self, tabela, bloco):
+        marcadores = ', '.join(['%s'] * len(self.colunas))
+        sql = f"INSERT INTO {tabela} ({', '.join(self.colunas)}) VALUES ({marcadores})"
+        for linha in bloco:
+            self.cursor.execute(sql, linha)
+
+    def _inserir_lote(self, tabela, bloco):
+        sql = f"INSERT INTO {tabela} ({', '.join(self.colunas)}) VALUES %s"
+        execute_values(self.cursor, sql, bloco, page_size=len(bloco))
+
+    def _enviar_pipeline(self, tabela, bloco):
+        marcadores = ', '.join(['%s'] * len(self.colunas))
+        sql = f"INSERT INTO {tabela} ({', '.join(self.colunas)}) VALUES ({marcadores})"
+        inicio, cpu = time.perf_counter(), time.thread_time()
+        for linha in bloco:
+            self._cursor_pipeline.execute(sql, linha, prepare=True)
+        # Cada bloco conta como uma ida e volta: o psycopg sincroniza o pipeline por
+        # lotes de comandos, não por comando. Os bytes enviados não são medidos aqui.
+        metricas.registrar_comando(time.perf_counter() - inicio, time.thread_time() - cpu, 0)
+
+    def _copiar(self, tabela, bloco):
+        buffer = io.StringIO()
+        for linha in bloco:
+            buffer.write('\t'.join(_valor_copy(valor) for valor in linha))
+            buffer.write('\n')
+        buffer.seek(0)
+        self.cursor.copy_expert(
+            f"COPY {tabela} ({', '.join(self.colunas)}) FROM STDIN", buffer
+        )
@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import carga
+import resetar_bd
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def medir_modo(modo, escala, semente, opcoes_carga):
+    """Reseta o banco, roda o popular_bd no modo pedido e devolve o relatório de metricas.py"""
+    resetar_bd.resetar('auto')
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, 'metricas.json')
+        comando = [sys.executable, os.path.join(DIRETORIO, 'popular_bd.py'),
+                   '--modo-carga', modo, '--escala', str(escala), '--semente', str(semente),
+                   '--metricas-json', arquivo] + shlex.split(opcoes_carga)
+        subprocess.run(comando, cwd=DIRETORIO, check=True, stdout=subprocess.DEVNULL)
+        with open(arquivo, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def resumir(relatorios):
+    """Mediana das rodadas de um modo: tempo de carga, linhas/s, espera no banco e idas e voltas"""
+    segundos = statistics.median(r['etapas']['carga'] for r in relatorios)
+    linhas = sum(f['linhas'] for f in relatorios[0]['fases'])
+    espera = statistics.median(sum(f['espera_bd_s'] for f in r['fases']) for r in relatorios)
+    return {
+        'carga_s': segundos,
+        'linhas': linhas,
+        'linhas_por_s': linhas / segundos if segundos else 0.0,
+        'espera_bd_s': espera,
+        'round_trips': sum(f['round_trips'] for f in relatorios[0]['fases']),
+    }
+
+
+def imprimir_comparacao(resultados, referencia):
+    base = resultados[referencia]['carga_s']
+    print(f"\n{'Modo':<10} {'Carga (s)':>10} {'Linhas/s':>10} {'Espera BD (s)':>14} "
+          f"{'Idas e voltas':>14} {'vs ' + referencia:>12}")
+    for modo, resultado in resultados.items():
+        aceleracao = base / resultado['carga_s'] if resultado['carga_s'] else 0.0
+        print(f"{modo:<10} {resultado['carga_s']:>10.2f} {resultado['linhas_por_s']:>10.0f} "
+              f"{resultado['espera_bd_s']:>14.2f} {resultado['round_trips']:>14} {aceleracao:>11.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a vazão dos modos de carga do popular_bd")
+    parser.add_argument('--modos', default='insert,lote,copy,pipeline',
+                        help=f"Modos separados por vírgula ({', '.join(carga.MODOS_CARGA)}); "
+                             "o primeiro é a referência")
+    parser.add_argument('--escala', type=float, default=1.0)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--rodadas', type=int, default=1,
+                        help="Cargas por modo; a tabela mostra a mediana")
+    parser.add_argument('--opcoes-carga', default='',
+                        help="Opções extras repassadas ao popular_bd em todos os modos")
+    parser.add_argument('--saida', help="Grava a comparação em JSON")
+    args = parser.parse_args()
+
+    modos = [modo.strip() for modo in args.modos.split(',')]
+    for modo in modos:
+        if modo not in carga.MODOS_CARGA:
+            parser.error(f"Modo desconhecido: {modo}")
+
+    resultados = {}
+    for modo in modos:
+        relatorios = []
+        for rodada in range(args.rodadas):
+            print(f"Modo {modo}, rodada {rodada + 1}/{args.rodadas}...")
+            relatorios.append(medir_modo(modo, args.escala, args.semente, args.opcoes_carga))
+        resultados[modo] = resumir(relatorios)
+
+    imprimir_comparacao(resultados, modos[0])
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'escala': args.escala, 'semente': args.semente, 'rodadas': args.rodadas,
+                       'resultados': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"Comparação gravada em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
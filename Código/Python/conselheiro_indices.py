@@ -0,0 +1,174 @@
+import argparse
+import json
+
+import psycopg2
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+# Tabelas com varreduras sequenciais que leem em média mais linhas que isto entram
+# como candidatas a índice
+LINHAS_POR_VARREDURA = 1000
+
+_SQL_USO_INDICES = """
+    SELECT s.relname, s.indexrelname, s.idx_scan, s.idx_tup_read,
+           pg_relation_size(s.indexrelid), x.indisunique
+    FROM pg_stat_user_indexes s
+    JOIN pg_index x ON x.indexrelid = s.indexrelid
+    WHERE s.schemaname = 'public'
+    ORDER BY s.idx_scan DESC, s.relname, s.indexrelname
+"""
+
+# FKs cujas colunas não são o prefixo de nenhum índice (não parcial) da tabela
+_SQL_FKS_SEM_INDICE = """
+    SELECT c.conrelid::regclass::text, c.conname,
+           array_agg(a.attname::text ORDER BY k.ordem)
+    FROM pg_constraint c
+    CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, ordem)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+    WHERE c.contype = 'f' AND c.connamespace = 'public'::regnamespace
+      AND NOT EXISTS (
+          SELECT 1 FROM pg_index i
+          WHERE i.indrelid = c.conrelid AND i.indpred IS NULL
+            AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+      )
+    GROUP BY c.conrelid, c.conname
+    ORDER BY 1, 2
+"""
+
+_SQL_VARREDURAS = """
+    SELECT relname, seq_scan, seq_tup_read, COALESCE(idx_scan, 0), n_live_tup
+    FROM pg_stat_user_tables
+    WHERE schemaname = 'public' AND seq_scan > 0
+      AND seq_tup_read / seq_scan > %s AND seq_scan > COALESCE(idx_scan, 0)
+    ORDER BY seq_tup_read DESC
+"""
+
+_SQL_STATEMENTS = """
+    SELECT query, calls, total_exec_time, mean_exec_time, rows,
+           shared_blks_hit, shared_blks_read
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+    ORDER BY total_exec_time DESC
+    LIMIT %s
+"""
+
+
+def tem_pg_stat_statements(cur):
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+    return cur.fetchone() is not None
+
+
+def zerar_estatisticas(con):
+    """Zera as estatísticas antes de rodar a carga de trabalho que será analisada"""
+    cur = con.cursor()
+    cur.execute("SELECT pg_stat_reset()")
+    if tem_pg_stat_statements(cur):
+        cur.execute("SELECT pg_stat_statements_reset()")
+    con.commit()
+    cur.close()
+
+
+def analisar(con, limite_consultas=10):
+    """Monta o relatório de índices usados, não usados e faltando"""
+    cur = con.cursor()
+    cur.execute(_SQL_USO_INDICES)
+    usados, nao_usados = [], []
+    for tabela, indice, varreduras, tuplas, tamanho, unico in cur.fetchall():
+        item = {'tabela': tabela, 'indice': indice, 'varreduras': varreduras,
+                'tuplas_lidas': tuplas, 'bytes': tamanho, 'unico': unico}
+        (usados if varreduras else nao_usados).append(item)
+
+    cur.execute(_SQL_FKS_SEM_INDICE)
+    fks_sem_indice = [{'tabela': tabela, 'restricao': nome, 'colunas': colunas,
+                       'sugestao': f"CREATE INDEX ON {tabela} ({', '.join(colunas)});"}
+                      for tabela, nome, colunas in cur.fetchall()]
+
+    cur.execute(_SQL_VARREDURAS, (LINHAS_POR_VARREDURA,))
+    varreduras = [{'tabela': tabela, 'seq_scan': seq, 'seq_tup_read': lidas, 'idx_scan': idx,
+                   'linhas': vivas}
+                  for tabela, seq, lidas, idx, vivas in cur.fetchall()]
+
+    consultas = None
+    if tem_pg_stat_statements(cur):
+        cur.execute(_SQL_STATEMENTS, (limite_consultas,))
+        consultas = [{'consulta': ' '.join(texto.split()), 'chamadas': chamadas,
+                      'total_ms': total, 'media_ms': media, 'linhas': linhas,
+                      'blocos_cache': hit, 'blocos_lidos': lidos}
+                     for texto, chamadas, total, media, linhas, hit, lidos in cur.fetchall()]
+    con.rollback()
+    cur.close()
+    return {
+        'indices_usados': usados,
+        'indices_nao_usados': nao_usados,
+        'fks_sem_indice': fks_sem_indice,
+        'varreduras_sequenciais': varreduras,
+        'consultas_mais_caras': consultas,
+    }
+
+
+def imprimir_relatorio(relatorio):
+    print("Índices usados:")
+    for item in relatorio['indices_usados']:
+        print(f"  {item['indice']:<40} {item['tabela']:<20} {item['varreduras']:>10} varreduras")
+
+    print("\nÍndices não usados (candidatos a remoção; os únicos garantem restrições):")
+    for item in relatorio['indices_nao_usados']:
+        marca = ' (único)' if item['unico'] else ''
+        print(f"  {item['indice']:<40} {item['tabela']:<20} {item['bytes'] / 1024:>10.0f} KiB{marca}")
+
+    print("\nChaves estrangeiras sem índice:")
+    for item in relatorio['fks_sem_indice']:
+        print(f"  {item['restricao']:<40} {item['sugestao']}")
+
+    print(f"\nTabelas lidas por varredura sequencial (> {LINHAS_POR_VARREDURA} linhas por varredura):")
+    for item in relatorio['varreduras_sequenciais']:
+        media = item['seq_tup_read'] / item['seq_scan']
+        print(f"  {item['tabela']:<20} {item['seq_scan']:>8} varreduras, {media:>12.0f} linhas em média, "
+              f"{item['idx_scan']} varreduras de índice")
+
+    if relatorio['consultas_mais_caras'] is None:
+        print("\npg_stat_statements não está instalado: CREATE EXTENSION pg_stat_statements "
+              "(com shared_preload_libraries = 'pg_stat_statements')")
+        return
+    print("\nConsultas com maior tempo total (pg_stat_statements):")
+    for item in relatorio['consultas_mais_caras']:
+        print(f"  {item['total_ms']:>10.1f} ms  {item['chamadas']:>7} chamadas  "
+              f"{item['blocos_lidos']:>8} blocos lidos  {item['consulta'][:80]}")
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(
+        description="Relata índices usados, não usados e faltando a partir das estatísticas do PostgreSQL")
+    parser.add_argument('--zerar', action='store_true',
+                        help="Zera as estatísticas (rode antes da carga de trabalho) e sai")
+    parser.add_argument('--consultas', type=int, default=10,
+                        help="Quantas consultas de pg_stat_statements mostrar")
+    parser.add_argument('--json', help="Grava o relatório também neste arquivo JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = ler_argumentos()
+    con = psycopg2.connect(**DB_CONFIG)
+    try:
+        if args.zerar:
+            zerar_estatisticas(con)
+            print("Estatísticas zeradas")
+            return
+        relatorio = analisar(con, args.consultas)
+    finally:
+        con.close()
+    imprimir_relatorio(relatorio)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
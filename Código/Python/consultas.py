@@ -0,0 +1,44 @@
+import os
+from collections import OrderedDict
+
+ARQUIVO_CONSULTAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SQL', 'consultas.sql')
+
+
+def ler_consultas(caminho=ARQUIVO_CONSULTAS):
+    """Separa um arquivo .sql em consultas nomeadas pelo comentário que as precede.
+
+    A primeira linha '-- texto' de um bloco de comentários antes de um comando vira o
+    nome dele (as seguintes são descrição); linhas de seção ('-----...') são
+    ignoradas. Comandos seguidos sem comentário próprio herdam o último nome com um
+    número ('Contagem ... #2'). Devolve {nome: sql} na ordem do arquivo. Supõe, como
+    em consultas.sql, que ';' só aparece no fim dos comandos.
+    """
+    consultas = OrderedDict()
+    nome = None
+    repeticoes = 0
+    linhas = []
+    no_comentario = False
+
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            texto = linha.strip()
+            if not linhas and texto.startswith('--'):
+                if texto.startswith('---'):
+                    continue
+                if not no_comentario:
+                    nome = texto[2:].strip()
+                    repeticoes = 0
+                no_comentario = True
+                continue
+            no_comentario = False
+            if not texto and not linhas:
+                continue
+            linhas.append(linha.rstrip())
+            if texto.endswith(';'):
+                repeticoes += 1
+                chave = nome or 'consulta'
+                if repeticoes > 1:
+                    chave = f"{chave} #{repeticoes}"
+                consultas[chave] = '\n'.join(linhas).rstrip(';')
+                linhas = []
+    return consultas
@@ -0,0 +1,196 @@
+import math
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import vetorizado
+
+# Perfis de distribuição para chaves estrangeiras e datas (popular_bd.py --distribuicao).
+# Sem perfil, ou com 'uniforme', os geradores sorteiam como antes, com as mesmas
+# chamadas ao rng: a mesma semente continua gerando os mesmos dados.
+
+# Colunas que aceitam perfil: chaves estrangeiras (uniforme, zipf) e datas (uniforme, recente)
+COLUNAS_CHAVE = (
+    'doacao.pessoa_cpf', 'contato.pessoa_cpf', 'gasto.gato_id', 'gasto.lar_id',
+    'procedimento.gato_id', 'procedimento.veterinario_cpf', 'hospedagem.lar_temporario_id',
+    'adocao.adotante_cpf',
+)
+COLUNAS_DATA = ('doacao.data', 'gasto.data', 'contato.data_hora', 'procedimento.data_hora')
+
+# contato e procedimento têm data_hora na chave primária junto com chaves estrangeiras.
+# Com perfil nessas colunas poucas chaves quentes recebem boa parte das linhas, e datas
+# com resolução de segundos repetiriam (chave, data_hora): uma PK duplicada aborta a
+# carga. Nesses casos os microssegundos de data_hora passam a ser a posição da linha na
+# fase, única entre os fragmentos (ver desempatador).
+PK_COM_DATA_HORA = {
+    'contato': ('contato.pessoa_cpf', 'contato.data_hora'),
+    'procedimento': ('procedimento.gato_id', 'procedimento.veterinario_cpf', 'procedimento.data_hora'),
+}
+MICROSSEGUNDOS = 1000000
+
+
+class Zipf:
+    """Chaves com popularidade de Zipf: a k-ésima mais sorteada tem peso 1/k^s.
+
+    O posto é sorteado pela inversa da lei de potência contínua em [1, n + 1), em O(1)
+    e sem tabela de pesos. As chaves mais populares ficam espalhadas pelo registro (um
+    passo coprimo com n leva o posto à posição), não concentradas nos primeiros ids.
+    """
+
+    def __init__(self, s):
+        if s <= 0:
+            raise ValueError("O parâmetro s do Zipf precisa ser positivo")
+        self.s = s
+
+    def __repr__(self):
+        return f"zipf:{self.s:g}"
+
+    def _posto(self, u, n):
+        if self.s == 1:
+            x = (n + 1) ** u
+        else:
+            x = (1 + u * ((n + 1) ** (1 - self.s) - 1)) ** (1 / (1 - self.s))
+        return min(int(x), n)
+
+    def chave(self, rng, registro):
+        n = len(registro)
+        return registro[(self._posto(rng.random(), n) - 1) * _passo(n) % n]
+
+    def chaves(self, gnp, registro, quantidade):
+        np = vetorizado.np
+        n = len(registro)
+        u = gnp.random(quantidade)
+        if self.s == 1:
+            x = np.power(n + 1.0, u)
+        else:
+            x = np.power(1 + u * ((n + 1.0) ** (1 - self.s) - 1), 1 / (1 - self.s))
+        postos = np.minimum(x.astype(np.int64), n)
+        posicoes = (postos - 1) * _passo(n) % n
+        return [registro[i] for i in posicoes.tolist()]
+
+
+class Recente:
+    """Datas concentradas perto de hoje: a idade segue uma exponencial de média
+    `dias` dias, truncada à janela da coluna"""
+
+    def __init__(self, dias):
+        if dias <= 0:
+            raise ValueError("A média de dias do perfil recente precisa ser positiva")
+        self.dias = dias
+
+    def __repr__(self):
+        return f"recente:{self.dias:g}"
+
+    def _idade(self, u, janela):
+        """Idade em dias (fracionária) em [0, janela) pela inversa da exponencial truncada"""
+        return -self.dias * math.log(1 - u * (1 - math.exp(-janela / self.dias)))
+
+    def data(self, rng, janela):
+        return date.today() - timedelta(days=int(self._idade(rng.random(), janela)))
+
+    def data_hora(self, rng, janela):
+        # Pelo menos um segundo no passado, para respeitar data_hora <= CURRENT_TIMESTAMP
+        segundos = int(self._idade(rng.random(), janela) * 86400) + 1
+        return datetime.now().replace(microsecond=0) - timedelta(seconds=segundos)
+
+    def datas(self, gnp, janela, quantidade):
+        np = vetorizado.np
+        u = gnp.random(quantidade)
+        idades = -self.dias * np.log1p(-u * (1 - math.exp(-janela / self.dias)))
+        hoje = np.datetime64(date.today(), 'D')
+        return (hoje - idades.astype(np.int64).astype('timedelta64[D]')).tolist()
+
+    def datas_hora(self, gnp, janela, quantidade):
+        np = vetorizado.np
+        u = gnp.random(quantidade)
+        idades = -self.dias * np.log1p(-u * (1 - math.exp(-janela / self.dias)))
+        agora = np.datetime64(datetime.now(), 's')
+        segundos = (idades * 86400).astype(np.int64) + 1
+        return (agora - segundos.astype('timedelta64[s]')).tolist()
+
+
+@lru_cache(maxsize=None)
+def _passo(n):
+    """Passo coprimo com n perto de n / phi: percorre todas as posições sem repetir"""
+    passo = max(1, int(n * 0.6180339887))
+    while math.gcd(passo, n) != 1:
+        passo += 1
+    return passo
+
+
+def ler_perfil(coluna, texto):
+    """Converte o perfil 'uniforme', 'zipf:S' ou 'recente:DIAS' da coluna; None é uniforme"""
+    nome, _, parametro = texto.partition(':')
+    if coluna not in COLUNAS_CHAVE + COLUNAS_DATA:
+        raise ValueError(f"Coluna sem perfil de distribuição: {coluna} "
+                         f"(chaves: {', '.join(COLUNAS_CHAVE)}; datas: {', '.join(COLUNAS_DATA)})")
+    if nome == 'uniforme' and not parametro:
+        return None
+    if nome == 'zipf' and coluna in COLUNAS_CHAVE:
+        return Zipf(float(parametro or 1.0))
+    if nome == 'recente' and coluna in COLUNAS_DATA:
+        return Recente(float(parametro or 30))
+    validos = 'uniforme, zipf:S' if coluna in COLUNAS_CHAVE else 'uniforme, recente:DIAS'
+    raise ValueError(f"Perfil inválido para {coluna}: {texto} (use {validos})")
+
+
+def ler_perfis(textos):
+    """{coluna: texto} -> {coluna: perfil}, sem as colunas uniformes"""
+    perfis = {coluna: ler_perfil(coluna, texto) for coluna, texto in textos.items()}
+    return {coluna: perfil for coluna, perfil in perfis.items() if perfil is not None}
+
+
+def escolhedor(perfis, coluna, registro):
+    """Função rng -> chave do registro segundo o perfil da coluna"""
+    perfil = perfis.get(coluna)
+    if perfil is None:
+        return registro.escolher
+    return lambda rng: perfil.chave(rng, registro)
+
+
+def sorteador_data(perfis, coluna, janela, padrao):
+    """Função rng -> data da coluna; sem perfil chama padrao(), o sorteio original com o Faker"""
+    perfil = perfis.get(coluna)
+    if perfil is None:
+        return lambda rng: padrao()
+    if coluna.endswith('data_hora'):
+        return lambda rng: perfil.data_hora(rng, janela)
+    return lambda rng: perfil.data(rng, janela)
+
+
+def desempatador(perfis, tabela, inicio):
+    """Função (i, data_hora) -> data_hora com os microssegundos da posição inicio + i,
+    ou None se nenhuma coluna da PK da tabela tem perfil (os dados não mudam).
+
+    Duas linhas da fase só coincidem em (chave, data_hora) se caírem no mesmo segundo
+    com posições a um múltiplo de um milhão de distância.
+    """
+    if not any(coluna in perfis for coluna in PK_COM_DATA_HORA[tabela]):
+        return None
+    return lambda i, data_hora: data_hora.replace(microsecond=(inicio + i) % MICROSSEGUNDOS)
+
+
+def desempatar_lote(perfis, tabela, inicio, datas_hora):
+    """Versão em lote de desempatador (--backend numpy)"""
+    desempatar = desempatador(perfis, tabela, inicio)
+    if desempatar is None:
+        return datas_hora
+    return [desempatar(i, data_hora) for i, data_hora in enumerate(datas_hora)]
+
+
+def chaves_lote(perfis, coluna, gnp, registro, quantidade):
+    """Versão vetorizada de escolhedor (--backend numpy)"""
+    perfil = perfis.get(coluna)
+    if perfil is None:
+        return vetorizado.sortear_chaves(gnp, registro, quantidade)
+    return perfil.chaves(gnp, registro, quantidade)
+
+
+def datas_lote(perfis, coluna, gnp, janela, quantidade):
+    """Versão vetorizada de sorteador_data (--backend numpy)"""
+    perfil = perfis.get(coluna)
+    hora = coluna.endswith('data_hora')
+    if perfil is None:
+        if hora:
+            return vetorizado.datas_hora_recentes(gnp, janela, quantidade)
+        return vetorizado.datas_recentes(gnp, janela, quantidade)
+    return perfil.datas_hora(gnp, janela, quantidade) if hora else perfil.datas(gnp, janela, quantidade)
@@ -0,0 +1,286 @@
+import argparse
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import psycopg2
+
+import consultas
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.parquet
+except ImportError:  # Parquet é opcional: sem pyarrow só há saída em CSV
+    pyarrow = None
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+# As linhas saem do servidor com COPY (consulta) TO STDOUT e vão direto para o
+# arquivo (CSV) ou, por um pipe, para o leitor em blocos do pyarrow (Parquet): a
+# memória usada não depende do tamanho da tabela.
+
+TABELAS_PADRAO = ('doacao', 'gasto', 'procedimento', 'contato')
+
+# Coluna de data usada como marca d'água nas exportações incrementais
+COLUNAS_MARCA = {
+    'doacao': 'data',
+    'gasto': 'data',
+    'procedimento': 'data_hora',
+    'contato': 'data_hora',
+    'adocao': 'data',
+    'devolucao': 'data',
+    'triagem': 'data',
+    'campanha': 'data_inicio',
+    'evento': 'data_inicio',
+    'hospedagem': 'data_entrada',
+}
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# Tipos do PostgreSQL (OID) que o Parquet guarda com tipo próprio; os demais viram texto
+_TIPOS_ARROW = {
+    16: lambda coluna: pyarrow.bool_(),
+    20: lambda coluna: pyarrow.int64(),
+    21: lambda coluna: pyarrow.int16(),
+    23: lambda coluna: pyarrow.int32(),
+    700: lambda coluna: pyarrow.float32(),
+    701: lambda coluna: pyarrow.float64(),
+    1082: lambda coluna: pyarrow.date32(),
+    1114: lambda coluna: pyarrow.timestamp('us'),
+    1700: lambda coluna: (pyarrow.decimal128(coluna.precision, coluna.scale)
+                          if coluna.precision else pyarrow.float64()),
+}
+
+
+class Exportacao:
+    """Uma tabela ou consulta a exportar e, se incremental, o intervalo da marca d'água"""
+
+    def __init__(self, nome, consulta, coluna_marca=None):
+        self.nome = nome
+        self.consulta = consulta
+        self.coluna_marca = coluna_marca
+        self.marca = None   # início do intervalo (inclusivo), da exportação anterior
+        self.limite = None  # fim do intervalo (exclusivo), gravado como próxima marca
+
+    def sql(self, cursor):
+        if self.coluna_marca is None:
+            return self.consulta
+        condicoes = [f"{self.coluna_marca} < %(limite)s"]
+        if self.marca is not None:
+            condicoes.insert(0, f"{self.coluna_marca} >= %(marca)s")
+        sql_consulta = (f"SELECT * FROM ({self.consulta}) exportada WHERE {' AND '.join(condicoes)} "
+                        f"ORDER BY {self.coluna_marca}")
+        return cursor.mogrify(sql_consulta, {'marca': self.marca, 'limite': self.limite}).decode()
+
+
+def _nome_arquivo(texto):
+    """Nome de arquivo a partir do nome de uma consulta ('Gastos por tipo' -> 'gastos_por_tipo')"""
+    return re.sub(r'[^0-9a-z]+', '_', texto.lower()).strip('_')
+
+
+def limite_marca(cursor, tabela, coluna, atraso_minutos):
+    """Fim do intervalo incremental: hoje para colunas DATE (só dias fechados) e agora
+    menos o atraso para TIMESTAMP, para não perder linhas de transações ainda abertas"""
+    cursor.execute("SELECT data_type FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+                   (tabela, coluna))
+    tipo, = cursor.fetchone()
+    if tipo == 'date':
+        cursor.execute("SELECT CURRENT_DATE")
+    else:
+        cursor.execute("SELECT (now() - make_interval(mins => %s))::timestamp", (atraso_minutos,))
+    return cursor.fetchone()[0].isoformat()
+
+
+def _tipos_arrow(cursor, consulta):
+    cursor.execute(f"SELECT * FROM ({consulta}) tipos LIMIT 0")
+    return {coluna.name: _TIPOS_ARROW.get(coluna.type_code, lambda c: pyarrow.string())(coluna)
+            for coluna in cursor.description}
+
+
+def _copiar_csv(cursor, sql_consulta, caminho, comprimir):
+    abrir = gzip.open if comprimir else open
+    with abrir(caminho, 'wb') as saida:
+        cursor.copy_expert(f"COPY ({sql_consulta}) TO STDOUT WITH (FORMAT csv, HEADER)", saida,
+                           size=TAMANHO_BLOCO)
+    return cursor.rowcount
+
+
+def _copiar_parquet(conexao, sql_consulta, caminho):
+    """Lê o CSV do COPY por um pipe em blocos e grava cada bloco como um grupo de linhas"""
+    with conexao.cursor() as cursor:
+        tipos = _tipos_arrow(cursor, sql_consulta)
+    leitura, escrita = os.pipe()
+    resultado = {}
+
+    def copiar():
+        try:
+            with conexao.cursor() as cursor, os.fdopen(escrita, 'wb') as saida:
+                cursor.copy_expert(f"COPY ({sql_consulta}) TO STDOUT WITH (FORMAT csv, HEADER)", saida,
+                                   size=TAMANHO_BLOCO)
+                resultado['linhas'] = cursor.rowcount
+        except BaseException as e:
+            resultado['erro'] = e
+
+    produtor = threading.Thread(target=copiar)
+    produtor.start()
+    try:
+        with os.fdopen(leitura, 'rb') as entrada:
+            leitor = pyarrow.csv.open_csv(
+                entrada,
+                read_options=pyarrow.csv.ReadOptions(block_size=TAMANHO_BLOCO),
+                parse_options=pyarrow.csv.ParseOptions(newlines_in_values=True),
+                # No CSV do COPY, NULL é o campo vazio e a string vazia vem entre aspas
+                convert_options=pyarrow.csv.ConvertOptions(
+                    column_types=tipos, true_values=['t'], false_values=['f'], null_values=[''],
+                    strings_can_be_null=True, quoted_strings_can_be_null=False))
+            with pyarrow.parquet.ParquetWriter(caminho, leitor.schema) as escritor:
+                for lote in leitor:
+                    escritor.write_batch(lote)
+    except BaseException:
+        # O pipe já foi fechado: o COPY termina com erro em vez de travar. Um erro do
+        # COPY (consulta inválida, conexão perdida) é a causa do erro na leitura.
+        produtor.join()
+        erro = resultado.get('erro')
+        if erro is not None and not isinstance(erro, BrokenPipeError):
+            raise erro
+        raise
+    produtor.join()
+    if 'erro' in resultado:
+        raise resultado['erro']
+    return resultado['linhas']
+
+
+def exportar(exportacao, diretorio, formato, comprimir, atraso_minutos):
+    """Exporta uma tabela ou consulta para um arquivo; devolve (arquivo, linhas, segundos).
+
+    Numa exportação incremental sem intervalo novo (rodada de novo no mesmo dia) nada
+    é gravado e o arquivo devolvido é None.
+    """
+    inicio = time.perf_counter()
+    conexao = psycopg2.connect(**DB_CONFIG)
+    try:
+        conexao.set_session(readonly=True)
+        with conexao.cursor() as cursor:
+            nome = exportacao.nome
+            if exportacao.coluna_marca:
+                exportacao.limite = limite_marca(cursor, exportacao.nome, exportacao.coluna_marca, atraso_minutos)
+                if exportacao.marca is not None and exportacao.limite <= exportacao.marca:
+                    return None, 0, time.perf_counter() - inicio
+                nome += '_' + re.sub(r'[^0-9]', '', exportacao.limite)[:14]
+            sql_consulta = exportacao.sql(cursor)
+        extensao = '.parquet' if formato == 'parquet' else '.csv.gz' if comprimir else '.csv'
+        caminho = os.path.join(diretorio, nome + extensao)
+        # Grava num temporário: um arquivo com o nome final está sempre completo
+        temporario = caminho + '.tmp'
+        try:
+            if formato == 'parquet':
+                linhas = _copiar_parquet(conexao, sql_consulta, temporario)
+            else:
+                with conexao.cursor() as cursor:
+                    linhas = _copiar_csv(cursor, sql_consulta, temporario, comprimir)
+            conexao.commit()
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+    finally:
+        conexao.close()
+    return caminho, linhas, time.perf_counter() - inicio
+
+
+def ler_estado(caminho):
+    if caminho and os.path.exists(caminho):
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def gravar_estado(caminho, estado):
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Exporta tabelas e consultas com COPY ... TO STDOUT")
+    parser.add_argument('--tabelas', default=','.join(TABELAS_PADRAO),
+                        help="Tabelas separadas por vírgula ('' para nenhuma)")
+    parser.add_argument('--consultas', action='append', default=[], metavar='TRECHO',
+                        help="Exporta também as consultas de consultas.sql cujo nome contém o trecho; pode repetir")
+    parser.add_argument('--formato', choices=('csv', 'parquet'), default='csv')
+    parser.add_argument('--gzip', action='store_true', help="Comprime os arquivos CSV")
+    parser.add_argument('--saida', default='exportacao', help="Diretório dos arquivos")
+    parser.add_argument('--paralelo', type=int, default=4, help="Exportações simultâneas (uma conexão cada)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Exporta só as linhas novas desde a última exportação, pela coluna de data "
+                             f"de cada tabela ({', '.join(f'{t}.{c}' for t, c in COLUNAS_MARCA.items())})")
+    parser.add_argument('--estado', help="Arquivo JSON com as marcas d'água (padrão: SAIDA/estado.json)")
+    parser.add_argument('--atraso-minutos', type=int, default=5,
+                        help="Colunas TIMESTAMP só são exportadas até agora menos este atraso")
+    args = parser.parse_args()
+    if args.formato == 'parquet' and pyarrow is None:
+        parser.error("O formato parquet precisa do pacote pyarrow (pip install pyarrow)")
+    if args.formato == 'parquet' and args.gzip:
+        parser.error("--gzip só vale para CSV (o Parquet já é comprimido)")
+    return args
+
+
+def main():
+    args = ler_argumentos()
+    os.makedirs(args.saida, exist_ok=True)
+    estado_caminho = args.estado or os.path.join(args.saida, 'estado.json')
+    estado = ler_estado(estado_caminho) if args.incremental else {}
+
+    exportacoes = []
+    for tabela in filter(None, (t.strip() for t in args.tabelas.split(','))):
+        if args.incremental and tabela not in COLUNAS_MARCA:
+            print(f"{tabela}: sem coluna de data conhecida, exportada inteira")
+        exportacao = Exportacao(tabela, f"SELECT * FROM {tabela}",
+                                COLUNAS_MARCA.get(tabela) if args.incremental else None)
+        exportacao.marca = estado.get(tabela)
+        exportacoes.append(exportacao)
+    if args.consultas:
+        for nome, sql_consulta in consultas.ler_consultas().items():
+            if any(t.lower() in nome.lower() for t in args.consultas):
+                exportacoes.append(Exportacao(_nome_arquivo(nome), sql_consulta))
+
+    falhas = 0
+    with ThreadPoolExecutor(max(1, args.paralelo)) as executor:
+        futuros = {executor.submit(exportar, exportacao, args.saida, args.formato, args.gzip,
+                                   args.atraso_minutos): exportacao
+                   for exportacao in exportacoes}
+        for futuro in as_completed(futuros):
+            exportacao = futuros[futuro]
+            try:
+                caminho, linhas, segundos = futuro.result()
+            except Exception as e:
+                falhas += 1
+                print(f"{exportacao.nome}: erro: {e}")
+                continue
+            if caminho is None:
+                print(f"{exportacao.nome}: nenhum intervalo novo desde {exportacao.marca}")
+                continue
+            print(f"{exportacao.nome}: {linhas} linhas em {segundos:.1f}s -> {caminho}")
+            # A marca só avança depois que o arquivo está completo
+            if exportacao.coluna_marca:
+                estado[exportacao.nome] = exportacao.limite
+                gravar_estado(estado_caminho, estado)
+    if falhas:
+        raise SystemExit(f"{falhas} exportações falharam")
+
+
+if __name__ == "__main__":
+    main()
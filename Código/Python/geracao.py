@@ -0,0 +1,141 @@
+import hashlib
+import multiprocessing
+from collections import deque
+import random
+import sys
+import threading
+import time
+
+from faker import Faker
+
+import metricas
+
+TAMANHO_FRAGMENTO = 10000
+
+semente_mestre = 0
+rodada = 0
+num_workers = 1
+
+_local = threading.local()
+
+# Fases rodam em threads (agendador.py) e cada uma pode abrir o seu pool de processos;
+# o forkserver evita fazer fork de um processo com várias threads.
+if 'forkserver' in multiprocessing.get_all_start_methods():
+    _contexto = multiprocessing.get_context('forkserver')
+else:
+    _contexto = multiprocessing.get_context()
+
+
+def configurar_geracao(semente, workers=1, tamanho_fragmento=None, rodada_carga=0):
+    """Define a semente mestre, o número de processos e o tamanho dos fragmentos.
+
+    rodada_carga diferencia cargas incrementais (--append) feitas com a mesma semente,
+    para que não repitam os sorteios da carga anterior.
+    """
+    global semente_mestre, rodada, num_workers, TAMANHO_FRAGMENTO
+    semente_mestre = semente
+    rodada = rodada_carga
+    num_workers = max(1, workers)
+    if tamanho_fragmento:
+        TAMANHO_FRAGMENTO = tamanho_fragmento
+
+
+def semente_fragmento(fase, numero):
+    """Deriva a semente de um fragmento a partir da semente mestre, da fase e do número do fragmento"""
+    if rodada:
+        dados = f"{semente_mestre}:{rodada}:{fase}:{numero}".encode()
+    else:
+        dados = f"{semente_mestre}:{fase}:{numero}".encode()
+    return int.from_bytes(hashlib.sha256(dados).digest()[:8], 'big')
+
+
+def _faker():
+    """Instância de Faker reaproveitada pelos fragmentos gerados na mesma thread"""
+    if not hasattr(_local, 'fake'):
+        _local.fake = Faker('pt_BR')
+    return _local.fake
+
+
+def _gerar_fragmento(gerador, semente, inicio, quantidade):
+    fake = _faker()
+    fake.seed_instance(semente)
+    return gerador(random.Random(semente), fake, inicio, quantidade)
+
+
+def _executar_fragmento(tarefa):
+    """Gera um fragmento no processo filho; devolve as linhas, a CPU gasta e o pico de memória"""
+    cpu = time.process_time()
+    linhas = list(_gerar_fragmento(*tarefa))
+    return linhas, time.process_time() - cpu, metricas.pico_rss()
+
+
+def _linhas_do_worker(resultado):
+    linhas, cpu, rss = resultado.get()
+    metricas.registrar_worker(cpu, rss)
+    return linhas
+
+
+def _inicializar_worker(nome_modulo, registros):
+    """Copia os registros de chaves para o módulo dos geradores no processo filho"""
+    modulo = sys.modules[nome_modulo]
+    for nome, valor in registros.items():
+        setattr(modulo, nome, valor)
+
+
+def _modulo_do_gerador(gerador):
+    # Geradores com argumentos fixados por functools.partial guardam a função em .func
+    return getattr(gerador, 'func', gerador).__module__
+
+
+def _tarefas(gerador, fase, total, tamanho, primeiro=0):
+    for numero, inicio in enumerate(range(0, total, tamanho)):
+        if numero < primeiro:
+            continue
+        # A semente é calculada aqui porque o processo filho não herda semente_mestre
+        yield numero, (gerador, semente_fragmento(fase, numero), inicio, min(tamanho, total - inicio))
+
+
+def gerar_em_fragmentos(fase, gerador, total, registros=None, fragmentar=True,
+                        primeiro=0, ao_concluir=None):
+    """Gera as linhas de uma fase em fragmentos, cada um com sua própria semente.
+
+    gerador(rng, fake, inicio, quantidade) produz as linhas das posições
+    [inicio, inicio + quantidade) da fase. Como a semente de cada fragmento só
+    depende da semente mestre, da fase e do número do fragmento, o resultado é o
+    mesmo com qualquer número de processos. Com mais de um worker os fragmentos
+    são gerados num pool de processos e devolvidos na ordem original; registros
+    é o dicionário {nome: lista} das chaves que os geradores leem no processo filho.
+
+    Fases que dependem de estado compartilhado entre todas as linhas (por exemplo,
+    um sorteio sem repetição sobre a tabela inteira) devem usar fragmentar=False.
+
+    Para retomar uma carga, primeiro pula os fragmentos já gravados; ao_concluir(numero)
+    é chamada depois que todas as linhas de cada fragmento foram consumidas.
+    """
+    if total <= 0:
+        return
+    tamanho = TAMANHO_FRAGMENTO if fragmentar else total
+    tarefas = _tarefas(gerador, fase, total, tamanho, primeiro)
+    ao_concluir = ao_concluir or (lambda numero: None)
+
+    if num_workers <= 1 or total <= tamanho:
+        for numero, tarefa in tarefas:
+            yield from _gerar_fragmento(*tarefa)
+            ao_concluir(numero)
+        return
+
+    # No máximo dois fragmentos por worker ficam em andamento, para que a memória
+    # não cresça quando o banco consome as linhas mais devagar do que são geradas.
+    with _contexto.Pool(num_workers, initializer=_inicializar_worker,
+                        initargs=(_modulo_do_gerador(gerador), registros or {})) as pool:
+        pendentes = deque()
+        for numero, tarefa in tarefas:
+            pendentes.append((numero, pool.apply_async(_executar_fragmento, (tarefa,))))
+            if len(pendentes) >= 2 * num_workers:
+                concluido, resultado = pendentes.popleft()
+                yield from _linhas_do_worker(resultado)
+                ao_concluir(concluido)
+        while pendentes:
+            concluido, resultado = pendentes.popleft()
+            yield from _linhas_do_worker(resultado)
+            ao_concluir(concluido)
@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+import geracao
+import metricas
+
+# Com ativa=True (popular_bd.py --geracao-servidor) as tabelas de relacionamento são
+# geradas pelo próprio PostgreSQL com INSERT ... SELECT: nenhuma linha passa pela rede.
+ativa = False
+
+# Cada pai recebe entre `minimo` e `maximo` filhos distintos. Os filhos são numerados
+# numa ordem embaralhada (md5 da chave) e cada pai pega uma janela consecutiva dessa
+# numeração a partir de um deslocamento sorteado, o que garante filhos distintos por pai
+# (e a PK do relacionamento) sem sortear de novo nem filtrar repetidos.
+Relacionamento = namedtuple('Relacionamento', 'tabela coluna_pai pais coluna_filho filhos minimo maximo')
+
+RELACIONAMENTOS = {
+    'funcao': Relacionamento(
+        'funcao', 'voluntario_cpf', 'SELECT cpf AS chave FROM voluntario',
+        'funcao', "SELECT unnest(ARRAY['Resgate', 'Cuidador', 'Transporte', 'Triagem', "
+                  "'Administração', 'Captação de Recursos']) AS chave",
+        1, 3),
+    'participantes': Relacionamento(
+        'participantes', 'campanha_id', 'SELECT id AS chave FROM campanha',
+        'pessoa_cpf', 'SELECT cpf AS chave FROM pessoa', 15, 80),
+    'cuida_lar': Relacionamento(
+        'cuida_lar', 'lar_id', 'SELECT id AS chave FROM lar_temporario',
+        'voluntario_cpf', 'SELECT cpf AS chave FROM voluntario', 2, 6),
+    'voluntarios_evento': Relacionamento(
+        'voluntarios_evento', 'evento_id', 'SELECT id AS chave FROM evento',
+        'voluntario_cpf', 'SELECT cpf AS chave FROM voluntario', 3, 15),
+    'gatos_evento': Relacionamento(
+        'gatos_evento', 'evento_id', 'SELECT id AS chave FROM evento',
+        'gato_id', 'SELECT id AS chave FROM gato', 5, 25),
+}
+
+# Só os pais que ainda não têm nenhuma linha no relacionamento recebem filhos, então
+# a mesma consulta serve para a carga inicial e para --append.
+_SQL_RELACIONAMENTO = """
+WITH filhos AS MATERIALIZED (
+    SELECT (row_number() OVER (ORDER BY md5(f.chave::text), f.chave) - 1)::int AS posicao, f.chave
+    FROM ({filhos}) f
+),
+total AS (SELECT count(*)::int AS n FROM filhos),
+pais AS (
+    SELECT p.chave,
+           LEAST({minimo} + floor(random() * {amplitude})::int, total.n) AS quantidade,
+           floor(random() * total.n)::int AS deslocamento
+    FROM ({pais}) p, total
+    WHERE total.n > 0
+      AND NOT EXISTS (SELECT 1 FROM {tabela} r WHERE r.{coluna_pai} = p.chave)
+    ORDER BY p.chave
+)
+INSERT INTO {tabela} ({coluna_pai}, {coluna_filho})
+SELECT pais.chave, filhos.chave
+FROM pais, total, generate_series(0, pais.quantidade - 1) AS i, filhos
+WHERE filhos.posicao = (pais.deslocamento + i) % total.n
+"""
+
+_SQL_FOTOS_GATO = """
+INSERT INTO fotos_gato (gato_id, foto_url)
+SELECT g.id, format('https://example.com/gatos/gato_%s_foto_%s.jpg', g.id, i)
+FROM (
+    SELECT id, 1 + floor(random() * 4)::int AS quantidade
+    FROM gato g
+    WHERE NOT EXISTS (SELECT 1 FROM fotos_gato f WHERE f.gato_id = g.id)
+    ORDER BY id
+) g, generate_series(1, g.quantidade) AS i
+"""
+
+
+def _semear(cursor, fase):
+    """Semeia random() da sessão a partir da semente mestre, como os fragmentos de geracao.py"""
+    semente = geracao.semente_fragmento(fase, 0)
+    cursor.execute("SELECT setseed(%s)", (semente / 2**63 - 1,))
+
+
+def sql_relacionamento(relacionamento):
+    return _SQL_RELACIONAMENTO.format(
+        amplitude=relacionamento.maximo - relacionamento.minimo + 1, **relacionamento._asdict())
+
+
+def gerar_relacionamento(cursor, tabela):
+    """Gera as linhas de uma tabela de relacionamento no servidor; devolve quantas foram inseridas"""
+    _semear(cursor, tabela)
+    if tabela == 'fotos_gato':
+        cursor.execute(_SQL_FOTOS_GATO)
+    else:
+        cursor.execute(sql_relacionamento(RELACIONAMENTOS[tabela]))
+    metricas.registrar_linhas(cursor.rowcount)
+    return cursor.rowcount
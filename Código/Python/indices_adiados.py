@@ -0,0 +1,228 @@
+import time
+from collections import namedtuple
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+
+import agendador
+
+# Índice como estava antes da carga; tipo_restricao é 'p' ou 'u' quando o índice
+# sustenta uma PRIMARY KEY ou UNIQUE (definida por definicao_restricao), e None para
+# índices avulsos (uq_endereco_unico). particionada indica tabela particionada, cujos
+# índices e restrições são recriados a partir da tabela pai.
+Indice = namedtuple('Indice', 'tabela nome definicao tipo_restricao definicao_restricao particionada')
+# Restrição CHECK ('c') ou FOREIGN KEY ('f') com a definição de pg_get_constraintdef
+Restricao = namedtuple('Restricao', 'tabela nome tipo definicao particionada')
+Definicoes = namedtuple('Definicoes', 'indices restricoes gatilhos comentario')
+
+MAINTENANCE_WORK_MEM = '1GB'
+WORKERS_MANUTENCAO = 4
+
+_SQL_INDICES = """
+    SELECT t.relname, i.relname, pg_get_indexdef(i.oid), c.contype,
+           pg_get_constraintdef(c.oid), t.relkind = 'p'
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    LEFT JOIN pg_constraint c
+           ON c.conindid = i.oid AND c.conrelid = t.oid AND c.contype IN ('p', 'u')
+    WHERE n.nspname = 'public' AND t.relkind IN ('r', 'p') AND NOT t.relispartition
+    ORDER BY t.relname, i.relname
+"""
+
+_SQL_RESTRICOES = """
+    SELECT t.relname, c.conname, c.contype, pg_get_constraintdef(c.oid), t.relkind = 'p'
+    FROM pg_constraint c
+    JOIN pg_class t ON t.oid = c.conrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = 'public' AND t.relkind IN ('r', 'p') AND NOT t.relispartition
+      AND c.contype IN ('c', 'f')
+    ORDER BY t.relname, c.conname
+"""
+
+# Tabelas com triggers de usuário ligados (por exemplo os das tabelas de resumo)
+_SQL_GATILHOS = """
+    SELECT DISTINCT c.relname
+    FROM pg_trigger t
+    JOIN pg_class c ON c.oid = t.tgrelid
+    WHERE c.relnamespace = 'public'::regnamespace AND NOT t.tgisinternal AND t.tgenabled <> 'D'
+    ORDER BY c.relname
+"""
+
+
+def capturar_definicoes(cur):
+    """Lê do catálogo os índices, CHECKs, FKs e triggers das tabelas do schema public"""
+    cur.execute(_SQL_INDICES)
+    indices = [Indice(*linha) for linha in cur.fetchall()]
+    cur.execute(_SQL_RESTRICOES)
+    restricoes = [Restricao(*linha) for linha in cur.fetchall()]
+    cur.execute(_SQL_GATILHOS)
+    gatilhos = [tabela for (tabela,) in cur.fetchall()]
+    cur.execute("SELECT obj_description('public'::regnamespace, 'pg_namespace')")
+    return Definicoes(indices, restricoes, gatilhos, cur.fetchone()[0])
+
+
+def remover(config):
+    """Remove índices e restrições antes da carga e devolve as definições para recriá-los.
+
+    Os triggers de usuário também são desligados; os resumos que eles mantêm são
+    recalculados de uma vez no final.
+
+    O comentário do schema (hash gravado pelo resetar_bd) também é apagado, para que
+    um reset depois de uma carga interrompida recrie as tabelas em vez de só esvaziá-las.
+    """
+    con = psycopg2.connect(**config)
+    try:
+        cur = con.cursor()
+        definicoes = capturar_definicoes(cur)
+        # FKs primeiro: elas dependem dos índices únicos das tabelas referenciadas
+        for restricao in sorted(definicoes.restricoes, key=lambda r: r.tipo != 'f'):
+            cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+                sql.Identifier(restricao.tabela), sql.Identifier(restricao.nome)))
+        for indice in definicoes.indices:
+            if indice.tipo_restricao:
+                cur.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+                    sql.Identifier(indice.tabela), sql.Identifier(indice.nome)))
+            else:
+                cur.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(indice.nome)))
+        for tabela in definicoes.gatilhos:
+            cur.execute(sql.SQL("ALTER TABLE {} DISABLE TRIGGER USER").format(sql.Identifier(tabela)))
+        cur.execute("COMMENT ON SCHEMA public IS NULL")
+        con.commit()
+        cur.close()
+    finally:
+        con.close()
+    print(f"{len(definicoes.indices)} índices e {len(definicoes.restricoes)} restrições removidos até o fim da carga")
+    return definicoes
+
+
+def _executar_em_paralelo(pool, tarefas, paralelismo, configurar=None):
+    """Roda cada tarefa {nome: comandos} numa conexão do pool, em autocommit"""
+    def rodar(nome):
+        con = pool.getconn()
+        try:
+            con.autocommit = True
+            with con.cursor() as cur:
+                if configurar:
+                    configurar(cur)
+                for comando in tarefas[nome]:
+                    cur.execute(comando)
+        finally:
+            con.autocommit = False
+            pool.putconn(con)
+
+    return agendador.executar_fases({nome: () for nome in tarefas}, rodar, paralelismo)
+
+
+def _comandos_indice(indice):
+    if indice.particionada:
+        # ADD CONSTRAINT ... USING INDEX não vale para tabelas particionadas, e o índice
+        # da tabela pai vem como CREATE INDEX ... ON ONLY, que não desce às partições
+        if indice.tipo_restricao:
+            return [sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                sql.Identifier(indice.tabela), sql.Identifier(indice.nome),
+                sql.SQL(indice.definicao_restricao))]
+        return [sql.SQL(indice.definicao.replace(' ON ONLY ', ' ON ', 1))]
+
+    comandos = [sql.SQL(indice.definicao)]
+    if indice.tipo_restricao:
+        # O índice é criado sozinho (em paralelo) e só depois vira a restrição
+        tipo = 'PRIMARY KEY' if indice.tipo_restricao == 'p' else 'UNIQUE'
+        comandos.append(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {} USING INDEX {}").format(
+            sql.Identifier(indice.tabela), sql.Identifier(indice.nome), sql.SQL(tipo),
+            sql.Identifier(indice.nome)))
+    return comandos
+
+
+def restaurar(config, definicoes, paralelismo=4, maintenance_work_mem=MAINTENANCE_WORK_MEM,
+              workers_manutencao=WORKERS_MANUTENCAO):
+    """Recria índices e restrições depois da carga e devolve {etapa: segundos}.
+
+    1. índices (e as PKs/UNIQUEs sobre eles) em até `paralelismo` conexões, maiores
+       tabelas primeiro, com maintenance_work_mem e workers paralelos de manutenção;
+    2. CHECKs e FKs adicionadas como NOT VALID, o que não lê as tabelas;
+    3. VALIDATE CONSTRAINT em paralelo, uma tarefa por tabela;
+    4. triggers religados e, se existirem, resumos recalculados (recalcular_resumos).
+    """
+    etapas = {}
+    pool = ThreadedConnectionPool(1, paralelismo, **config)
+    try:
+        def configurar(cur):
+            cur.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+            cur.execute("SET max_parallel_maintenance_workers = %s", (workers_manutencao,))
+
+        con = pool.getconn()
+        try:
+            with con.cursor() as cur:
+                cur.execute("SELECT relname, (SELECT SUM(pg_relation_size(relid)) FROM pg_partition_tree(oid)) "
+                            "FROM pg_class WHERE relnamespace = 'public'::regnamespace "
+                            "AND relkind IN ('r', 'p') AND NOT relispartition")
+                tamanhos = dict(cur.fetchall())
+            con.commit()
+        finally:
+            pool.putconn(con)
+
+        indices = sorted(definicoes.indices, key=lambda i: -(tamanhos.get(i.tabela) or 0))
+        inicio = time.perf_counter()
+        _executar_em_paralelo(pool, {i.nome: _comandos_indice(i) for i in indices},
+                              paralelismo, configurar)
+        etapas['índices'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        con = pool.getconn()
+        try:
+            with con.cursor() as cur:
+                for restricao in definicoes.restricoes:
+                    # A definição vai como argumento: regexes como [A-Z]{2} têm chaves.
+                    # Tabelas particionadas não aceitam NOT VALID: a restrição já é validada aqui.
+                    cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}{}").format(
+                        sql.Identifier(restricao.tabela), sql.Identifier(restricao.nome),
+                        sql.SQL(restricao.definicao),
+                        sql.SQL('' if restricao.particionada else ' NOT VALID')))
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+        finally:
+            pool.putconn(con)
+        etapas['restrições NOT VALID'] = time.perf_counter() - inicio
+
+        validacoes = {}
+        for restricao in definicoes.restricoes:
+            if restricao.particionada:
+                continue
+            validacoes.setdefault(restricao.tabela, []).append(
+                sql.SQL("ALTER TABLE {} VALIDATE CONSTRAINT {}").format(
+                    sql.Identifier(restricao.tabela), sql.Identifier(restricao.nome)))
+        inicio = time.perf_counter()
+        _executar_em_paralelo(pool, validacoes, paralelismo, configurar)
+        etapas['VALIDATE'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        con = pool.getconn()
+        try:
+            with con.cursor() as cur:
+                for tabela in definicoes.gatilhos:
+                    cur.execute(sql.SQL("ALTER TABLE {} ENABLE TRIGGER USER").format(sql.Identifier(tabela)))
+                cur.execute("SELECT to_regprocedure('recalcular_resumos()') IS NOT NULL "
+                            "AND to_regclass('resumo_gasto_tipo') IS NOT NULL")
+                if cur.fetchone()[0]:
+                    cur.execute("SELECT recalcular_resumos()")
+                    etapas['resumos'] = time.perf_counter() - inicio
+                cur.execute(sql.SQL("COMMENT ON SCHEMA public IS {}").format(sql.Literal(definicoes.comentario)))
+            con.commit()
+        finally:
+            pool.putconn(con)
+    finally:
+        pool.closeall()
+    return etapas
+
+
+def imprimir_resumo(etapas):
+    """Mostra o tempo gasto em cada etapa da carga com índices adiados"""
+    print("\nEtapa                     Duração (s)")
+    for etapa, segundos in etapas.items():
+        print(f"{etapa:<25} {segundos:>11.2f}")
+    print(f"{'total':<25} {sum(etapas.values()):>11.2f}")
@@ -0,0 +1,190 @@
+import argparse
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from psycopg2.pool import ThreadedConnectionPool
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+# Listagens de consultas.sql paginadas por chave (keyset): cada página continua depois
+# da chave de ordenação da última linha da anterior, com WHERE sobre essa chave em vez
+# de OFFSET, então o custo de uma página não cresce com a sua posição. As linhas vêm de
+# um cursor nomeado (do lado do servidor) em lotes de TAMANHO_LOTE.
+
+TAMANHO_LOTE = 500
+TAMANHO_PAGINA = 50
+
+# consulta: SELECT com '{filtros}' no fim do WHERE; chave: (expressão, ASC/DESC) de
+# ordenação, única por linha; posicoes: índices dessas expressões na linha devolvida
+Listagem = namedtuple('Listagem', 'consulta chave posicoes filtros')
+
+LISTAGENS = {
+    # Gatos disponíveis para adoção (usa idx_gato_disponivel de indices.sql)
+    'gatos_disponiveis': Listagem(
+        """
+        SELECT g.id, g.nome, g.idade, g.cor, g.raca, g.condicao_saude
+        FROM gato g
+        WHERE g.adotado IS NOT TRUE {filtros}
+        """,
+        (('g.id', 'ASC'),), (0,),
+        {'raca': 'g.raca = %(raca)s', 'cor': 'g.cor = %(cor)s'}),
+    # Gatos atualmente hospedados e o lar onde estão (usa idx_hospedagem_ativa, que já
+    # está em data_entrada DESC, gato_id)
+    'gatos_hospedados': Listagem(
+        """
+        SELECT h.gato_id, g.nome AS nome_gato, h.lar_temporario_id, h.data_entrada
+        FROM hospedagem h
+        JOIN gato g ON g.id = h.gato_id
+        WHERE h.data_saida IS NULL {filtros}
+        """,
+        (('h.data_entrada', 'DESC'), ('h.gato_id', 'ASC'), ('h.lar_temporario_id', 'ASC')), (3, 0, 2),
+        {'lar_id': 'h.lar_temporario_id = %(lar_id)s'}),
+    # Voluntários por lar temporário
+    'voluntarios_por_lar': Listagem(
+        """
+        SELECT cl.lar_id, pe.nome AS voluntario, v.cpf
+        FROM cuida_lar cl
+        JOIN voluntario v ON v.cpf = cl.voluntario_cpf
+        JOIN pessoa pe ON pe.cpf = v.cpf
+        WHERE TRUE {filtros}
+        """,
+        (('cl.lar_id', 'ASC'), ('pe.nome', 'ASC'), ('v.cpf', 'ASC')), (0, 1, 2),
+        {'lar_id': 'cl.lar_id = %(lar_id)s'}),
+}
+
+# linhas da página e a chave para pedir a seguinte (None na última página)
+Pagina = namedtuple('Pagina', 'linhas proxima')
+
+
+def _condicao_apos(chave):
+    """WHERE que pega as linhas depois da chave %(apos_N)s na ordem da listagem"""
+    direcoes = {direcao for _, direcao in chave}
+    if len(direcoes) == 1:
+        # Todas na mesma direção: comparação de linha, que o índice resolve como um intervalo
+        colunas = ', '.join(coluna for coluna, _ in chave)
+        valores = ', '.join(f"%(apos_{i})s" for i in range(len(chave)))
+        return f"({colunas}) {'>' if direcoes == {'ASC'} else '<'} ({valores})"
+    alternativas = []
+    for i, (coluna, direcao) in enumerate(chave):
+        iguais = [f"{anterior} = %(apos_{j})s" for j, (anterior, _) in enumerate(chave[:i])]
+        iguais.append(f"{coluna} {'>' if direcao == 'ASC' else '<'} %(apos_{i})s")
+        alternativas.append('(' + ' AND '.join(iguais) + ')')
+    # O limite redundante na primeira coluna é o que o índice usa como intervalo; sem
+    # ele o OR viraria filtro e cada página releria as anteriores
+    primeira, direcao = chave[0]
+    return f"{primeira} {'>=' if direcao == 'ASC' else '<='} %(apos_0)s AND ({' OR '.join(alternativas)})"
+
+
+def montar_sql(listagem, filtros, apos):
+    """SQL de uma página da listagem com os filtros informados"""
+    condicoes = [listagem.filtros[nome] for nome in filtros]
+    if apos is not None:
+        condicoes.append(_condicao_apos(listagem.chave))
+    sql_pagina = listagem.consulta.format(filtros=''.join(f"AND {c} " for c in condicoes))
+    ordem = ', '.join(f"{coluna} {direcao}" for coluna, direcao in listagem.chave)
+    return f"{sql_pagina}ORDER BY {ordem}\nLIMIT %(tamanho)s"
+
+
+class Listagens:
+    """Consultas paginadas sobre um pool de conexões; seguro para várias threads"""
+
+    def __init__(self, minimo=1, maximo=10, db_config=None):
+        self.pool = ThreadedConnectionPool(minimo, maximo, **(db_config or DB_CONFIG))
+
+    @contextmanager
+    def _conexao(self):
+        conexao = self.pool.getconn()
+        try:
+            conexao.readonly = True
+            yield conexao
+        finally:
+            # Só leitura: desfazer encerra a transação do cursor nomeado
+            conexao.rollback()
+            self.pool.putconn(conexao)
+
+    def pagina(self, nome, apos=None, tamanho=TAMANHO_PAGINA, **filtros):
+        """Uma página da listagem `nome` começando depois da chave `apos`"""
+        listagem = LISTAGENS[nome]
+        desconhecidos = set(filtros) - set(listagem.filtros)
+        if desconhecidos:
+            raise ValueError(f"Filtros desconhecidos para {nome}: {', '.join(sorted(desconhecidos))}")
+        parametros = dict(filtros, tamanho=tamanho)
+        if apos is not None:
+            parametros.update({f"apos_{i}": valor for i, valor in enumerate(apos)})
+
+        linhas = []
+        with self._conexao() as conexao:
+            with conexao.cursor(name=f"listagem_{nome}") as cursor:
+                cursor.execute(montar_sql(listagem, filtros, apos), parametros)
+                while True:
+                    lote = cursor.fetchmany(TAMANHO_LOTE)
+                    if not lote:
+                        break
+                    linhas.extend(lote)
+        proxima = None
+        if len(linhas) == tamanho:
+            proxima = tuple(linhas[-1][i] for i in listagem.posicoes)
+        return Pagina(linhas, proxima)
+
+    def gatos_disponiveis(self, apos=None, tamanho=TAMANHO_PAGINA, raca=None, cor=None):
+        filtros = {nome: valor for nome, valor in (('raca', raca), ('cor', cor)) if valor is not None}
+        return self.pagina('gatos_disponiveis', apos, tamanho, **filtros)
+
+    def gatos_hospedados(self, apos=None, tamanho=TAMANHO_PAGINA, lar_id=None):
+        filtros = {'lar_id': lar_id} if lar_id is not None else {}
+        return self.pagina('gatos_hospedados', apos, tamanho, **filtros)
+
+    def voluntarios_por_lar(self, apos=None, tamanho=TAMANHO_PAGINA, lar_id=None):
+        filtros = {'lar_id': lar_id} if lar_id is not None else {}
+        return self.pagina('voluntarios_por_lar', apos, tamanho, **filtros)
+
+    def percorrer(self, nome, tamanho=TAMANHO_LOTE, **filtros):
+        """Todas as linhas da listagem, página a página, sem guardar mais que uma página"""
+        apos = None
+        while True:
+            pagina = self.pagina(nome, apos, tamanho, **filtros)
+            yield from pagina.linhas
+            if pagina.proxima is None:
+                return
+            apos = pagina.proxima
+
+    def fechar(self):
+        self.pool.closeall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percorre uma listagem paginada e mede o tempo de cada página")
+    parser.add_argument('listagem', choices=list(LISTAGENS))
+    parser.add_argument('--tamanho', type=int, default=TAMANHO_PAGINA, help="Linhas por página")
+    parser.add_argument('--paginas', type=int, default=5, help="Páginas a ler (0 para todas)")
+    parser.add_argument('--mostrar', action='store_true', help="Imprime as linhas")
+    args = parser.parse_args()
+
+    listagens = Listagens(maximo=1)
+    try:
+        apos, numero = None, 0
+        while not args.paginas or numero < args.paginas:
+            inicio = time.perf_counter()
+            pagina = listagens.pagina(args.listagem, apos, args.tamanho)
+            numero += 1
+            print(f"Página {numero}: {len(pagina.linhas)} linhas em "
+                  f"{(time.perf_counter() - inicio) * 1000:.1f} ms (depois de {apos})")
+            if args.mostrar:
+                for linha in pagina.linhas:
+                    print(f"  {linha}")
+            if pagina.proxima is None:
+                break
+            apos = pagina.proxima
+    finally:
+        listagens.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória não é medido
+    resource = None
+
+# As fases rodam cada uma na sua thread (agendador.py): a fase em andamento fica
+# num threading.local e cada comando enviado ao banco é somado à fase da sua thread.
+_local = threading.local()
+_trava = threading.Lock()
+fases = {}
+
+
+class MetricasFase:
+    """Números de uma fase da carga"""
+
+    def __init__(self, fase):
+        self.fase = fase
+        self.duracao = 0.0
+        self.espera_bd = 0.0
+        self.cpu_thread = 0.0
+        self.cpu_cliente_bd = 0.0
+        self.cpu_workers = 0.0
+        self.linhas = 0
+        self.round_trips = 0
+        self.bytes_enviados = 0
+        self.pico_rss = None
+        self.pico_rss_workers = 0
+
+    @property
+    def cpu_geracao(self):
+        """CPU gasta gerando as linhas: a da thread fora das chamadas ao banco mais a dos workers"""
+        return self.cpu_thread - self.cpu_cliente_bd + self.cpu_workers
+
+    def como_dict(self):
+        return {
+            'fase': self.fase,
+            'duracao_s': self.duracao,
+            'espera_bd_s': self.espera_bd,
+            'cpu_geracao_s': self.cpu_geracao,
+            'cpu_workers_s': self.cpu_workers,
+            'linhas': self.linhas,
+            'linhas_por_s': self.linhas / self.duracao if self.duracao else 0.0,
+            'round_trips': self.round_trips,
+            'bytes_enviados': self.bytes_enviados,
+            'pico_rss_bytes': self.pico_rss,
+            'pico_rss_workers_bytes': self.pico_rss_workers,
+        }
+
+
+def pico_rss():
+    """Pico de memória residente do processo em bytes (None se não disponível)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def _atual():
+    return getattr(_local, 'atual', None)
+
+
+@contextmanager
+def medir_fase(fase):
+    """Mede a fase executada dentro do bloco, na thread atual"""
+    metricas = MetricasFase(fase)
+    with _trava:
+        fases[fase] = metricas
+    _local.atual = metricas
+    inicio = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield metricas
+    finally:
+        metricas.duracao = time.perf_counter() - inicio
+        metricas.cpu_thread = time.thread_time() - cpu
+        metricas.pico_rss = pico_rss()
+        _local.atual = None
+
+
+def registrar_comando(segundos, cpu, bytes_enviados):
+    metricas = _atual()
+    if metricas is not None:
+        metricas.espera_bd += segundos
+        metricas.cpu_cliente_bd += cpu
+        metricas.round_trips += 1
+        metricas.bytes_enviados += bytes_enviados
+
+
+def registrar_linhas(quantidade):
+    metricas = _atual()
+    if metricas is not None:
+        metricas.linhas += quantidade
+
+
+def registrar_worker(cpu, rss):
+    """Soma a CPU e o pico de memória informados por um processo de geração"""
+    metricas = _atual()
+    if metricas is not None:
+        metricas.cpu_workers += cpu
+        if rss is not None:
+            metricas.pico_rss_workers = max(metricas.pico_rss_workers, rss)
+
+
+class CursorMedido(psycopg2.extensions.cursor):
+    """Cursor que registra tempo, ida e volta e bytes de cada comando na fase atual.
+
+    Use como cursor_factory da conexão. execute_values envia uma página por execute,
+    então cada página conta como uma ida e volta; um COPY conta como uma.
+    """
+
+    def execute(self, query, vars=None):
+        inicio, cpu = time.perf_counter(), time.thread_time()
+        try:
+            return super().execute(query, vars)
+        finally:
+            registrar_comando(time.perf_counter() - inicio, time.thread_time() - cpu,
+                              len(self.query or b''))
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio, cpu = time.perf_counter(), time.thread_time()
+        posicao = file.tell()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            registrar_comando(time.perf_counter() - inicio, time.thread_time() - cpu,
+                              file.tell() - posicao + (len(sql) if isinstance(sql, str) else 0))
+
+
+def relatorio(estrategia, **extras):
+    """Relatório com as métricas de todas as fases e a estratégia de carga usada.
+
+    Os campos de `estrategia` viram rótulos no formato do Prometheus; `extras`
+    (semente, etapas) só vão para o JSON, exceto 'etapas', exportado como duração.
+    """
+    return {
+        **extras,
+        'estrategia': estrategia,
+        'fases': [metricas.como_dict() for metricas in fases.values()],
+        'pico_rss_bytes': pico_rss(),
+        'pico_rss_workers_bytes': max((m.pico_rss_workers for m in fases.values()), default=0),
+    }
+
+
+def imprimir_relatorio():
+    print("\nFase                      Linhas   Linhas/s   BD (%)  Geração (s)  Idas e voltas      MiB")
+    for metricas in fases.values():
+        dados = metricas.como_dict()
+        bd = 100 * metricas.espera_bd / metricas.duracao if metricas.duracao else 0.0
+        print(f"{metricas.fase:<25} {metricas.linhas:>7} {dados['linhas_por_s']:>10.0f} {bd:>8.1f} "
+              f"{metricas.cpu_geracao:>12.2f} {metricas.round_trips:>14} "
+              f"{metricas.bytes_enviados / 2**20:>8.1f}")
+    rss = pico_rss()
+    if rss is not None:
+        print(f"Pico de memória: {rss / 2**20:.0f} MiB")
+
+
+def gravar_json(caminho, dados):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def _rotulos(valores):
+    partes = []
+    for nome, valor in valores.items():
+        texto = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{nome}="{texto}"')
+    return '{' + ','.join(partes) + '}'
+
+
+# (nome da métrica, chave em como_dict, tipo, descrição)
+_METRICAS_PROMETHEUS = (
+    ('popular_bd_fase_duracao_segundos', 'duracao_s', 'gauge', 'Duração da fase'),
+    ('popular_bd_fase_espera_bd_segundos', 'espera_bd_s', 'gauge', 'Tempo esperando o banco'),
+    ('popular_bd_fase_cpu_geracao_segundos', 'cpu_geracao_s', 'gauge', 'CPU gasta gerando as linhas'),
+    ('popular_bd_fase_linhas', 'linhas', 'gauge', 'Linhas gravadas'),
+    ('popular_bd_fase_linhas_por_segundo', 'linhas_por_s', 'gauge', 'Vazão da fase'),
+    ('popular_bd_fase_round_trips', 'round_trips', 'gauge', 'Comandos enviados ao banco'),
+    ('popular_bd_fase_bytes_enviados', 'bytes_enviados', 'gauge', 'Bytes de comandos e dados enviados'),
+)
+
+
+def gravar_prometheus(caminho, dados):
+    """Grava o relatório no formato de texto do Prometheus (node_exporter textfile)"""
+    estrategia = dados['estrategia']
+    linhas = []
+    for nome, chave, tipo, descricao in _METRICAS_PROMETHEUS:
+        linhas.append(f"# HELP {nome} {descricao}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for fase in dados['fases']:
+            rotulos = _rotulos(dict(estrategia, fase=fase['fase']))
+            linhas.append(f"{nome}{rotulos} {fase[chave]}")
+    if dados['pico_rss_bytes'] is not None:
+        linhas.append("# HELP popular_bd_pico_rss_bytes Pico de memória residente do processo")
+        linhas.append("# TYPE popular_bd_pico_rss_bytes gauge")
+        linhas.append(f"popular_bd_pico_rss_bytes{_rotulos(estrategia)} {dados['pico_rss_bytes']}")
+    linhas.append("# HELP popular_bd_pico_rss_workers_bytes Maior pico de memória entre os workers de geração")
+    linhas.append("# TYPE popular_bd_pico_rss_workers_bytes gauge")
+    linhas.append(f"popular_bd_pico_rss_workers_bytes{_rotulos(estrategia)} {dados['pico_rss_workers_bytes']}")
+    if dados.get('etapas'):
+        linhas.append("# HELP popular_bd_etapa_duracao_segundos Duração das etapas (remoção, carga, índices...)")
+        linhas.append("# TYPE popular_bd_etapa_duracao_segundos gauge")
+        for etapa, segundos in dados['etapas'].items():
+            linhas.append(f"popular_bd_etapa_duracao_segundos{_rotulos(dict(estrategia, etapa=etapa))} {segundos}")
+
+    # O coletor de textfile pode ler o arquivo a qualquer momento: grava num
+    # temporário e renomeia
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(linhas) + '\n')
+    os.replace(temporario, caminho)
@@ -0,0 +1,176 @@
+import argparse
+import re
+from datetime import date
+
+import psycopg2
+from psycopg2 import sql
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+# Tabelas particionadas por mês em tabelas_particionadas.sql e a coluna de cada uma
+TABELAS_PARTICIONADAS = {
+    'contato': 'data_hora',
+    'doacao': 'data',
+    'gasto': 'data',
+    'procedimento': 'data_hora',
+}
+
+SCHEMA_ARQUIVO = 'arquivo'
+
+_NOME_PARTICAO = re.compile(r'^(?P<tabela>\w+)_p(?P<ano>\d{4})_(?P<mes>\d{2})$')
+
+
+def nome_particao(tabela, dia):
+    return f"{tabela}_p{dia.year:04d}_{dia.month:02d}"
+
+
+def nome_padrao(tabela):
+    """Partição padrão da tabela, que recebe as linhas dos meses sem partição"""
+    return f"{tabela}_padrao"
+
+
+def esta_particionada(cursor, tabela):
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", (tabela,))
+    linha = cursor.fetchone()
+    return bool(linha and linha[0])
+
+
+def _tem_gatilhos(cursor, tabela):
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(%s) "
+        "AND NOT tgisinternal AND tgenabled <> 'D')", (tabela,))
+    return cursor.fetchone()[0]
+
+
+class Roteador:
+    """Descobre a partição mensal de cada linha e cria as partições que faltam.
+
+    Com direto=True o EscritorTabela grava cada grupo de linhas direto na partição,
+    sem o roteamento de tuplas do PostgreSQL. Quando a tabela pai tem triggers de
+    comando (os das tabelas de resumo), que não disparam para gravações nas partições,
+    as linhas continuam indo para a tabela pai e o roteador só garante as partições.
+    """
+
+    def __init__(self, cursor, tabela, direto=True):
+        self.cursor = cursor
+        self.tabela = tabela
+        self.coluna = TABELAS_PARTICIONADAS[tabela]
+        self.direto = direto
+        self._existentes = set()
+
+    def particao(self, valor):
+        """Nome da partição que recebe uma linha com `valor` na coluna de particionamento"""
+        nome = nome_particao(self.tabela, valor)
+        if nome not in self._existentes:
+            self.cursor.execute("SELECT garantir_particao(%s, %s)",
+                                (self.tabela, date(valor.year, valor.month, 1)))
+            self._existentes.add(nome)
+        return nome if self.direto else self.tabela
+
+
+def roteador_para(cursor, tabela):
+    """Roteador para a tabela, ou None se ela não estiver particionada"""
+    if not esta_particionada(cursor, tabela):
+        return None
+    return Roteador(cursor, tabela, direto=not _tem_gatilhos(cursor, tabela))
+
+
+def listar_particoes(cursor, tabela):
+    """Partições mensais anexadas à tabela, como [(nome, primeiro dia do mês)] em ordem"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)", (tabela,))
+    particoes = []
+    for (nome,) in cursor.fetchall():
+        encontrado = _NOME_PARTICAO.match(nome)
+        if encontrado and encontrado['tabela'] == tabela:
+            particoes.append((nome, date(int(encontrado['ano']), int(encontrado['mes']), 1)))
+    return sorted(particoes, key=lambda particao: particao[1])
+
+
+def linhas_na_padrao(cursor, tabela):
+    """Linhas na partição padrão (0 se ela não existir); devem ir para partições mensais"""
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (nome_padrao(tabela),))
+    if not cursor.fetchone()[0]:
+        return 0
+    cursor.execute(sql.SQL("SELECT count(*) FROM {}").format(sql.Identifier(nome_padrao(tabela))))
+    return cursor.fetchone()[0]
+
+
+def arquivar(cursor, tabela, antes_de, remover=False):
+    """Desanexa as partições com meses anteriores a `antes_de`.
+
+    As partições desanexadas vão para o schema `arquivo` (ou são removidas com
+    remover=True); cada uma sai da tabela com um DETACH, sem DELETE linha a linha.
+    """
+    limite = date(antes_de.year, antes_de.month, 1)
+    arquivadas = []
+    cursor.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(SCHEMA_ARQUIVO)))
+    for nome, mes in listar_particoes(cursor, tabela):
+        if mes >= limite:
+            break
+        cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+            sql.Identifier(tabela), sql.Identifier(nome)))
+        if remover:
+            cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(nome)))
+        else:
+            cursor.execute(sql.SQL("ALTER TABLE {} SET SCHEMA {}").format(
+                sql.Identifier(nome), sql.Identifier(SCHEMA_ARQUIVO)))
+        arquivadas.append(nome)
+    return arquivadas
+
+
+def _data(texto):
+    return date.fromisoformat(texto)
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Cria, lista e arquiva partições mensais")
+    parser.add_argument('--tabela', action='append', choices=list(TABELAS_PARTICIONADAS),
+                        help="Tabela a tratar; pode repetir (padrão: todas as particionadas)")
+    parser.add_argument('--criar', nargs=2, type=_data, metavar=('INICIO', 'FIM'),
+                        help="Cria as partições mensais entre as datas (AAAA-MM-DD)")
+    parser.add_argument('--arquivar', type=_data, metavar='ANTES_DE',
+                        help="Desanexa as partições dos meses anteriores à data")
+    parser.add_argument('--remover', action='store_true',
+                        help="Com --arquivar, remove as partições em vez de movê-las para o schema arquivo")
+    return parser.parse_args()
+
+
+def main():
+    args = ler_argumentos()
+    tabelas = args.tabela or list(TABELAS_PARTICIONADAS)
+    con = psycopg2.connect(**DB_CONFIG)
+    try:
+        cur = con.cursor()
+        for tabela in tabelas:
+            if not esta_particionada(cur, tabela):
+                print(f"{tabela}: não está particionada (use resetar_bd.py --particionado)")
+                continue
+            if args.criar:
+                cur.execute("SELECT criar_particoes(%s, %s, %s)", (tabela, *args.criar))
+                print(f"{tabela}: {cur.fetchone()[0]} partições verificadas")
+            if args.arquivar:
+                arquivadas = arquivar(cur, tabela, args.arquivar, args.remover)
+                print(f"{tabela}: {len(arquivadas)} partições arquivadas {', '.join(arquivadas)}")
+            particoes = listar_particoes(cur, tabela)
+            if particoes:
+                print(f"{tabela}: {len(particoes)} partições, de {particoes[0][1]:%Y-%m} a {particoes[-1][1]:%Y-%m}")
+            pendentes = linhas_na_padrao(cur, tabela)
+            if pendentes:
+                print(f"{tabela}: {pendentes} linhas na partição padrão {nome_padrao(tabela)}; "
+                      f"crie os meses delas com --criar")
+        con.commit()
+        cur.close()
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,29 @@
 import psycopg2
-from faker import Faker
+from psycopg2.pool import ThreadedConnectionPool
 import random
 from datetime import timedelta
 import sys
+import time
+import argparse
 from decimal import Decimal
+from functools import partial
+
+import agendador
+import cache_snapshot
+import carga
+import distribuicoes
+import geracao
+import geracao_servidor
+import indices_adiados
+import metricas
+import particoes
+import retomada
+import unicos
+import vetorizado
+from carga import EscritorTabela
+from geracao import gerar_em_fragmentos
+from registros import ParticaoPapeis, RegistroChaves
 
-fake = Faker('pt_BR')
 DB_CONFIG = {
     'host': 'localhost',
     'database': 'postgres',
@@ -14,567 +32,971 @@ DB_CONFIG = {
     'port': 5432
 }
 
-pessoas_cpfs = []
-voluntarios_cpfs = []
-adotantes_cpfs = []
-veterinarios_cpfs = []
-gatos_ids = []
-campanhas_ids = []
-eventos_ids = []
-lares_ids = []
-enderecos_ids = []
-enderecos_usados_lares = []
+# Volumes com escala 1; --escala multiplica todos e --quantidade ajusta tabelas específicas.
+# As tabelas de relacionamento (funcao, participantes, cuida_lar, ...) crescem junto com
+# as tabelas de origem.
+VOLUMES_BASE = {
+    'enderecos': 2000,
+    'pessoas': 1500,
+    'gatos': 800,
+    'campanhas': 50,
+    'eventos': 120,
+    'voluntarios': 200,
+    'adotantes': 400,
+    'veterinarios': 25,
+    'lares_temporarios': 80,
+    'doacoes': 1200,
+    'contatos': 2500,
+    'gastos': 2000,
+    'procedimentos': 1500,
+    'adocoes': 300,
+    'devolucoes': 25,
+}
+
+# Registros de chaves mantidos em memória apenas para sortear chaves estrangeiras.
+pessoas_cpfs = RegistroChaves(cpf=True)
+voluntarios_cpfs = RegistroChaves(cpf=True)
+adotantes_cpfs = RegistroChaves(cpf=True)
+veterinarios_cpfs = RegistroChaves(cpf=True)
+gatos_ids = RegistroChaves()
+campanhas_ids = RegistroChaves()
+eventos_ids = RegistroChaves()
+lares_ids = RegistroChaves()
+enderecos_ids = RegistroChaves()
+
+# Voluntários, adotantes e veterinários recebem faixas disjuntas de pessoas_cpfs, e
+# cada lar temporário recebe um endereço diferente.
+papeis_pessoas = ParticaoPapeis(pessoas_cpfs)
+enderecos_lares = ParticaoPapeis(enderecos_ids)
+
+BACKENDS = ('python', 'numpy')
+backend = 'python'
+
+NOMES_REGISTROS = (
+    'pessoas_cpfs', 'voluntarios_cpfs', 'adotantes_cpfs', 'veterinarios_cpfs', 'gatos_ids',
+    'campanhas_ids', 'eventos_ids', 'lares_ids', 'enderecos_ids',
+)
+
+# Tabela e coluna de onde cada registro é relido com --append
+ORIGENS_REGISTROS = {
+    'pessoas_cpfs': ('pessoa', 'cpf'),
+    'voluntarios_cpfs': ('voluntario', 'cpf'),
+    'adotantes_cpfs': ('adotante', 'cpf'),
+    'veterinarios_cpfs': ('veterinario', 'cpf'),
+    'gatos_ids': ('gato', 'id'),
+    'campanhas_ids': ('campanha', 'id'),
+    'eventos_ids': ('evento', 'id'),
+    'lares_ids': ('lar_temporario', 'id'),
+    'enderecos_ids': ('endereco', 'id'),
+}
+
+# Perfis de distribuição por coluna (--distribuicao tabela.coluna=perfil); colunas
+# sem perfil são sorteadas de modo uniforme (ver distribuicoes.py)
+perfis_distribuicao = {}
+
+# Quantas chaves de cada registro já estavam no banco (--append); as fases geram
+# linhas só a partir dessa posição e os geradores únicos continuam a numeração.
+chaves_existentes = {}
+
+
+def _base(nome):
+    return chaves_existentes.get(nome, 0)
+
 
 def conectar_bd():
     try:
-        return psycopg2.connect(**DB_CONFIG)
+        return psycopg2.connect(**DB_CONFIG, cursor_factory=metricas.CursorMedido)
     except Exception as e:
         print(f"Erro ao conectar ao banco de dados: {e}")
         sys.exit(1)
 
 
-def popular_enderecos(cursor, quantidade=200):
-    """Popula a tabela endereco"""
-    print(f"Inserindo {quantidade} endereços...")
-    
+def calcular_volumes(escala=1.0, ajustes=None):
+    """Aplica o fator de escala e os ajustes por tabela aos volumes base"""
+    volumes = {tabela: max(1, round(base * escala)) for tabela, base in VOLUMES_BASE.items()}
+    for tabela, quantidade in (ajustes or {}).items():
+        if tabela not in VOLUMES_BASE:
+            raise ValueError(f"Tabela desconhecida em --quantidade: {tabela}")
+        volumes[tabela] = quantidade
+    return volumes
+
+
+def reidratar_registros(conexao):
+    """Relê do banco as chaves de todos os registros para acrescentar dados (--append)"""
+    for nome, (tabela, coluna) in ORIGENS_REGISTROS.items():
+        registro = globals()[nome]
+        registro.clear()
+        carga.ler_em_registros(conexao, f"SELECT {coluna} FROM {tabela} ORDER BY {coluna}", (registro,))
+        chaves_existentes[nome] = len(registro)
+        print(f"{tabela}: {len(registro)} chaves existentes")
+    # Papéis e lares novos só usam pessoas e endereços novos
+    papeis_pessoas.proxima = len(pessoas_cpfs)
+    enderecos_lares.proxima = len(enderecos_ids)
+    conexao.commit()
+
+
+def reconstruir_registros(conexao):
+    """Refaz os registros de chaves a partir das linhas já confirmadas (--resume).
+
+    Os ids SERIAL são relidos em ordem de id, que é a ordem em que foram gerados; os
+    CPFs de pessoa são recalculados pela posição (unicos.cpf) e os papéis voltam a ser
+    as faixas consecutivas de pessoas_cpfs, na ordem voluntário, adotante, veterinário.
+    """
+    for nome in ('enderecos_ids', 'gatos_ids', 'campanhas_ids', 'eventos_ids', 'lares_ids'):
+        tabela, coluna = ORIGENS_REGISTROS[nome]
+        registro = globals()[nome]
+        registro.clear()
+        carga.ler_em_registros(conexao, f"SELECT {coluna} FROM {tabela} ORDER BY {coluna}", (registro,))
+
+    with conexao.cursor() as cursor:
+        def contar(tabela):
+            cursor.execute(f"SELECT count(*) FROM {tabela}")
+            return cursor.fetchone()[0]
+
+        pessoas_cpfs.clear()
+        pessoas_cpfs.extend(unicos.cpf(posicao) for posicao in range(contar('pessoa')))
+        # Uma fase de papel interrompida reserva de novo a sua faixa desde o início
+        inicio = 0
+        for fase, nome in (('voluntarios', 'voluntarios_cpfs'), ('adotantes', 'adotantes_cpfs'),
+                           ('veterinarios', 'veterinarios_cpfs')):
+            quantidade = contar(ORIGENS_REGISTROS[nome][0])
+            registro = globals()[nome]
+            registro.clear()
+            registro.extend(pessoas_cpfs[inicio:inicio + quantidade])
+            if retomada.concluida(fase):
+                inicio += quantidade
+        papeis_pessoas.proxima = inicio
+        enderecos_lares.proxima = len(lares_ids) if retomada.concluida('lares_temporarios') else 0
+    conexao.commit()
+
+
+def _fragmentos(fase, gerador, total, fragmentar=True):
+    """Gera as linhas de uma fase em fragmentos com semente própria (ver geracao.py)"""
+    if backend == 'numpy':
+        gerador = GERADORES_VETORIZADOS.get(gerador, gerador)
+    registros = {nome: globals()[nome] for nome in NOMES_REGISTROS}
+    registros['perfis_distribuicao'] = perfis_distribuicao
+    return gerar_em_fragmentos(fase, gerador, total, registros, fragmentar,
+                               primeiro=retomada.primeiro_fragmento(),
+                               ao_concluir=retomada.concluir_fragmento)
+
+
+def gerar_enderecos(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela endereco"""
     estados_br = ['SP', 'RJ', 'MG', 'RS', 'PR', 'SC', 'BA', 'GO', 'PE', 'CE']
     complementos = ['Apto 101', 'Bloco A', 'Casa 2', 'Fundos', 'Sobrado', 'Apto 201', 'Casa dos fundos']
-    
+
     for _ in range(quantidade):
         cep = fake.postcode().replace('-', '')
         rua = fake.street_name()
-        numero = str(random.randint(1, 9999))
+        numero = str(rng.randint(1, 9999))
         bairro = fake.neighborhood()
-        complemento = random.choice(complementos) if random.choice([True, False, False]) else None  # 33% chance
+        complemento = rng.choice(complementos) if rng.choice([True, False, False]) else None  # 33% chance
         cidade = fake.city()
-        estado = random.choice(estados_br)
-        
-        cursor.execute("""
-            INSERT INTO endereco (cep, rua, numero, bairro, complemento, cidade, estado)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (cep, rua, numero, bairro, complemento, cidade, estado))
-        
-        endereco_id = cursor.fetchone()[0]
-        enderecos_ids.append(endereco_id)
+        estado = rng.choice(estados_br)
+
+        yield (cep, rua, numero, bairro, complemento, cidade, estado)
+
+
+def popular_enderecos(cursor, quantidade=200):
+    """Popula a tabela endereco"""
+    print(f"Inserindo {quantidade} endereços...")
+
+    with EscritorTabela(cursor, 'endereco', ('cep', 'rua', 'numero', 'bairro', 'complemento', 'cidade', 'estado'),
+                        registro_ids=enderecos_ids) as escritor:
+        escritor.escrever_varias(_fragmentos('endereco', gerar_enderecos, quantidade))
+
+
+def gerar_pessoas(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela pessoa a partir da posição base"""
+    for posicao in range(base + inicio, base + inicio + quantidade):
+        cpf = unicos.cpf(posicao)
+
+        nome = fake.name()
+        telefone = fake.phone_number()[:15]
+        email = unicos.email(posicao, nome)
+        endereco_id = enderecos_ids.escolher(rng) if rng.choice([True, False, False]) else None  # 33% têm endereço
+
+        yield (cpf, nome, telefone, email, endereco_id)
 
 
 def popular_pessoas(cursor, quantidade=100):
     """Popula a tabela pessoa"""
     print(f"Inserindo {quantidade} pessoas...")
-    
-    for _ in range(quantidade):
-        cpf = fake.unique.cpf().replace('.', '').replace('-', '')
-        pessoas_cpfs.append(cpf)
-        
-        nome = fake.name()
-        telefone = fake.phone_number()[:15]
-        email = fake.unique.email()
-        endereco_id = random.choice(enderecos_ids) if random.choice([True, False, False]) else None  # 33% têm endereço
-        
-        cursor.execute("""
-            INSERT INTO pessoa (cpf, nome, telefone, email, endereco_id)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (cpf, nome, telefone, email, endereco_id))
 
+    with EscritorTabela(cursor, 'pessoa', ('cpf', 'nome', 'telefone', 'email', 'endereco_id')) as escritor:
+        for linha in _fragmentos('pessoa', partial(gerar_pessoas, _base('pessoas_cpfs')), quantidade):
+            pessoas_cpfs.append(linha[0])
+            escritor.escrever(linha)
 
-def popular_gatos(cursor, quantidade=50):
-    """Popula a tabela gato"""
-    print(f"Inserindo {quantidade} gatos...")
-    
+
+def gerar_gatos(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela gato"""
     cores = ['Preto', 'Branco', 'Cinza', 'Laranja', 'Malhado', 'Siamês', 'Rajado']
     racas = ['SRD', 'Persa', 'Siamês', 'Maine Coon', 'British Shorthair', 'Ragdoll']
-    
+
     for _ in range(quantidade):
         nome = fake.first_name()
-        idade = random.randint(0, 15)
+        idade = rng.randint(0, 15)
         data_resgate = fake.date_between(start_date='-2y', end_date='today')
-        endereco_resgate_id = random.choice(enderecos_ids)
-        cor = random.choice(cores)
-        raca = random.choice(racas)
+        endereco_resgate_id = enderecos_ids.escolher(rng)
+        cor = rng.choice(cores)
+        raca = rng.choice(racas)
         condicao_saude = fake.text(max_nb_chars=200)
-        adotado = random.choice([True, False])
-        
-        cursor.execute("""
-            INSERT INTO gato (nome, idade, data_resgate, endereco_resgate_id, cor, raca, condicao_saude, adotado)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """, (nome, idade, data_resgate, endereco_resgate_id, cor, raca, condicao_saude, adotado))
-        
-        gato_id = cursor.fetchone()[0]
-        gatos_ids.append(gato_id)
+        adotado = rng.choice([True, False])
 
+        yield (nome, idade, data_resgate, endereco_resgate_id, cor, raca, condicao_saude, adotado)
 
-def popular_campanhas(cursor, quantidade=10):
-    """Popula a tabela campanha"""
-    print(f"Inserindo {quantidade} campanhas...")
-    
-    for i in range(quantidade):
-        nome = f"Campanha {fake.unique.catch_phrase()} {i+1}"
+
+def popular_gatos(cursor, quantidade=50):
+    """Popula a tabela gato"""
+    print(f"Inserindo {quantidade} gatos...")
+
+    with EscritorTabela(cursor, 'gato', ('nome', 'idade', 'data_resgate', 'endereco_resgate_id', 'cor', 'raca', 'condicao_saude', 'adotado'),
+                        registro_ids=gatos_ids) as escritor:
+        escritor.escrever_varias(_fragmentos('gato', gerar_gatos, quantidade))
+
+
+def gerar_campanhas(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela campanha a partir da posição base"""
+    for posicao in range(base + inicio, base + inicio + quantidade):
+        nome = unicos.nome_com_sufixo('Campanha', fake.catch_phrase(), posicao)
         data_inicio = fake.date_between(start_date='-1y', end_date='today')
         data_fim = fake.date_between(start_date=data_inicio, end_date='+6m')
         premio = fake.text(max_nb_chars=100)
-        vencedor_cpf = random.choice(pessoas_cpfs) if random.choice([True, False]) else None
-        
-        cursor.execute("""
-            INSERT INTO campanha (nome, data_inicio, data_fim, premio, vencedor_cpf)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """, (nome, data_inicio, data_fim, premio, vencedor_cpf))
-        
-        campanha_id = cursor.fetchone()[0]
-        campanhas_ids.append(campanha_id)
+        vencedor_cpf = pessoas_cpfs.escolher(rng) if rng.choice([True, False]) else None
+
+        yield (nome, data_inicio, data_fim, premio, vencedor_cpf)
+
+
+def popular_campanhas(cursor, quantidade=10):
+    """Popula a tabela campanha"""
+    print(f"Inserindo {quantidade} campanhas...")
+
+    with EscritorTabela(cursor, 'campanha', ('nome', 'data_inicio', 'data_fim', 'premio', 'vencedor_cpf'),
+                        registro_ids=campanhas_ids) as escritor:
+        escritor.escrever_varias(_fragmentos('campanha', partial(gerar_campanhas, _base('campanhas_ids')), quantidade))
+
+
+def gerar_eventos(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela evento a partir da posição base"""
+    for posicao in range(base + inicio, base + inicio + quantidade):
+        nome = unicos.nome_com_sufixo('Evento', fake.catch_phrase(), posicao)
+        data_inicio = fake.date_between(start_date='-6m', end_date='+6m')
+        data_fim = fake.date_between(start_date=data_inicio, end_date=data_inicio + timedelta(days=3)) if rng.choice([True, False]) else None
+        endereco_id = enderecos_ids.escolher(rng)
+
+        yield (nome, data_inicio, data_fim, endereco_id)
 
 
 def popular_eventos(cursor, quantidade=20):
     """Popula a tabela evento"""
     print(f"Inserindo {quantidade} eventos...")
-    
-    for _ in range(quantidade):
-        nome = f"Evento {fake.unique.catch_phrase()}"
-        data_inicio = fake.date_between(start_date='-6m', end_date='+6m')
-        data_fim = fake.date_between(start_date=data_inicio, end_date=data_inicio + timedelta(days=3)) if random.choice([True, False]) else None
-        endereco_id = random.choice(enderecos_ids)
-        
-        cursor.execute("""
-            INSERT INTO evento (nome, data_inicio, data_fim, endereco_id)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id
-        """, (nome, data_inicio, data_fim, endereco_id))
-        
-        evento_id = cursor.fetchone()[0]
-        eventos_ids.append(evento_id)
+
+    with EscritorTabela(cursor, 'evento', ('nome', 'data_inicio', 'data_fim', 'endereco_id'),
+                        registro_ids=eventos_ids) as escritor:
+        escritor.escrever_varias(_fragmentos('evento', partial(gerar_eventos, _base('eventos_ids')), quantidade))
+
+
+def gerar_lares_temporarios(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela lar_temporario usando os endereços a partir da posição base"""
+    for endereco_id in enderecos_ids[base + inicio:base + inicio + quantidade]:
+        capacidade_maxima = rng.randint(5, 30)
+
+        # Inserir sem responsável inicialmente (será atualizado depois)
+        yield (endereco_id, capacidade_maxima, None)
 
 
 def popular_lares_temporarios(cursor, quantidade=15):
     """Popula a tabela lar_temporario"""
     print(f"Inserindo {quantidade} lares temporários...")
-    
-    # Garante que temos endereços suficientes disponíveis
-    enderecos_disponiveis = [e for e in enderecos_ids if e not in enderecos_usados_lares]
-    quantidade = min(quantidade, len(enderecos_disponiveis))
-    
-    for i in range(quantidade):
-        endereco_id = enderecos_disponiveis[i]
-        enderecos_usados_lares.append(endereco_id)  # Marca como usado
-        capacidade_maxima = random.randint(5, 30)
-        
-        # Inserir sem responsável inicialmente (será atualizado depois)
-        cursor.execute("""
-            INSERT INTO lar_temporario (endereco_id, capacidade_maxima, responsavel_cpf)
-            VALUES (%s, %s, %s)
-            RETURNING id
-        """, (endereco_id, capacidade_maxima, None))
-        
-        lar_id = cursor.fetchone()[0]
-        lares_ids.append(lar_id)
+
+    # Cada lar usa um endereço ainda não usado por outro lar (endereco_id é UNIQUE)
+    faixa = enderecos_lares.reservar(quantidade)
+
+    with EscritorTabela(cursor, 'lar_temporario', ('endereco_id', 'capacidade_maxima', 'responsavel_cpf'),
+                        registro_ids=lares_ids) as escritor:
+        escritor.escrever_varias(_fragmentos('lar_temporario', partial(gerar_lares_temporarios, faixa.start), len(faixa)))
+
+
+def gerar_voluntarios(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela voluntario com as pessoas a partir da posição base"""
+    for cpf in pessoas_cpfs[base + inicio:base + inicio + quantidade]:
+        yield (cpf,)
 
 
 def popular_voluntarios(cursor, quantidade=30):
     """Popula a tabela voluntario"""
     print(f"Inserindo {quantidade} voluntários...")
-    
-    cpfs_disponiveis = [cpf for cpf in pessoas_cpfs if cpf not in voluntarios_cpfs]
-    quantidade = min(quantidade, len(cpfs_disponiveis))
-    
-    for i in range(quantidade):
-        cpf = cpfs_disponiveis[i]
-        voluntarios_cpfs.append(cpf)
-        
-        cursor.execute("""
-            INSERT INTO voluntario (cpf)
-            VALUES (%s)
-        """, (cpf,))
+
+    faixa = papeis_pessoas.reservar(quantidade)
+
+    with EscritorTabela(cursor, 'voluntario', ('cpf',)) as escritor:
+        for linha in _fragmentos('voluntario', partial(gerar_voluntarios, faixa.start), len(faixa)):
+            voluntarios_cpfs.append(linha[0])
+            escritor.escrever(linha)
+
+
+def gerar_adotantes(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela adotante com as pessoas a partir da posição base"""
+    for cpf in pessoas_cpfs[base + inicio:base + inicio + quantidade]:
+        procurando_gato = rng.choice([True, False])
+
+        yield (cpf, procurando_gato)
 
 
 def popular_adotantes(cursor, quantidade=40):
     """Popula a tabela adotante"""
     print(f"Inserindo {quantidade} adotantes...")
-    
-    cpfs_disponiveis = [cpf for cpf in pessoas_cpfs if cpf not in voluntarios_cpfs and cpf not in adotantes_cpfs]
-    quantidade = min(quantidade, len(cpfs_disponiveis))
-    
-    for i in range(quantidade):
-        cpf = cpfs_disponiveis[i]
-        adotantes_cpfs.append(cpf)
-        
-        procurando_gato = random.choice([True, False])
-        
-        cursor.execute("""
-            INSERT INTO adotante (cpf, procurando_gato)
-            VALUES (%s, %s)
-        """, (cpf, procurando_gato))
+
+    faixa = papeis_pessoas.reservar(quantidade)
+
+    with EscritorTabela(cursor, 'adotante', ('cpf', 'procurando_gato')) as escritor:
+        for linha in _fragmentos('adotante', partial(gerar_adotantes, faixa.start), len(faixa)):
+            adotantes_cpfs.append(linha[0])
+            escritor.escrever(linha)
+
+
+def gerar_veterinarios(base, primeiro_crmv, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela veterinario com as pessoas a partir da posição base"""
+    especialidades = ['Clínica Geral', 'Cirurgia', 'Dermatologia', 'Cardiologia', 'Oncologia']
+
+    for posicao, cpf in enumerate(pessoas_cpfs[base + inicio:base + inicio + quantidade], start=primeiro_crmv + inicio):
+        # Formato correto: número-estado (ex: 1234-SP)
+        crmv = unicos.crmv(posicao)
+        especialidade = rng.choice(especialidades)
+        clinica = f"Clínica {fake.company()}"
+
+        yield (cpf, crmv, especialidade, clinica)
 
 
 def popular_veterinarios(cursor, quantidade=8):
     """Popula a tabela veterinario"""
     print(f"Inserindo {quantidade} veterinários...")
-    
-    especialidades = ['Clínica Geral', 'Cirurgia', 'Dermatologia', 'Cardiologia', 'Oncologia']
-    
-    cpfs_disponiveis = [cpf for cpf in pessoas_cpfs 
-                       if cpf not in voluntarios_cpfs 
-                       and cpf not in adotantes_cpfs 
-                       and cpf not in veterinarios_cpfs]
-    quantidade = min(quantidade, len(cpfs_disponiveis))
-    
-    for i in range(quantidade):
-        cpf = cpfs_disponiveis[i]
-        veterinarios_cpfs.append(cpf)
-        
-        # Formato correto: número-estado (ex: 1234-SP)
-        crmv = fake.unique.bothify(text="####-SP", letters="")  # Gera CRMV único
-        especialidade = random.choice(especialidades)
-        clinica = f"Clínica {fake.unique.company()}"
-        
-        cursor.execute("""
-            INSERT INTO veterinario (cpf, crmv, especialidade, clinica)
-            VALUES (%s, %s, %s, %s)
-        """, (cpf, crmv, especialidade, clinica))
+
+    faixa = papeis_pessoas.reservar(quantidade)
+
+    with EscritorTabela(cursor, 'veterinario', ('cpf', 'crmv', 'especialidade', 'clinica')) as escritor:
+        for linha in _fragmentos('veterinario', partial(gerar_veterinarios, faixa.start, _base('veterinarios_cpfs')), len(faixa)):
+            veterinarios_cpfs.append(linha[0])
+            escritor.escrever(linha)
+
+
+def gerar_funcoes(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela funcao para as chaves a partir da posição base"""
+    funcoes = ['Resgate', 'Cuidador', 'Transporte', 'Triagem', 'Administração', 'Captação de Recursos']
+
+    for voluntario_cpf in voluntarios_cpfs[base + inicio:base + inicio + quantidade]:
+        num_funcoes = rng.randint(1, 3)
+        funcoes_escolhidas = rng.sample(funcoes, num_funcoes)
+
+        for funcao in funcoes_escolhidas:
+            yield (voluntario_cpf, funcao)
 
 
 def popular_funcoes(cursor):
     """Popula a tabela funcao"""
     print("Inserindo funções dos voluntários...")
-    
-    funcoes = ['Resgate', 'Cuidador', 'Transporte', 'Triagem', 'Administração', 'Captação de Recursos']
-    
-    for voluntario_cpf in voluntarios_cpfs:
-        num_funcoes = random.randint(1, 3)
-        funcoes_escolhidas = random.sample(funcoes, num_funcoes)
-        
-        for funcao in funcoes_escolhidas:
-            cursor.execute("""
-                INSERT INTO funcao (voluntario_cpf, funcao)
-                VALUES (%s, %s)
-            """, (voluntario_cpf, funcao))
+
+    if geracao_servidor.ativa:
+        geracao_servidor.gerar_relacionamento(cursor, 'funcao')
+        return
+
+    with EscritorTabela(cursor, 'funcao', ('voluntario_cpf', 'funcao')) as escritor:
+        escritor.escrever_varias(_fragmentos('funcao', partial(gerar_funcoes, _base('voluntarios_cpfs')), len(voluntarios_cpfs) - _base('voluntarios_cpfs')))
+
+
+def gerar_doacoes(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela doacao"""
+    formas_pagamento = ['PIX', 'CARTAO_CREDITO', 'TRANSFERENCIA', 'DINHEIRO', 'CARTAO_DEBITO']
+    sortear_data = distribuicoes.sorteador_data(perfis_distribuicao, 'doacao.data', 365,
+                                                lambda: fake.date_between(start_date='-1y', end_date='today'))
+    escolher_pessoa = distribuicoes.escolhedor(perfis_distribuicao, 'doacao.pessoa_cpf', pessoas_cpfs)
+
+    for _ in range(quantidade):
+        data = sortear_data(rng)
+        valor = Decimal(str(rng.uniform(10.0, 500.0))).quantize(Decimal('0.01'))
+        forma_pagamento = rng.choice(formas_pagamento)
+        pessoa_cpf = escolher_pessoa(rng)
+
+        yield (data, valor, forma_pagamento, pessoa_cpf)
 
 
 def popular_doacoes(cursor, quantidade=80):
     """Popula a tabela doacao"""
     print(f"Inserindo {quantidade} doações...")
-    
-    formas_pagamento = ['PIX', 'CARTAO_CREDITO', 'TRANSFERENCIA', 'DINHEIRO', 'CARTAO_DEBITO']
-    
-    for _ in range(quantidade):
-        data = fake.date_between(start_date='-1y', end_date='today')
-        valor = Decimal(str(random.uniform(10.0, 500.0))).quantize(Decimal('0.01'))
-        forma_pagamento = random.choice(formas_pagamento)
-        pessoa_cpf = random.choice(pessoas_cpfs)
-        
-        cursor.execute("""
-            INSERT INTO doacao (data, valor, forma_pagamento, pessoa_cpf)
-            VALUES (%s, %s, %s, %s)
-        """, (data, valor, forma_pagamento, pessoa_cpf))
+
+    with EscritorTabela(cursor, 'doacao', ('data', 'valor', 'forma_pagamento', 'pessoa_cpf'),
+                        roteador=particoes.roteador_para(cursor, 'doacao')) as escritor:
+        escritor.escrever_varias(_fragmentos('doacao', gerar_doacoes, quantidade))
+
+
+def gerar_participantes(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela participantes para as chaves a partir da posição base"""
+    for campanha_id in campanhas_ids[base + inicio:base + inicio + quantidade]:
+        num_participantes = rng.randint(15, 80)  # Mais participantes por campanha
+        participantes = pessoas_cpfs.amostrar(rng, num_participantes)
+
+        for pessoa_cpf in participantes:
+            yield (pessoa_cpf, campanha_id)
 
 
 def popular_participantes(cursor):
     """Popula a tabela participantes"""
     print("Inserindo participantes das campanhas...")
-    
-    for campanha_id in campanhas_ids:
-        num_participantes = random.randint(15, 80)  # Mais participantes por campanha
-        participantes = random.sample(pessoas_cpfs, min(num_participantes, len(pessoas_cpfs)))
-        
-        for pessoa_cpf in participantes:
-            cursor.execute("""
-                INSERT INTO participantes (pessoa_cpf, campanha_id)
-                VALUES (%s, %s)
-            """, (pessoa_cpf, campanha_id))
 
+    if geracao_servidor.ativa:
+        geracao_servidor.gerar_relacionamento(cursor, 'participantes')
+        return
 
-def popular_contatos(cursor, quantidade=100):
-    """Popula a tabela contato"""
-    print(f"Inserindo {quantidade} contatos...")
-    
+    with EscritorTabela(cursor, 'participantes', ('pessoa_cpf', 'campanha_id')) as escritor:
+        escritor.escrever_varias(_fragmentos('participantes', partial(gerar_participantes, _base('campanhas_ids')), len(campanhas_ids) - _base('campanhas_ids')))
+
+
+def gerar_contatos(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela contato"""
     assuntos = [
         'Interesse em adoção', 'Dúvidas sobre voluntariado', 'Relato de animal abandonado',
         'Solicitação de castração', 'Doação de ração', 'Informações sobre evento'
     ]
-    
-    for _ in range(quantidade):
-        pessoa_cpf = random.choice(pessoas_cpfs)
-        data_hora = fake.date_time_between(start_date='-1y', end_date='now')
-        assunto = random.choice(assuntos)
-        
-        cursor.execute("""
-            INSERT INTO contato (pessoa_cpf, data_hora, assunto)
-            VALUES (%s, %s, %s)
-        """, (pessoa_cpf, data_hora, assunto))
+    escolher_pessoa = distribuicoes.escolhedor(perfis_distribuicao, 'contato.pessoa_cpf', pessoas_cpfs)
+    sortear_data_hora = distribuicoes.sorteador_data(perfis_distribuicao, 'contato.data_hora', 365,
+                                                     lambda: fake.date_time_between(start_date='-1y', end_date='now'))
+    desempatar = distribuicoes.desempatador(perfis_distribuicao, 'contato', inicio)
+
+    for i in range(quantidade):
+        pessoa_cpf = escolher_pessoa(rng)
+        data_hora = sortear_data_hora(rng)
+        if desempatar:
+            data_hora = desempatar(i, data_hora)
+        assunto = rng.choice(assuntos)
+
+        yield (pessoa_cpf, data_hora, assunto)
+
+
+def popular_contatos(cursor, quantidade=100):
+    """Popula a tabela contato"""
+    print(f"Inserindo {quantidade} contatos...")
+
+    with EscritorTabela(cursor, 'contato', ('pessoa_cpf', 'data_hora', 'assunto'),
+                        roteador=particoes.roteador_para(cursor, 'contato')) as escritor:
+        escritor.escrever_varias(_fragmentos('contato', gerar_contatos, quantidade))
+
+
+def gerar_cuida_lar(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela cuida_lar para as chaves a partir da posição base"""
+    for lar_id in lares_ids[base + inicio:base + inicio + quantidade]:
+        num_cuidadores = rng.randint(2, 6)  # Mais cuidadores por lar
+        cuidadores = voluntarios_cpfs.amostrar(rng, num_cuidadores)
+
+        for voluntario_cpf in cuidadores:
+            yield (lar_id, voluntario_cpf)
 
 
 def popular_cuida_lar(cursor):
     """Popula a tabela cuida_lar"""
     print("Inserindo cuidadores de lares temporários...")
-    
-    for lar_id in lares_ids:
-        num_cuidadores = random.randint(2, 6)  # Mais cuidadores por lar
-        cuidadores = random.sample(voluntarios_cpfs, min(num_cuidadores, len(voluntarios_cpfs)))
-        
-        for voluntario_cpf in cuidadores:
-            cursor.execute("""
-                INSERT INTO cuida_lar (lar_id, voluntario_cpf)
-                VALUES (%s, %s)
-            """, (lar_id, voluntario_cpf))
+
+    if geracao_servidor.ativa:
+        geracao_servidor.gerar_relacionamento(cursor, 'cuida_lar')
+        return
+
+    with EscritorTabela(cursor, 'cuida_lar', ('lar_id', 'voluntario_cpf')) as escritor:
+        escritor.escrever_varias(_fragmentos('cuida_lar', partial(gerar_cuida_lar, _base('lares_ids')), len(lares_ids) - _base('lares_ids')))
+
+
+def gerar_voluntarios_evento(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela voluntarios_evento para as chaves a partir da posição base"""
+    for evento_id in eventos_ids[base + inicio:base + inicio + quantidade]:
+        num_voluntarios = rng.randint(3, 15)  # Mais voluntários por evento
+        voluntarios_escolhidos = voluntarios_cpfs.amostrar(rng, num_voluntarios)
+
+        for voluntario_cpf in voluntarios_escolhidos:
+            yield (evento_id, voluntario_cpf)
 
 
 def popular_voluntarios_evento(cursor):
     """Popula a tabela voluntarios_evento"""
     print("Inserindo voluntários em eventos...")
-    
-    for evento_id in eventos_ids:
-        num_voluntarios = random.randint(3, 15)  # Mais voluntários por evento
-        voluntarios_escolhidos = random.sample(voluntarios_cpfs, min(num_voluntarios, len(voluntarios_cpfs)))
-        
-        for voluntario_cpf in voluntarios_escolhidos:
-            cursor.execute("""
-                INSERT INTO voluntarios_evento (evento_id, voluntario_cpf)
-                VALUES (%s, %s)
-            """, (evento_id, voluntario_cpf))
+
+    if geracao_servidor.ativa:
+        geracao_servidor.gerar_relacionamento(cursor, 'voluntarios_evento')
+        return
+
+    with EscritorTabela(cursor, 'voluntarios_evento', ('evento_id', 'voluntario_cpf')) as escritor:
+        escritor.escrever_varias(_fragmentos('voluntarios_evento', partial(gerar_voluntarios_evento, _base('eventos_ids')), len(eventos_ids) - _base('eventos_ids')))
+
+
+def gerar_gatos_evento(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela gatos_evento para as chaves a partir da posição base"""
+    for evento_id in eventos_ids[base + inicio:base + inicio + quantidade]:
+        num_gatos = rng.randint(5, 25)  # Mais gatos por evento
+        gatos_escolhidos = gatos_ids.amostrar(rng, num_gatos)
+
+        for gato_id in gatos_escolhidos:
+            yield (evento_id, gato_id)
 
 
 def popular_gatos_evento(cursor):
     """Popula a tabela gatos_evento"""
     print("Inserindo gatos em eventos...")
-    
-    for evento_id in eventos_ids:
-        num_gatos = random.randint(5, 25)  # Mais gatos por evento
-        gatos_escolhidos = random.sample(gatos_ids, min(num_gatos, len(gatos_ids)))
-        
-        for gato_id in gatos_escolhidos:
-            cursor.execute("""
-                INSERT INTO gatos_evento (evento_id, gato_id)
-                VALUES (%s, %s)
-            """, (evento_id, gato_id))
+
+    if geracao_servidor.ativa:
+        geracao_servidor.gerar_relacionamento(cursor, 'gatos_evento')
+        return
+
+    with EscritorTabela(cursor, 'gatos_evento', ('evento_id', 'gato_id')) as escritor:
+        escritor.escrever_varias(_fragmentos('gatos_evento', partial(gerar_gatos_evento, _base('eventos_ids')), len(eventos_ids) - _base('eventos_ids')))
+
+
+def gerar_fotos_gato(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela fotos_gato para as chaves a partir da posição base"""
+    for gato_id in gatos_ids[base + inicio:base + inicio + quantidade]:
+        num_fotos = rng.randint(1, 4)
+
+        for i in range(num_fotos):
+            foto_url = f"https://example.com/gatos/gato_{gato_id}_foto_{i+1}.jpg"
+
+            yield (gato_id, foto_url)
 
 
 def popular_fotos_gato(cursor):
     """Popula a tabela fotos_gato"""
     print("Inserindo fotos dos gatos...")
-    
-    for gato_id in gatos_ids:
-        num_fotos = random.randint(1, 4)
-        
-        for i in range(num_fotos):
-            foto_url = f"https://example.com/gatos/gato_{gato_id}_foto_{i+1}.jpg"
-            
-            cursor.execute("""
-                INSERT INTO fotos_gato (gato_id, foto_url)
-                VALUES (%s, %s)
-            """, (gato_id, foto_url))
+
+    if geracao_servidor.ativa:
+        geracao_servidor.gerar_relacionamento(cursor, 'fotos_gato')
+        return
+
+    with EscritorTabela(cursor, 'fotos_gato', ('gato_id', 'foto_url')) as escritor:
+        escritor.escrever_varias(_fragmentos('fotos_gato', partial(gerar_fotos_gato, _base('gatos_ids')), len(gatos_ids) - _base('gatos_ids')))
+
+
+def gerar_hospedagem(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela hospedagem para as chaves a partir da posição base"""
+    escolher_lar = distribuicoes.escolhedor(perfis_distribuicao, 'hospedagem.lar_temporario_id', lares_ids)
+    for gato_id in gatos_ids[base + inicio:base + inicio + quantidade]:
+        if rng.choice([True, False, True]):  # 67% dos gatos passaram por lar temporário
+            lar_id = escolher_lar(rng)
+            data_entrada = fake.date_between(start_date='-2y', end_date='today')
+            data_saida = fake.date_between(start_date=data_entrada, end_date='today') if rng.choice([True, False, True]) else None
+
+            yield (lar_id, gato_id, data_entrada, data_saida)
 
 
 def popular_hospedagem(cursor):
     """Popula a tabela hospedagem"""
     print("Inserindo hospedagens...")
-    
-    for gato_id in gatos_ids:
-        if random.choice([True, False, True]):  # 67% dos gatos passaram por lar temporário
-            lar_id = random.choice(lares_ids)
-            data_entrada = fake.date_between(start_date='-2y', end_date='today')
-            data_saida = fake.date_between(start_date=data_entrada, end_date='today') if random.choice([True, False, True]) else None
-            
-            cursor.execute("""
-                INSERT INTO hospedagem (lar_temporario_id, gato_id, data_entrada, data_saida)
-                VALUES (%s, %s, %s, %s)
-            """, (lar_id, gato_id, data_entrada, data_saida))
 
+    with EscritorTabela(cursor, 'hospedagem', ('lar_temporario_id', 'gato_id', 'data_entrada', 'data_saida')) as escritor:
+        escritor.escrever_varias(_fragmentos('hospedagem', partial(gerar_hospedagem, _base('gatos_ids')), len(gatos_ids) - _base('gatos_ids')))
 
-def popular_gastos(cursor, quantidade=150):
-    """Popula a tabela gasto"""
-    print(f"Inserindo {quantidade} gastos...")
-    
+
+def gerar_gastos(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela gasto"""
     tipos = ['ALIMENTACAO', 'VETERINARIO', 'MEDICAMENTO', 'TRANSPORTE', 'HIGIENE', 'MANUTENCAO']
-    
+    sortear_data = distribuicoes.sorteador_data(perfis_distribuicao, 'gasto.data', 365,
+                                                lambda: fake.date_between(start_date='-1y', end_date='today'))
+    escolher_gato = distribuicoes.escolhedor(perfis_distribuicao, 'gasto.gato_id', gatos_ids)
+    escolher_lar = distribuicoes.escolhedor(perfis_distribuicao, 'gasto.lar_id', lares_ids)
+
     for _ in range(quantidade):
-        data = fake.date_between(start_date='-1y', end_date='today')
-        valor = Decimal(str(random.uniform(10.0, 300.0))).quantize(Decimal('0.01'))
+        data = sortear_data(rng)
+        valor = Decimal(str(rng.uniform(10.0, 300.0))).quantize(Decimal('0.01'))
         descricao = fake.text(max_nb_chars=100)
-        tipo = random.choice(tipos)
-        
+        tipo = rng.choice(tipos)
+
         # 70% dos gastos são relacionados a gatos, 30% a lares
-        if random.random() < 0.7:
-            gato_id = random.choice(gatos_ids)
+        if rng.random() < 0.7:
+            gato_id = escolher_gato(rng)
             lar_id = None
         else:
             gato_id = None
-            lar_id = random.choice(lares_ids)
-        
-        cursor.execute("""
-            INSERT INTO gasto (data, valor, descricao, tipo, lar_id, gato_id)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (data, valor, descricao, tipo, lar_id, gato_id))
+            lar_id = escolher_lar(rng)
+
+        yield (data, valor, descricao, tipo, lar_id, gato_id)
+
+
+def popular_gastos(cursor, quantidade=150):
+    """Popula a tabela gasto"""
+    print(f"Inserindo {quantidade} gastos...")
+
+    with EscritorTabela(cursor, 'gasto', ('data', 'valor', 'descricao', 'tipo', 'lar_id', 'gato_id'),
+                        roteador=particoes.roteador_para(cursor, 'gasto')) as escritor:
+        escritor.escrever_varias(_fragmentos('gasto', gerar_gastos, quantidade))
+
+
+def gerar_procedimentos(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela procedimento"""
+    tipos = ['CONSULTA', 'VACINACAO', 'CASTRACAO', 'CIRURGIA', 'EXAME', 'TRATAMENTO']
+    escolher_gato = distribuicoes.escolhedor(perfis_distribuicao, 'procedimento.gato_id', gatos_ids)
+    escolher_veterinario = distribuicoes.escolhedor(perfis_distribuicao, 'procedimento.veterinario_cpf',
+                                                    veterinarios_cpfs)
+    sortear_data_hora = distribuicoes.sorteador_data(perfis_distribuicao, 'procedimento.data_hora', 365,
+                                                     lambda: fake.date_time_between(start_date='-1y', end_date='now'))
+    desempatar = distribuicoes.desempatador(perfis_distribuicao, 'procedimento', inicio)
+
+    for i in range(quantidade):
+        gato_id = escolher_gato(rng)
+        veterinario_cpf = escolher_veterinario(rng)
+        data_hora = sortear_data_hora(rng)
+        if desempatar:
+            data_hora = desempatar(i, data_hora)
+        tipo = rng.choice(tipos)
+        custo = Decimal(str(rng.uniform(50.0, 800.0))).quantize(Decimal('0.01'))
+        descricao = fake.text(max_nb_chars=200)
+
+        yield (gato_id, veterinario_cpf, data_hora, tipo, custo, descricao)
 
 
 def popular_procedimentos(cursor, quantidade=100):
     """Popula a tabela procedimento"""
     print(f"Inserindo {quantidade} procedimentos veterinários...")
-    
-    tipos = ['CONSULTA', 'VACINACAO', 'CASTRACAO', 'CIRURGIA', 'EXAME', 'TRATAMENTO']
-    
-    for _ in range(quantidade):
-        gato_id = random.choice(gatos_ids)
-        veterinario_cpf = random.choice(veterinarios_cpfs)
-        data_hora = fake.date_time_between(start_date='-1y', end_date='now')
-        tipo = random.choice(tipos)
-        custo = Decimal(str(random.uniform(50.0, 800.0))).quantize(Decimal('0.01'))
-        descricao = fake.text(max_nb_chars=200)
-        
-        cursor.execute("""
-            INSERT INTO procedimento (gato_id, veterinario_cpf, data_hora, tipo, custo, descricao)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (gato_id, veterinario_cpf, data_hora, tipo, custo, descricao))
 
+    with EscritorTabela(cursor, 'procedimento', ('gato_id', 'veterinario_cpf', 'data_hora', 'tipo', 'custo', 'descricao'),
+                        roteador=particoes.roteador_para(cursor, 'procedimento')) as escritor:
+        escritor.escrever_varias(_fragmentos('procedimento', gerar_procedimentos, quantidade))
 
-def popular_preferencias(cursor):
-    """Popula a tabela preferencia"""
-    print("Inserindo preferências dos adotantes...")
-    
+
+def gerar_preferencias(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela preferencia para as chaves a partir da posição base"""
     idades_pref = ['Filhote', 'Adulto', 'Idoso', 'Qualquer']
     cores_pref = ['Preto', 'Branco', 'Cinza', 'Laranja', 'Qualquer']
     racas_pref = ['SRD', 'Persa', 'Siamês', 'Qualquer']
-    
-    for adotante_cpf in adotantes_cpfs:
-        if random.choice([True, False]):  # 50% dos adotantes têm preferências registradas
-            idade_preferida = random.choice(idades_pref)
-            cor_preferida = random.choice(cores_pref)
-            raca_preferida = random.choice(racas_pref)
-            
-            cursor.execute("""
-                INSERT INTO preferencia (adotante_cpf, idade_preferida, cor_preferida, raca_preferida)
-                VALUES (%s, %s, %s, %s)
-            """, (adotante_cpf, idade_preferida, cor_preferida, raca_preferida))
+
+    for adotante_cpf in adotantes_cpfs[base + inicio:base + inicio + quantidade]:
+        if rng.choice([True, False]):  # 50% dos adotantes têm preferências registradas
+            idade_preferida = rng.choice(idades_pref)
+            cor_preferida = rng.choice(cores_pref)
+            raca_preferida = rng.choice(racas_pref)
+
+            yield (adotante_cpf, idade_preferida, cor_preferida, raca_preferida)
+
+
+def popular_preferencias(cursor):
+    """Popula a tabela preferencia"""
+    print("Inserindo preferências dos adotantes...")
+
+    with EscritorTabela(cursor, 'preferencia', ('adotante_cpf', 'idade_preferida', 'cor_preferida', 'raca_preferida')) as escritor:
+        escritor.escrever_varias(_fragmentos('preferencia', partial(gerar_preferencias, _base('adotantes_cpfs')), len(adotantes_cpfs) - _base('adotantes_cpfs')))
+
+
+def gerar_triagens(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela triagem para as chaves a partir da posição base"""
+    resultados = ['APROVADO', 'REPROVADO', 'PENDENTE']
+
+    for adotante_cpf in adotantes_cpfs[base + inicio:base + inicio + quantidade]:
+        if rng.choice([True, False, False]):  # 33% dos adotantes passaram por triagem
+            data = fake.date_between(start_date='-6m', end_date='today')
+            responsavel_cpf = voluntarios_cpfs.escolher(rng)
+            resultado = rng.choice(resultados)
+
+            yield (adotante_cpf, data, responsavel_cpf, resultado)
 
 
 def popular_triagens(cursor):
     """Popula a tabela triagem"""
     print("Inserindo triagens dos adotantes...")
-    
-    resultados = ['APROVADO', 'REPROVADO', 'PENDENTE']
-    
-    for adotante_cpf in adotantes_cpfs:
-        if random.choice([True, False, False]):  # 33% dos adotantes passaram por triagem
-            data = fake.date_between(start_date='-6m', end_date='today')
-            responsavel_cpf = random.choice(voluntarios_cpfs)
-            resultado = random.choice(resultados)
-            
-            cursor.execute("""
-                INSERT INTO triagem (adotante_cpf, data, responsavel_cpf, resultado)
-                VALUES (%s, %s, %s, %s)
-            """, (adotante_cpf, data, responsavel_cpf, resultado))
+
+    with EscritorTabela(cursor, 'triagem', ('adotante_cpf', 'data', 'responsavel_cpf', 'resultado')) as escritor:
+        escritor.escrever_varias(_fragmentos('triagem', partial(gerar_triagens, _base('adotantes_cpfs')), len(adotantes_cpfs) - _base('adotantes_cpfs')))
+
+
+def gerar_fotos_triagem(cpfs, datas, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela fotos_triagem para as triagens informadas (adotante, data)"""
+    for adotante_cpf, data_triagem in zip(cpfs[inicio:inicio + quantidade], datas[inicio:inicio + quantidade]):
+        num_fotos = rng.randint(1, 3)
+
+        for i in range(num_fotos):
+            foto_url = f"https://example.com/triagens/{adotante_cpf}_{data_triagem}_foto_{i+1}.jpg"
+
+            yield (adotante_cpf, data_triagem, foto_url)
 
 
 def popular_fotos_triagem(cursor):
     """Popula a tabela fotos_triagem"""
     print("Inserindo fotos das triagens...")
-    
-    # Busca triagens existentes
-    cursor.execute("SELECT adotante_cpf, data FROM triagem")
-    triagens = cursor.fetchall()
-    
-    for adotante_cpf, data_triagem in triagens:
-        num_fotos = random.randint(1, 3)
-        
-        for i in range(num_fotos):
-            foto_url = f"https://example.com/triagens/{adotante_cpf}_{data_triagem}_foto_{i+1}.jpg"
-            
-            cursor.execute("""
-                INSERT INTO fotos_triagem (adotante_cpf, triagem_data, foto_url)
-                VALUES (%s, %s, %s)
-            """, (adotante_cpf, data_triagem, foto_url))
+
+    # Triagens ainda sem fotos, lidas em blocos para registros compactos
+    cpfs, datas = RegistroChaves(cpf=True), RegistroChaves(data=True)
+    carga.ler_em_registros(cursor.connection, """
+        SELECT t.adotante_cpf, t.data FROM triagem t
+        WHERE NOT EXISTS (SELECT 1 FROM fotos_triagem f
+                          WHERE f.adotante_cpf = t.adotante_cpf AND f.triagem_data = t.data)
+        ORDER BY t.adotante_cpf, t.data
+    """, (cpfs, datas))
+
+    with EscritorTabela(cursor, 'fotos_triagem', ('adotante_cpf', 'triagem_data', 'foto_url')) as escritor:
+        escritor.escrever_varias(_fragmentos('fotos_triagem', partial(gerar_fotos_triagem, cpfs, datas), len(cpfs)))
+
+
+def gerar_adocoes(base, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela adocao para gatos a partir da posição base"""
+    motivos = ['Amor por animais', 'Companhia', 'Ajudar animal necessitado', 'Pedido da família']
+
+    quantidade = min(quantidade, len(gatos_ids) - base, len(adotantes_cpfs))
+    gatos_escolhidos = gatos_ids.amostrar(rng, quantidade, inicio=base)
+    escolher_adotante = distribuicoes.escolhedor(perfis_distribuicao, 'adocao.adotante_cpf', adotantes_cpfs)
+
+    for gato_id in gatos_escolhidos:
+        adotante_cpf = escolher_adotante(rng)
+        data = fake.date_between(start_date='-6m', end_date='today')
+        motivo = rng.choice(motivos)
+
+        yield (gato_id, adotante_cpf, data, motivo)
 
 
 def popular_adocoes(cursor, quantidade=20):
     """Popula a tabela adocao"""
     print(f"Inserindo {quantidade} adoções...")
-    
-    motivos = ['Amor por animais', 'Companhia', 'Ajudar animal necessitado', 'Pedido da família']
-    
-    gatos_disponiveis = gatos_ids.copy()
-    random.shuffle(gatos_disponiveis)
-    
-    for i in range(min(quantidade, len(gatos_disponiveis), len(adotantes_cpfs))):
-        gato_id = gatos_disponiveis[i]
-        adotante_cpf = random.choice(adotantes_cpfs)
-        data = fake.date_between(start_date='-6m', end_date='today')
-        motivo = random.choice(motivos)
-        
-        cursor.execute("""
-            INSERT INTO adocao (gato_id, adotante_cpf, data, motivo)
-            VALUES (%s, %s, %s, %s)
-        """, (gato_id, adotante_cpf, data, motivo))
+
+    with EscritorTabela(cursor, 'adocao', ('gato_id', 'adotante_cpf', 'data', 'motivo')) as escritor:
+        escritor.escrever_varias(_fragmentos('adocao', partial(gerar_adocoes, _base('gatos_ids')), quantidade, fragmentar=False))
+
+
+def gerar_devolucoes(gatos, cpfs, datas, rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela devolucao para as adoções informadas (gato, adotante, data)"""
+    motivos = ['Problemas de saúde do animal', 'Mudança de residência', 'Alergia', 'Problemas comportamentais']
+
+    fim = inicio + quantidade
+    for gato_id, adotante_cpf, data_adocao in zip(gatos[inicio:fim], cpfs[inicio:fim], datas[inicio:fim]):
+        data_devolucao = fake.date_between(start_date=data_adocao, end_date='today')
+        motivo = rng.choice(motivos)
+
+        yield (gato_id, adotante_cpf, data_devolucao, motivo)
 
 
 def popular_devolucoes(cursor, quantidade=3):
     """Popula a tabela devolucao"""
     print(f"Inserindo {quantidade} devoluções...")
-    
-    motivos = ['Problemas de saúde do animal', 'Mudança de residência', 'Alergia', 'Problemas comportamentais']
-    
-    # Busca algumas adoções para criar devoluções
-    cursor.execute("SELECT gato_id, adotante_cpf, data FROM adocao LIMIT %s", (quantidade,))
-    adocoes = cursor.fetchall()
-    
-    for gato_id, adotante_cpf, data_adocao in adocoes:
-        data_devolucao = fake.date_between(start_date=data_adocao, end_date='today')
-        motivo = random.choice(motivos)
-        
-        cursor.execute("""
-            INSERT INTO devolucao (gato_id, adotante_cpf, data, motivo)
-            VALUES (%s, %s, %s, %s)
-        """, (gato_id, adotante_cpf, data_devolucao, motivo))
+
+    # Adoções ainda sem devolução, lidas em blocos para registros compactos
+    gatos, cpfs, datas = RegistroChaves(), RegistroChaves(cpf=True), RegistroChaves(data=True)
+    carga.ler_em_registros(cursor.connection, """
+        SELECT a.gato_id, a.adotante_cpf, a.data FROM adocao a
+        WHERE NOT EXISTS (SELECT 1 FROM devolucao d
+                          WHERE d.gato_id = a.gato_id AND d.adotante_cpf = a.adotante_cpf AND d.data >= a.data)
+        ORDER BY a.gato_id, a.adotante_cpf, a.data
+        LIMIT %s
+    """, (gatos, cpfs, datas), (quantidade,))
+
+    with EscritorTabela(cursor, 'devolucao', ('gato_id', 'adotante_cpf', 'data', 'motivo')) as escritor:
+        escritor.escrever_varias(_fragmentos('devolucao', partial(gerar_devolucoes, gatos, cpfs, datas), len(gatos)))
 
 
 def atualizar_responsaveis_lares(cursor):
     """Atualiza os responsáveis dos lares temporários"""
     print("Atualizando responsáveis dos lares temporários...")
-    
-    for lar_id in lares_ids:
-        # Busca voluntários que cuidam deste lar
-        cursor.execute("SELECT voluntario_cpf FROM cuida_lar WHERE lar_id = %s LIMIT 1", (lar_id,))
-        result = cursor.fetchone()
-        
-        if result:
-            responsavel_cpf = result[0]
-            cursor.execute("""
-                UPDATE lar_temporario 
-                SET responsavel_cpf = %s 
-                WHERE id = %s
-            """, (responsavel_cpf, lar_id))
 
+    # Um único UPDATE para todos os lares ainda sem responsável: o primeiro cuidador
+    # de cada lar em ordem de CPF
+    cursor.execute("""
+        UPDATE lar_temporario l
+        SET responsavel_cpf = c.voluntario_cpf
+        FROM (
+            SELECT DISTINCT ON (lar_id) lar_id, voluntario_cpf
+            FROM cuida_lar
+            ORDER BY lar_id, voluntario_cpf
+        ) c
+        WHERE l.id = c.lar_id AND l.responsavel_cpf IS NULL
+    """)
 
-def main():
-    fake.unique.clear()
+
+# Geradores vetorizados (--backend numpy): produzem colunas inteiras de cada fragmento
+# com NumPy e sorteiam os campos de texto de pools amostrados do Faker. Seguem as mesmas
+# distribuições dos geradores acima e substituem-nos em _fragmentos.
+
+def gerar_enderecos_vetorizado(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela endereco com NumPy"""
+    gnp = vetorizado.gerador_numpy(rng)
+    estados_br = ['SP', 'RJ', 'MG', 'RS', 'PR', 'SC', 'BA', 'GO', 'PE', 'CE']
+    complementos = ['Apto 101', 'Bloco A', 'Casa 2', 'Fundos', 'Sobrado', 'Apto 201', 'Casa dos fundos']
+
+    ceps = [f"{cep:08d}" for cep in vetorizado.inteiros(gnp, 0, 99999999, quantidade)]
+    ruas = vetorizado.sortear(gnp, vetorizado.pool(fake.street_name), quantidade)
+    numeros = [str(numero) for numero in vetorizado.inteiros(gnp, 1, 9999, quantidade)]
+    bairros = vetorizado.sortear(gnp, vetorizado.pool(fake.neighborhood), quantidade)
+    com_complemento = vetorizado.sorteio_booleano(gnp, 1 / 3, quantidade)
+    complementos_sorteados = vetorizado.sortear(gnp, complementos, quantidade)
+    complementos_linha = [c if tem else None for c, tem in zip(complementos_sorteados, com_complemento.tolist())]
+    cidades = vetorizado.sortear(gnp, vetorizado.pool(fake.city), quantidade)
+    estados = vetorizado.sortear(gnp, estados_br, quantidade)
+
+    return zip(ceps, ruas, numeros, bairros, complementos_linha, cidades, estados)
+
+
+def gerar_gatos_vetorizado(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela gato com NumPy"""
+    gnp = vetorizado.gerador_numpy(rng)
+    cores = ['Preto', 'Branco', 'Cinza', 'Laranja', 'Malhado', 'Siamês', 'Rajado']
+    racas = ['SRD', 'Persa', 'Siamês', 'Maine Coon', 'British Shorthair', 'Ragdoll']
+
+    nomes = vetorizado.sortear(gnp, vetorizado.pool(fake.first_name), quantidade)
+    idades = vetorizado.inteiros(gnp, 0, 15, quantidade)
+    datas_resgate = vetorizado.datas_recentes(gnp, 730, quantidade)
+    enderecos = vetorizado.sortear_chaves(gnp, enderecos_ids, quantidade)
+    cores_linha = vetorizado.sortear(gnp, cores, quantidade)
+    racas_linha = vetorizado.sortear(gnp, racas, quantidade)
+    condicoes = vetorizado.sortear(gnp, vetorizado.pool(lambda: fake.text(max_nb_chars=200)), quantidade)
+    adotados = vetorizado.sorteio_booleano(gnp, 0.5, quantidade).tolist()
+
+    return zip(nomes, idades, datas_resgate, enderecos, cores_linha, racas_linha, condicoes, adotados)
+
+
+def gerar_doacoes_vetorizado(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela doacao com NumPy"""
+    gnp = vetorizado.gerador_numpy(rng)
+    formas_pagamento = ['PIX', 'CARTAO_CREDITO', 'TRANSFERENCIA', 'DINHEIRO', 'CARTAO_DEBITO']
+
+    datas = distribuicoes.datas_lote(perfis_distribuicao, 'doacao.data', gnp, 365, quantidade)
+    valores = vetorizado.valores_monetarios(gnp, 10.0, 500.0, quantidade)
+    formas = vetorizado.sortear(gnp, formas_pagamento, quantidade)
+    pessoas = distribuicoes.chaves_lote(perfis_distribuicao, 'doacao.pessoa_cpf', gnp, pessoas_cpfs, quantidade)
+
+    return zip(datas, valores, formas, pessoas)
+
+
+def gerar_contatos_vetorizado(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela contato com NumPy"""
+    gnp = vetorizado.gerador_numpy(rng)
+    assuntos = [
+        'Interesse em adoção', 'Dúvidas sobre voluntariado', 'Relato de animal abandonado',
+        'Solicitação de castração', 'Doação de ração', 'Informações sobre evento'
+    ]
+
+    pessoas = distribuicoes.chaves_lote(perfis_distribuicao, 'contato.pessoa_cpf', gnp, pessoas_cpfs, quantidade)
+    datas_hora = distribuicoes.datas_lote(perfis_distribuicao, 'contato.data_hora', gnp, 365, quantidade)
+    datas_hora = distribuicoes.desempatar_lote(perfis_distribuicao, 'contato', inicio, datas_hora)
+    assuntos_linha = vetorizado.sortear(gnp, assuntos, quantidade)
+
+    return zip(pessoas, datas_hora, assuntos_linha)
+
+
+def gerar_gastos_vetorizado(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela gasto com NumPy"""
+    gnp = vetorizado.gerador_numpy(rng)
+    tipos = ['ALIMENTACAO', 'VETERINARIO', 'MEDICAMENTO', 'TRANSPORTE', 'HIGIENE', 'MANUTENCAO']
+
+    datas = distribuicoes.datas_lote(perfis_distribuicao, 'gasto.data', gnp, 365, quantidade)
+    valores = vetorizado.valores_monetarios(gnp, 10.0, 300.0, quantidade)
+    descricoes = vetorizado.sortear(gnp, vetorizado.pool(lambda: fake.text(max_nb_chars=100)), quantidade)
+    tipos_linha = vetorizado.sortear(gnp, tipos, quantidade)
+
+    # 70% dos gastos são relacionados a gatos, 30% a lares
+    de_gato = vetorizado.sorteio_booleano(gnp, 0.7, quantidade).tolist()
+    gatos = distribuicoes.chaves_lote(perfis_distribuicao, 'gasto.gato_id', gnp, gatos_ids, quantidade)
+    lares = distribuicoes.chaves_lote(perfis_distribuicao, 'gasto.lar_id', gnp, lares_ids, quantidade)
+    gatos_linha = [g if gato else None for g, gato in zip(gatos, de_gato)]
+    lares_linha = [None if gato else l for l, gato in zip(lares, de_gato)]
+
+    return zip(datas, valores, descricoes, tipos_linha, lares_linha, gatos_linha)
+
+
+def gerar_procedimentos_vetorizado(rng, fake, inicio, quantidade):
+    """Gera as linhas da tabela procedimento com NumPy"""
+    gnp = vetorizado.gerador_numpy(rng)
+    tipos = ['CONSULTA', 'VACINACAO', 'CASTRACAO', 'CIRURGIA', 'EXAME', 'TRATAMENTO']
+
+    gatos = distribuicoes.chaves_lote(perfis_distribuicao, 'procedimento.gato_id', gnp, gatos_ids, quantidade)
+    veterinarios = distribuicoes.chaves_lote(perfis_distribuicao, 'procedimento.veterinario_cpf', gnp,
+                                             veterinarios_cpfs, quantidade)
+    datas_hora = distribuicoes.datas_lote(perfis_distribuicao, 'procedimento.data_hora', gnp, 365, quantidade)
+    datas_hora = distribuicoes.desempatar_lote(perfis_distribuicao, 'procedimento', inicio, datas_hora)
+    tipos_linha = vetorizado.sortear(gnp, tipos, quantidade)
+    custos = vetorizado.valores_monetarios(gnp, 50.0, 800.0, quantidade)
+    descricoes = vetorizado.sortear(gnp, vetorizado.pool(lambda: fake.text(max_nb_chars=200)), quantidade)
+
+    return zip(gatos, veterinarios, datas_hora, tipos_linha, custos, descricoes)
+
+
+GERADORES_VETORIZADOS = {
+    gerar_enderecos: gerar_enderecos_vetorizado,
+    gerar_gatos: gerar_gatos_vetorizado,
+    gerar_doacoes: gerar_doacoes_vetorizado,
+    gerar_contatos: gerar_contatos_vetorizado,
+    gerar_gastos: gerar_gastos_vetorizado,
+    gerar_procedimentos: gerar_procedimentos_vetorizado,
+}
+
+
+# Fases da carga na ordem original, cada uma com as fases das quais depende: as que
+# criam as chaves estrangeiras que ela usa e as que preenchem os registros que ela lê
+# (os papéis de pessoa são sorteados em sequência para continuarem disjuntos).
+# Fases sem dependência entre si podem rodar ao mesmo tempo com --conexoes > 1.
+FASES = {
+    'enderecos': (popular_enderecos, ()),
+    'pessoas': (popular_pessoas, ('enderecos',)),
+    'gatos': (popular_gatos, ('enderecos',)),
+    'campanhas': (popular_campanhas, ('pessoas',)),
+    'eventos': (popular_eventos, ('enderecos',)),
+    'voluntarios': (popular_voluntarios, ('pessoas',)),
+    'adotantes': (popular_adotantes, ('voluntarios',)),
+    'veterinarios': (popular_veterinarios, ('adotantes',)),
+    'lares_temporarios': (popular_lares_temporarios, ('enderecos',)),
+    'funcoes': (popular_funcoes, ('voluntarios',)),
+    'doacoes': (popular_doacoes, ('pessoas',)),
+    'participantes': (popular_participantes, ('campanhas',)),
+    'contatos': (popular_contatos, ('pessoas',)),
+    'cuida_lar': (popular_cuida_lar, ('lares_temporarios', 'voluntarios')),
+    'voluntarios_evento': (popular_voluntarios_evento, ('eventos', 'voluntarios')),
+    'gatos_evento': (popular_gatos_evento, ('eventos', 'gatos')),
+    'fotos_gato': (popular_fotos_gato, ('gatos',)),
+    'hospedagem': (popular_hospedagem, ('gatos', 'lares_temporarios')),
+    'gastos': (popular_gastos, ('gatos', 'lares_temporarios')),
+    'procedimentos': (popular_procedimentos, ('gatos', 'veterinarios')),
+    'preferencias': (popular_preferencias, ('adotantes',)),
+    'triagens': (popular_triagens, ('adotantes', 'voluntarios')),
+    'fotos_triagem': (popular_fotos_triagem, ('triagens',)),
+    'adocoes': (popular_adocoes, ('gatos', 'adotantes')),
+    'devolucoes': (popular_devolucoes, ('adocoes',)),
+    'responsaveis_lares': (atualizar_responsaveis_lares, ('cuida_lar',)),
+}
+DEPENDENCIAS_FASES = {fase: deps for fase, (_, deps) in FASES.items()}
+
+# Registro de chaves preenchido por cada fase, conferido ao retomar uma carga
+retomada.configurar({
+    'enderecos': ('enderecos_ids', enderecos_ids),
+    'pessoas': ('pessoas_cpfs', pessoas_cpfs),
+    'gatos': ('gatos_ids', gatos_ids),
+    'campanhas': ('campanhas_ids', campanhas_ids),
+    'eventos': ('eventos_ids', eventos_ids),
+    'voluntarios': ('voluntarios_cpfs', voluntarios_cpfs),
+    'adotantes': ('adotantes_cpfs', adotantes_cpfs),
+    'veterinarios': ('veterinarios_cpfs', veterinarios_cpfs),
+    'lares_temporarios': ('lares_ids', lares_ids),
+})
+
+# Fases que leem do banco as linhas ainda sem filhos (fotos_triagem, devolucoes): a
+# lista muda a cada fragmento confirmado, então elas só são confirmadas no fim
+FASES_SEM_RETOMADA_PARCIAL = ('fotos_triagem', 'devolucoes')
+
+
+def executar_fase(cursor, fase, volumes):
+    """Executa uma fase da carga com o volume configurado para ela, medindo-a (metricas.py)"""
+    funcao = FASES[fase][0]
+    with metricas.medir_fase(fase):
+        try:
+            if fase in volumes:
+                funcao(cursor, volumes[fase])
+            else:
+                funcao(cursor)
+        except Exception:
+            carga.confirmar_pipeline(False)
+            raise
+        # No modo pipeline as linhas da fase vão por outra conexão, confirmada aqui
+        # para que as fases seguintes as enxerguem
+        carga.confirmar_pipeline()
+
+
+def carregar_em_uma_transacao(volumes):
+    """Executa as fases em sequência numa única conexão e transação"""
     conn = conectar_bd()
     cursor = conn.cursor()
     try:
-        popular_enderecos(cursor, 2000)
-        popular_pessoas(cursor, 1500)
-        popular_gatos(cursor, 800)
-        popular_campanhas(cursor, 50)
-        popular_eventos(cursor, 120)
-        popular_voluntarios(cursor, 200)
-        popular_adotantes(cursor, 400)
-        popular_veterinarios(cursor, 25)
-        popular_lares_temporarios(cursor, 80)
-        popular_funcoes(cursor)
-        popular_doacoes(cursor, 1200)
-        popular_participantes(cursor)
-        popular_contatos(cursor, 2500)
-        popular_cuida_lar(cursor)
-        popular_voluntarios_evento(cursor)
-        popular_gatos_evento(cursor)
-        popular_fotos_gato(cursor)
-        popular_hospedagem(cursor)
-        popular_gastos(cursor, 2000)
-        popular_procedimentos(cursor, 1500)
-        popular_preferencias(cursor)
-        popular_triagens(cursor)
-        popular_fotos_triagem(cursor)
-        popular_adocoes(cursor, 300)
-        popular_devolucoes(cursor, 25)
-        atualizar_responsaveis_lares(cursor)
+        tempos = agendador.executar_fases(
+            DEPENDENCIAS_FASES, lambda fase: executar_fase(cursor, fase, volumes))
         conn.commit()
+        return tempos
     except Exception as e:
         print(f"Erro durante a população do banco: {e}")
         conn.rollback()
@@ -584,5 +1006,281 @@ def main():
         conn.close()
 
 
+def carregar_em_paralelo(volumes, conexoes):
+    """Executa fases independentes ao mesmo tempo, cada uma na sua conexão e transação"""
+    pool = ThreadedConnectionPool(1, conexoes, **DB_CONFIG, cursor_factory=metricas.CursorMedido)
+
+    def rodar(fase):
+        if retomada.concluida(fase):
+            print(f"Fase {fase} já concluída, pulando")
+            return
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                retomada.iniciar_fase(cursor, fase, fase not in FASES_SEM_RETOMADA_PARCIAL)
+                executar_fase(cursor, fase, volumes)
+                retomada.concluir_fase(cursor, fase)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+    try:
+        return agendador.executar_fases(DEPENDENCIAS_FASES, rodar, paralelismo=conexoes)
+    except Exception as e:
+        # Cada fase confirma a própria transação: as fases já concluídas permanecem no banco
+        print(f"Erro durante a população do banco: {e}")
+        if retomada.ativa:
+            print("O que foi confirmado até o erro está no banco; continue com popular_bd.py --resume.")
+        else:
+            print("As fases concluídas antes do erro foram confirmadas; use resetar_bd.py antes de repetir a carga.")
+        raise
+    finally:
+        pool.closeall()
+
+
+def _ajuste_quantidade(texto):
+    """Converte 'tabela=N' de --quantidade em (tabela, N)"""
+    tabela, _, valor = texto.partition('=')
+    if not valor.isdigit():
+        raise argparse.ArgumentTypeError(f"Use o formato tabela=N: {texto}")
+    return tabela, int(valor)
+
+
+def _distribuicao(texto):
+    """Converte 'tabela.coluna=perfil' de --distribuicao em (coluna, perfil), validando o perfil"""
+    coluna, _, perfil = texto.partition('=')
+    try:
+        distribuicoes.ler_perfil(coluna, perfil)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return coluna, perfil
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Popula o banco com dados fictícios")
+    parser.add_argument('--modo-carga', choices=carga.MODOS_CARGA, default='insert',
+                        help="insert: um INSERT por linha; lote: um INSERT com várias linhas por bloco; "
+                             "copy: COPY ... FROM STDIN em blocos; pipeline: INSERTs preparados em "
+                             "pipeline pelo psycopg 3, confirmados a cada fase")
+    parser.add_argument('--tamanho-bloco', type=int, default=carga.TAMANHO_BLOCO,
+                        help="Quantidade de linhas enviadas por bloco")
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help="Fator que multiplica todos os volumes (1 = carga padrão)")
+    parser.add_argument('--quantidade', type=_ajuste_quantidade, action='append', default=[],
+                        metavar='TABELA=N',
+                        help=f"Volume fixo para uma tabela ({', '.join(VOLUMES_BASE)}); pode repetir")
+    parser.add_argument('--semente', type=int, default=None,
+                        help="Semente mestre; a mesma semente gera os mesmos dados (padrão: aleatória)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos usados para gerar os dados em paralelo")
+    parser.add_argument('--tamanho-fragmento', type=int, default=geracao.TAMANHO_FRAGMENTO,
+                        help="Linhas por fragmento de geração (faz parte da identidade dos dados)")
+    parser.add_argument('--backend', choices=BACKENDS, default='python',
+                        help="numpy: gera colunas numéricas, datas e categorias em lote "
+                             "(endereço, gato, doação, contato, gasto e procedimento)")
+    parser.add_argument('--distribuicao', type=_distribuicao, action='append', default=[],
+                        metavar='TABELA.COLUNA=PERFIL',
+                        help="Perfil de sorteio de uma chave estrangeira (uniforme, zipf:S) ou data "
+                             "(uniforme, recente:DIAS), ex.: doacao.pessoa_cpf=zipf:1.1; pode repetir")
+    parser.add_argument('--conexoes', type=int, default=1,
+                        help="Conexões usadas para carregar fases independentes ao mesmo tempo; "
+                             "com 1 a carga inteira roda numa única transação")
+    parser.add_argument('--adiar-indices', action='store_true',
+                        help="Remove índices, PKs, UNIQUEs, CHECKs e FKs antes da carga e os recria "
+                             "no final (índices em paralelo, restrições NOT VALID + VALIDATE)")
+    parser.add_argument('--conexoes-indices', type=int, default=4,
+                        help="Conexões usadas para criar índices e validar restrições em paralelo")
+    parser.add_argument('--maintenance-work-mem', default=indices_adiados.MAINTENANCE_WORK_MEM,
+                        help="maintenance_work_mem usado na criação dos índices")
+    parser.add_argument('--workers-manutencao', type=int, default=indices_adiados.WORKERS_MANUTENCAO,
+                        help="max_parallel_maintenance_workers usado na criação dos índices")
+    parser.add_argument('--geracao-servidor', action='store_true',
+                        help="Gera funcao, participantes, cuida_lar, voluntarios_evento, gatos_evento e "
+                             "fotos_gato no PostgreSQL com INSERT ... SELECT, sem enviar as linhas")
+    parser.add_argument('--append', action='store_true',
+                        help="Acrescenta os volumes configurados a um banco já populado: relê as chaves "
+                             "existentes em blocos e gera as linhas novas sem colidir com elas")
+    parser.add_argument('--retomavel', action='store_true',
+                        help="Confirma cada fragmento de cada fase e grava o ponto de retomada em "
+                             "controle_carga; se a carga falhar, continue com --resume")
+    parser.add_argument('--resume', action='store_true',
+                        help="Retoma a carga retomável interrompida com os mesmos parâmetros e semente, "
+                             "a partir do último fragmento confirmado")
+    parser.add_argument('--cache', action='store_true',
+                        help="Usa o cache de snapshots: se já houver um snapshot da mesma semente, volumes "
+                             "e esquema, carrega-o com COPY sem gerar os dados; senão gera e grava um")
+    parser.add_argument('--diretorio-cache', default=cache_snapshot.DIRETORIO_PADRAO,
+                        help="Diretório dos snapshots")
+    parser.add_argument('--cache-limite-gb', type=float, default=cache_snapshot.LIMITE_PADRAO_GB,
+                        help="Tamanho máximo do cache; os snapshots usados há mais tempo são removidos")
+    parser.add_argument('--metricas-json', metavar='ARQUIVO',
+                        help="Grava as métricas de cada fase (tempo, espera no banco, linhas/s, "
+                             "idas e voltas, bytes, pico de memória) em JSON")
+    parser.add_argument('--metricas-prometheus', metavar='ARQUIVO',
+                        help="Grava as mesmas métricas no formato textfile do Prometheus (.prom)")
+    return parser.parse_args()
+
+
+def main():
+    global backend
+    args = ler_argumentos()
+    try:
+        carga.definir_modo_carga(args.modo_carga, DB_CONFIG)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    carga.TAMANHO_BLOCO = args.tamanho_bloco
+    if (args.retomavel or args.resume) and (args.append or args.adiar_indices or args.modo_carga == 'pipeline'):
+        print("--retomavel e --resume não combinam com --append, --adiar-indices nem --modo-carga pipeline")
+        sys.exit(1)
+    if args.cache and (args.append or args.retomavel or args.resume):
+        print("--cache não combina com --append, --retomavel nem --resume")
+        sys.exit(1)
+    volumes = calcular_volumes(args.escala, dict(args.quantidade))
+    semente = args.semente if args.semente is not None else random.randrange(2**32)
+
+    if args.resume:
+        # Tudo o que define os dados vem da carga interrompida
+        conn = conectar_bd()
+        try:
+            parametros = retomada.carregar(conn)
+            semente = parametros['semente']
+            volumes = parametros['volumes']
+            args.tamanho_fragmento = parametros['tamanho_fragmento']
+            args.backend = parametros['backend']
+            args.geracao_servidor = parametros['geracao_servidor']
+            args.distribuicao = list(parametros.get('distribuicoes', {}).items())
+            reconstruir_registros(conn)
+            divergentes = retomada.conferir_registros()
+            if divergentes:
+                print("O banco não corresponde ao ponto de retomada:")
+                for divergencia in divergentes:
+                    print(f"  {divergencia}")
+                sys.exit(1)
+            retomada.ajustar_sequencias(conn)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        finally:
+            conn.close()
+        concluidas = sum(retomada.concluida(fase) for fase in FASES)
+        print(f"Retomando a carga: {concluidas} de {len(FASES)} fases concluídas")
+    # Tudo o que define as linhas geradas; identifica a carga no ponto de retomada e
+    # no cache de snapshots
+    parametros_dados = {
+        'semente': semente, 'volumes': volumes, 'tamanho_fragmento': args.tamanho_fragmento,
+        'backend': args.backend, 'geracao_servidor': args.geracao_servidor,
+    }
+    if args.distribuicao:
+        # Só entra quando usado, para não mudar a chave dos snapshots sem perfis
+        parametros_dados['distribuicoes'] = dict(args.distribuicao)
+    if args.retomavel and not args.resume:
+        conn = conectar_bd()
+        try:
+            retomada.preparar(conn, parametros_dados)
+        finally:
+            conn.close()
+
+    snapshot = None
+    if args.cache:
+        if args.semente is None:
+            print("Aviso: sem --semente cada execução gera dados diferentes e o snapshot nunca será reutilizado")
+        chave_snapshot = cache_snapshot.chave_snapshot(parametros_dados)
+        snapshot = cache_snapshot.procurar(args.diretorio_cache, chave_snapshot)
+        print(f"Snapshot {chave_snapshot}: {'encontrado no cache' if snapshot else 'será gravado após a carga'}")
+
+    geracao.configurar_geracao(semente, args.workers, args.tamanho_fragmento)
+    if args.backend == 'numpy' and not vetorizado.disponivel():
+        print("O backend numpy precisa do pacote numpy (pip install numpy)")
+        sys.exit(1)
+    backend = args.backend
+    geracao_servidor.ativa = args.geracao_servidor
+    perfis_distribuicao.update(distribuicoes.ler_perfis(dict(args.distribuicao)))
+    for coluna, perfil in perfis_distribuicao.items():
+        print(f"Distribuição de {coluna}: {perfil}")
+    print(f"Semente: {semente} ({args.workers} worker(s))")
+
+    etapas = {}
+    if args.append:
+        inicio = time.perf_counter()
+        conn = conectar_bd()
+        try:
+            reidratar_registros(conn)
+        finally:
+            conn.close()
+        etapas['reidratação'] = time.perf_counter() - inicio
+        print(f"Registros relidos em {etapas['reidratação']:.1f}s")
+        # A rodada depende do que já está no banco: repetir --append com a mesma
+        # semente sobre o mesmo banco gera os mesmos dados, sem repetir a carga anterior
+        geracao.configurar_geracao(semente, args.workers, args.tamanho_fragmento,
+                                   rodada_carga=sum(chaves_existentes.values()))
+
+    if args.adiar_indices:
+        inicio = time.perf_counter()
+        definicoes = indices_adiados.remover(DB_CONFIG)
+        etapas['remoção'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    tempos = None
+    if snapshot:
+        conn = conectar_bd()
+        try:
+            cache_snapshot.carregar(conn, snapshot)
+        finally:
+            conn.close()
+    else:
+        try:
+            if args.conexoes > 1 or retomada.ativa:
+                tempos = carregar_em_paralelo(volumes, args.conexoes)
+            else:
+                tempos = carregar_em_uma_transacao(volumes)
+        finally:
+            carga.fechar_pipeline()
+    etapas['carga'] = time.perf_counter() - inicio
+    if retomada.ativa:
+        conn = conectar_bd()
+        try:
+            retomada.encerrar(conn)
+        finally:
+            conn.close()
+    if tempos:
+        agendador.imprimir_relatorio(DEPENDENCIAS_FASES, tempos)
+    metricas.imprimir_relatorio()
+
+    if args.adiar_indices:
+        etapas.update(indices_adiados.restaurar(
+            DB_CONFIG, definicoes, args.conexoes_indices,
+            args.maintenance_work_mem, args.workers_manutencao))
+        indices_adiados.imprimir_resumo(etapas)
+
+    if args.cache and not snapshot:
+        inicio = time.perf_counter()
+        conn = conectar_bd()
+        try:
+            caminho = cache_snapshot.gravar(conn, args.diretorio_cache, chave_snapshot, parametros_dados)
+        finally:
+            conn.close()
+        etapas['snapshot'] = time.perf_counter() - inicio
+        print(f"Snapshot gravado em {caminho} ({etapas['snapshot']:.1f}s)")
+        for chave in cache_snapshot.despejar(args.diretorio_cache, args.cache_limite_gb * 2**30, chave_snapshot):
+            print(f"Snapshot {chave} removido do cache (limite de {args.cache_limite_gb} GB)")
+
+    if args.metricas_json or args.metricas_prometheus:
+        dados = metricas.relatorio({
+            'modo_carga': args.modo_carga, 'backend': args.backend, 'workers': args.workers,
+            'conexoes': args.conexoes, 'escala': args.escala,
+            'adiar_indices': str(args.adiar_indices).lower(), 'append': str(args.append).lower(),
+            'geracao_servidor': str(args.geracao_servidor).lower(),
+            'snapshot': str(bool(snapshot)).lower(),
+        }, semente=semente, etapas=etapas)
+        if args.metricas_json:
+            metricas.gravar_json(args.metricas_json, dados)
+        if args.metricas_prometheus:
+            metricas.gravar_prometheus(args.metricas_prometheus, dados)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,78 @@
+from array import array
+from collections.abc import Sequence
+from datetime import date
+
+
+class RegistroChaves(Sequence):
+    """Registro compacto das chaves de uma tabela, guardadas como int64 num array.
+
+    Ocupa 8 bytes por chave em vez de um objeto Python por chave. Com cpf=True as
+    chaves são CPFs: entram como texto de 11 dígitos e saem no mesmo formato, com
+    os zeros à esquerda. Com data=True as chaves são datas, guardadas como o número
+    do dia (date.toordinal). Por ser uma Sequence, funciona direto com random.choice e
+    random.sample, que sorteiam por índice sem copiar o registro.
+    """
+
+    def __init__(self, cpf=False, data=False):
+        self.cpf = cpf
+        self.data = data
+        self._valores = array('q')
+
+    def _interno(self, chave):
+        return chave.toordinal() if self.data else int(chave)
+
+    def _externo(self, valor):
+        if self.data:
+            return date.fromordinal(valor)
+        return f"{valor:011d}" if self.cpf else valor
+
+    def __len__(self):
+        return len(self._valores)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self._externo(valor) for valor in self._valores[indice]]
+        return self._externo(self._valores[indice])
+
+    def __iter__(self):
+        for valor in self._valores:
+            yield self._externo(valor)
+
+    def append(self, chave):
+        self._valores.append(self._interno(chave))
+
+    def extend(self, chaves):
+        self._valores.extend(self._interno(chave) for chave in chaves)
+
+    def clear(self):
+        self._valores = array('q')
+
+    def escolher(self, rng):
+        """Sorteia uma chave"""
+        return self[rng.randrange(len(self._valores))]
+
+    def amostrar(self, rng, quantidade, inicio=0):
+        """Sorteia até `quantidade` chaves distintas a partir da posição inicio, sem reposição, em O(quantidade)"""
+        disponiveis = max(0, len(self._valores) - inicio)
+        quantidade = min(quantidade, disponiveis)
+        return [self[inicio + i] for i in rng.sample(range(disponiveis), quantidade)]
+
+
+class ParticaoPapeis:
+    """Entrega faixas consecutivas e disjuntas de um registro, uma por papel.
+
+    Substitui os filtros `cpf not in voluntarios_cpfs and cpf not in ...`: cada papel
+    reserva as próximas posições ainda livres, então os papéis ficam disjuntos sem
+    nenhuma busca nos registros já preenchidos.
+    """
+
+    def __init__(self, registro, inicio=0):
+        self.registro = registro
+        self.proxima = inicio
+
+    def reservar(self, quantidade):
+        """Reserva até `quantidade` posições livres e devolve a faixa de índices"""
+        fim = min(self.proxima + quantidade, len(self.registro))
+        faixa = range(self.proxima, fim)
+        self.proxima = fim
+        return faixa
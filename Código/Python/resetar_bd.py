@@ -1,27 +1,215 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+
 import psycopg2
+from psycopg2 import sql
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+DIRETORIO_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SQL')
+ARQUIVO_ESQUEMA = os.path.join(DIRETORIO_SQL, 'tabelas_postgresql.sql')
+ARQUIVO_PARTICIONADO = os.path.join(DIRETORIO_SQL, 'tabelas_particionadas.sql')
+ARQUIVO_INDICES = os.path.join(DIRETORIO_SQL, 'indices.sql')
+ARQUIVO_RESUMOS = os.path.join(DIRETORIO_SQL, 'resumos.sql')
+
+# O hash do esquema aplicado fica no comentário do schema public
+PREFIXO_HASH = 'lar_temporario:esquema='
+
+MODOS_RESET = ('auto', 'drop', 'truncate', 'template')
+
+
+def conectar(banco=None, autocommit=False):
+    config = dict(DB_CONFIG)
+    if banco:
+        config['database'] = banco
+    con = psycopg2.connect(**config)
+    con.autocommit = autocommit
+    return con
+
+
+def ler_esquema(arquivos):
+    """Lê os arquivos SQL do esquema e calcula o hash do conjunto"""
+    scripts = []
+    hash_ = hashlib.sha256()
+    for arquivo in arquivos:
+        with open(arquivo, encoding='utf-8') as f:
+            script = f.read()
+        scripts.append(script)
+        hash_.update(os.path.basename(arquivo).encode())
+        hash_.update(script.encode())
+    return scripts, hash_.hexdigest()
+
+
+def hash_aplicado(cur):
+    """Hash do esquema registrado no banco pelo último reset completo (ou None)"""
+    cur.execute("SELECT obj_description('public'::regnamespace, 'pg_namespace')")
+    comentario = cur.fetchone()[0] or ''
+    if comentario.startswith(PREFIXO_HASH):
+        return comentario[len(PREFIXO_HASH):]
+    return None
+
+
+def listar_tabelas(cur):
+    cur.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'public' ORDER BY tablename")
+    return [tabela for (tabela,) in cur.fetchall()]
+
+
+def resetar_drop(con, scripts, hash_esquema):
+    """Remove todas as tabelas e executa de novo os scripts do esquema"""
+    cur = con.cursor()
+    for tabela in listar_tabelas(cur):
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {} CASCADE").format(sql.Identifier(tabela)))
+    print("Banco limpo com sucesso!")
+
+    # Cada script é enviado inteiro: o servidor separa os comandos, inclusive os que
+    # têm ';' dentro de funções ou strings
+    for script in scripts:
+        cur.execute(script)
+    cur.execute(sql.SQL("COMMENT ON SCHEMA public IS {}").format(sql.Literal(PREFIXO_HASH + hash_esquema)))
+    con.commit()
+    print("Script SQL executado com sucesso!")
+    cur.close()
+
+
+def resetar_truncate(con):
+    """Esvazia todas as tabelas num único TRUNCATE e reinicia as sequências"""
+    cur = con.cursor()
+    tabelas = listar_tabelas(cur)
+    if tabelas:
+        cur.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+            sql.SQL(', ').join(sql.Identifier(tabela) for tabela in tabelas)))
+    con.commit()
+    print(f"{len(tabelas)} tabelas esvaziadas com TRUNCATE")
+    cur.close()
+
+
+def clonar_modelo(modelo, destino, hash_esquema, banco_admin):
+    """Recria o banco destino como cópia do banco modelo com CREATE DATABASE ... TEMPLATE"""
+    con_modelo = conectar(modelo)
+    try:
+        hash_modelo = hash_aplicado(con_modelo.cursor())
+    finally:
+        con_modelo.close()
+    if hash_modelo != hash_esquema:
+        raise RuntimeError(f"O banco modelo {modelo} foi criado com outro esquema; "
+                           f"recrie-o com --criar-modelo")
+
+    con = conectar(banco_admin, autocommit=True)
+    try:
+        cur = con.cursor()
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(destino)))
+        cur.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+            sql.Identifier(destino), sql.Identifier(modelo)))
+        cur.close()
+    finally:
+        con.close()
+    print(f"Banco {destino} recriado a partir do modelo {modelo}")
+
+
+def criar_modelo(origem, modelo, banco_admin):
+    """Salva o banco origem (já populado) como banco modelo para o modo template"""
+    con = conectar(banco_admin, autocommit=True)
+    try:
+        cur = con.cursor()
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(modelo)))
+        # CREATE DATABASE ... TEMPLATE exige que ninguém esteja conectado à origem
+        cur.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+            sql.Identifier(modelo), sql.Identifier(origem)))
+        cur.close()
+    finally:
+        con.close()
+    print(f"Banco modelo {modelo} criado a partir de {origem}")
+
+
+def resetar(modo='auto', arquivos=None, modelo=None, banco=None, banco_admin='template1'):
+    """Reseta o banco no modo pedido e devolve (modo usado, segundos gastos).
+
+    auto usa TRUNCATE quando o hash dos scripts é igual ao registrado no banco e
+    recria as tabelas caso contrário; template clona o banco modelo.
+    """
+    arquivos = arquivos or [ARQUIVO_ESQUEMA]
+    banco = banco or DB_CONFIG['database']
+    scripts, hash_esquema = ler_esquema(arquivos)
+    inicio = time.perf_counter()
+
+    if modo == 'template':
+        if not modelo:
+            raise ValueError("O modo template precisa de --modelo")
+        clonar_modelo(modelo, banco, hash_esquema, banco_admin)
+        return modo, time.perf_counter() - inicio
+
+    con = conectar(banco)
+    try:
+        if modo == 'auto':
+            mesmo_esquema = hash_aplicado(con.cursor()) == hash_esquema
+            modo = 'truncate' if mesmo_esquema else 'drop'
+            if not mesmo_esquema:
+                print("Esquema alterado (ou sem hash registrado): recriando as tabelas")
+        elif modo == 'truncate' and hash_aplicado(con.cursor()) != hash_esquema:
+            raise RuntimeError("O esquema do banco é diferente dos scripts; use --modo drop")
+
+        if modo == 'truncate':
+            resetar_truncate(con)
+        else:
+            resetar_drop(con, scripts, hash_esquema)
+    finally:
+        con.close()
+    return modo, time.perf_counter() - inicio
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Reseta o banco de dados do projeto")
+    parser.add_argument('--modo', choices=MODOS_RESET, default='auto',
+                        help="drop: recria as tabelas; truncate: esvazia as tabelas; "
+                             "template: clona o banco --modelo; auto: truncate se o esquema não mudou")
+    parser.add_argument('--banco', default=DB_CONFIG['database'], help="Banco a resetar")
+    parser.add_argument('--modelo', help="Banco modelo (golden) usado pelo modo template")
+    parser.add_argument('--criar-modelo', action='store_true',
+                        help="Salva o --banco atual como --modelo em vez de resetar")
+    parser.add_argument('--banco-admin', default='template1',
+                        help="Banco usado para CREATE/DROP DATABASE nos modos com modelo")
+    parser.add_argument('--particionado', action='store_true',
+                        help="Particiona contato, doacao, gasto e procedimento por mês (SQL/tabelas_particionadas.sql)")
+    parser.add_argument('--indices', action='store_true',
+                        help="Aplica também o pacote de índices opcionais (SQL/indices.sql)")
+    parser.add_argument('--resumos', action='store_true',
+                        help="Cria também as tabelas de resumo mantidas por triggers (SQL/resumos.sql)")
+    return parser.parse_args()
+
+
+def main():
+    args = ler_argumentos()
+    try:
+        if args.criar_modelo:
+            if not args.modelo:
+                raise ValueError("--criar-modelo precisa de --modelo")
+            inicio = time.perf_counter()
+            criar_modelo(args.banco, args.modelo, args.banco_admin)
+            print(f"Tempo: {time.perf_counter() - inicio:.2f} s")
+            return
+        arquivos = [ARQUIVO_ESQUEMA]
+        if args.particionado:
+            arquivos.append(ARQUIVO_PARTICIONADO)
+        if args.indices:
+            arquivos.append(ARQUIVO_INDICES)
+        if args.resumos:
+            arquivos.append(ARQUIVO_RESUMOS)
+        modo, segundos = resetar(args.modo, arquivos, modelo=args.modelo, banco=args.banco,
+                                 banco_admin=args.banco_admin)
+    except (psycopg2.Error, RuntimeError, ValueError) as e:
+        print(f"Erro ao resetar o banco: {e}")
+        sys.exit(1)
+    print(f"Reset no modo {modo} concluído em {segundos:.2f} s")
+
 
-con = psycopg2.connect(
-    host='localhost',
-    database='postgres',
-    user='postgres',
-    password='mysecretpassword',
-    port=5432
-)
-cur = con.cursor()
-cur.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'public'")
-
-for (tabela,) in cur.fetchall():
-    cur.execute(f"DROP TABLE IF EXISTS {tabela} CASCADE")
-con.commit()
-print("Banco limpo com sucesso!")
-
-with open("./../SQL/tabelas_postgresql.sql") as f:
-    sql_script = f.read()
-for statement in sql_script.split(';'):
-    stmt = statement.strip()
-    if stmt:
-        cur.execute(stmt)
-con.commit()
-print("Script SQL executado com sucesso!")
-cur.close()
-con.close()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
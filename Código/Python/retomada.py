@@ -0,0 +1,160 @@
+import threading
+
+from psycopg2.extras import Json
+
+import carga
+
+# Carga retomável (popular_bd.py --retomavel / --resume): cada fase confirma a sua
+# transação a cada fragmento de geração (geracao.py) e grava, na mesma transação, o
+# ponto de retomada em controle_carga_fase. Como a semente de cada fragmento só
+# depende da semente mestre, da fase e do número do fragmento, retomar a partir do
+# próximo fragmento produz os mesmos dados de uma carga sem falhas.
+
+SQL_TABELAS = """
+CREATE TABLE IF NOT EXISTS controle_carga (
+    id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    parametros JSONB NOT NULL,
+    iniciada_em TIMESTAMP NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS controle_carga_fase (
+    fase TEXT PRIMARY KEY,
+    proximo_fragmento INT NOT NULL DEFAULT 0,
+    concluida BOOLEAN NOT NULL DEFAULT FALSE,
+    registro TEXT,
+    chaves BIGINT,
+    atualizada_em TIMESTAMP NOT NULL DEFAULT now()
+);
+"""
+
+# Tabelas com chave SERIAL: ids consumidos por transações desfeitas são devolvidos à
+# sequência antes de retomar, para que os ids sejam os de uma carga sem falhas
+TABELAS_SERIAL = ('endereco', 'gato', 'campanha', 'evento', 'lar_temporario', 'doacao', 'gasto')
+
+ativa = False
+fases = {}  # fase -> (proximo_fragmento, concluida, chaves)
+registros_das_fases = {}  # fase -> (nome do registro, registro) que a fase preenche
+
+_local = threading.local()
+
+
+def configurar(registros):
+    """Informa o registro de chaves preenchido por cada fase ({fase: (nome, registro)})"""
+    registros_das_fases.update(registros)
+
+
+def preparar(conexao, parametros):
+    """Inicia uma carga retomável: cria as tabelas de controle e grava os parâmetros"""
+    global ativa
+    with conexao.cursor() as cursor:
+        cursor.execute(SQL_TABELAS)
+        cursor.execute("DELETE FROM controle_carga_fase")
+        cursor.execute("DELETE FROM controle_carga")
+        cursor.execute("INSERT INTO controle_carga (parametros) VALUES (%s)", (Json(parametros),))
+    conexao.commit()
+    fases.clear()
+    ativa = True
+
+
+def carregar(conexao):
+    """Lê o ponto de retomada; devolve os parâmetros da carga interrompida"""
+    global ativa
+    with conexao.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('controle_carga') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            raise ValueError("Nenhuma carga retomável encontrada (rode popular_bd.py com --retomavel)")
+        cursor.execute("SELECT parametros FROM controle_carga WHERE id = 1")
+        linha = cursor.fetchone()
+        if linha is None:
+            raise ValueError("Nenhuma carga retomável encontrada (rode popular_bd.py com --retomavel)")
+        cursor.execute("SELECT fase, proximo_fragmento, concluida, chaves FROM controle_carga_fase")
+        fases.clear()
+        for fase, proximo, concluida, chaves in cursor.fetchall():
+            fases[fase] = (proximo, concluida, chaves)
+    conexao.commit()
+    ativa = True
+    return linha[0]
+
+
+def concluida(fase):
+    return ativa and fase in fases and fases[fase][1]
+
+
+def ajustar_sequencias(conexao):
+    """Volta cada sequência SERIAL para logo depois do maior id confirmado"""
+    with conexao.cursor() as cursor:
+        for tabela in TABELAS_SERIAL:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {tabela}",
+                (tabela,))
+    conexao.commit()
+
+
+def conferir_registros():
+    """Compara o tamanho dos registros reconstruídos com o gravado em cada ponto de retomada"""
+    divergentes = []
+    for fase, (_, _, chaves) in fases.items():
+        if fase in registros_das_fases and chaves is not None:
+            nome, registro = registros_das_fases[fase]
+            if len(registro) != chaves:
+                divergentes.append(f"{nome}: {len(registro)} chaves no banco, {chaves} no ponto de retomada")
+    return divergentes
+
+
+def iniciar_fase(cursor, fase, por_fragmento=True):
+    """Associa a fase em andamento na thread ao cursor em que ela grava.
+
+    Com por_fragmento=False a fase só é confirmada no fim (fases que leem do banco as
+    linhas ainda não processadas e não podem pular fragmentos).
+    """
+    _local.cursor = cursor
+    _local.fase = fase
+    _local.por_fragmento = por_fragmento
+
+
+def _fase_atual():
+    if not ativa or not getattr(_local, 'por_fragmento', False):
+        return None
+    return _local.fase
+
+
+def primeiro_fragmento():
+    """Primeiro fragmento ainda não confirmado da fase em andamento na thread"""
+    fase = _fase_atual()
+    if fase is None or fase not in fases:
+        return 0
+    return fases[fase][0]
+
+
+def _gravar(cursor, fase, proximo, concluida):
+    nome, registro = registros_das_fases.get(fase, (None, None))
+    cursor.execute("""
+        INSERT INTO controle_carga_fase (fase, proximo_fragmento, concluida, registro, chaves)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (fase) DO UPDATE
+        SET proximo_fragmento = EXCLUDED.proximo_fragmento, concluida = EXCLUDED.concluida,
+            registro = EXCLUDED.registro, chaves = EXCLUDED.chaves, atualizada_em = now()
+    """, (fase, proximo, concluida, nome, len(registro) if registro is not None else None))
+
+
+def concluir_fragmento(numero):
+    """Grava as linhas pendentes e o ponto de retomada e confirma a transação da fase"""
+    fase = _fase_atual()
+    if fase is None:
+        return
+    carga.descarregar_escritores()
+    _gravar(_local.cursor, fase, numero + 1, False)
+    _local.cursor.connection.commit()
+
+
+def concluir_fase(cursor, fase):
+    """Marca a fase como concluída; a transação é confirmada por quem chamou"""
+    _local.por_fragmento = False
+    if ativa:
+        _gravar(cursor, fase, 0, True)
+
+
+def encerrar(conexao):
+    """Remove o ponto de retomada de uma carga concluída"""
+    with conexao.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS controle_carga_fase, controle_carga")
+    conexao.commit()
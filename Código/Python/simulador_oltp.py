@@ -0,0 +1,390 @@
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import psycopg2
+import psycopg2.errors
+from faker import Faker
+
+import geracao
+import popular_bd
+
+# Simula a operação do abrigo com vários clientes concorrentes sobre um banco já
+# populado. Cada cliente sorteia o tipo da próxima transação segundo o mix e tira os
+# dados dos mesmos geradores do popular_bd, com as chaves relidas do banco.
+
+MIX_PADRAO = {
+    'doacao': 30,
+    'contato': 25,
+    'hospedagem_entrada': 10,
+    'hospedagem_saida': 10,
+    'procedimento': 15,
+    'adocao': 10,
+}
+
+ISOLAMENTOS = {
+    'read_committed': 'READ COMMITTED',
+    'repeatable_read': 'REPEATABLE READ',
+    'serializable': 'SERIALIZABLE',
+}
+
+# Transações marcadas com application_name = PREFIXO + tipo; o monitor de esperas por
+# lock usa o nome para atribuir cada espera ao tipo de transação
+PREFIXO_APLICACAO = 'oltp_'
+
+
+def _dados(gerador, rng, fake, *fixos):
+    """Uma linha de um gerador do popular_bd (None se o gerador não produzir nenhuma)"""
+    return next(iter(gerador(*fixos, rng, fake, 0, 1)), None)
+
+
+def transacao_doacao(cursor, rng, fake):
+    """Registra uma doação de hoje"""
+    _, valor, forma_pagamento, pessoa_cpf = _dados(popular_bd.gerar_doacoes, rng, fake)
+    cursor.execute("INSERT INTO doacao (data, valor, forma_pagamento, pessoa_cpf) "
+                   "VALUES (CURRENT_DATE, %s, %s, %s)", (valor, forma_pagamento, pessoa_cpf))
+    return True
+
+
+def transacao_contato(cursor, rng, fake):
+    """Registra um contato agora"""
+    pessoa_cpf, _, assunto = _dados(popular_bd.gerar_contatos, rng, fake)
+    cursor.execute("INSERT INTO contato (pessoa_cpf, data_hora, assunto) VALUES (%s, now(), %s)",
+                   (pessoa_cpf, assunto))
+    return True
+
+
+def transacao_hospedagem_entrada(cursor, rng, fake):
+    """Leva um gato não adotado e sem hospedagem aberta para um lar com vaga"""
+    gato_id = popular_bd.gatos_ids.escolher(rng)
+    lar_id = popular_bd.lares_ids.escolher(rng)
+    cursor.execute("SELECT adotado FROM gato WHERE id = %s FOR UPDATE", (gato_id,))
+    linha = cursor.fetchone()
+    if linha is None or linha[0]:
+        return False
+    cursor.execute("SELECT 1 FROM hospedagem WHERE gato_id = %s AND data_saida IS NULL", (gato_id,))
+    if cursor.fetchone():
+        return False
+    # O lar é travado para que duas entradas simultâneas não passem da capacidade
+    cursor.execute("""
+        SELECT l.capacidade_maxima,
+               (SELECT count(*) FROM hospedagem h WHERE h.lar_temporario_id = l.id AND h.data_saida IS NULL)
+        FROM lar_temporario l WHERE l.id = %s FOR UPDATE
+    """, (lar_id,))
+    capacidade, ocupados = cursor.fetchone()
+    if capacidade is not None and ocupados >= capacidade:
+        return False
+    cursor.execute("""
+        INSERT INTO hospedagem (lar_temporario_id, gato_id, data_entrada) VALUES (%s, %s, CURRENT_DATE)
+        ON CONFLICT DO NOTHING
+    """, (lar_id, gato_id))
+    return cursor.rowcount == 1
+
+
+def transacao_hospedagem_saida(cursor, rng, fake):
+    """Encerra a hospedagem aberta de um gato"""
+    gato_id = popular_bd.gatos_ids.escolher(rng)
+    cursor.execute("UPDATE hospedagem SET data_saida = CURRENT_DATE "
+                   "WHERE gato_id = %s AND data_saida IS NULL", (gato_id,))
+    return cursor.rowcount > 0
+
+
+def transacao_procedimento(cursor, rng, fake):
+    """Registra um procedimento veterinário agora"""
+    gato_id, veterinario_cpf, _, tipo, custo, descricao = _dados(popular_bd.gerar_procedimentos, rng, fake)
+    cursor.execute("""
+        INSERT INTO procedimento (gato_id, veterinario_cpf, data_hora, tipo, custo, descricao)
+        VALUES (%s, %s, now(), %s, %s, %s)
+    """, (gato_id, veterinario_cpf, tipo, custo, descricao))
+    return True
+
+
+def transacao_adocao(cursor, rng, fake):
+    """Adota um gato: grava a adoção, marca o gato como adotado e encerra a hospedagem aberta"""
+    dados = _dados(popular_bd.gerar_adocoes, rng, fake, 0)
+    if dados is None:
+        return False
+    gato_id, adotante_cpf, _, motivo = dados
+    cursor.execute("SELECT adotado FROM gato WHERE id = %s FOR UPDATE", (gato_id,))
+    linha = cursor.fetchone()
+    if linha is None or linha[0]:
+        return False
+    cursor.execute("""
+        INSERT INTO adocao (gato_id, adotante_cpf, data, motivo) VALUES (%s, %s, CURRENT_DATE, %s)
+        ON CONFLICT DO NOTHING
+    """, (gato_id, adotante_cpf, motivo))
+    if cursor.rowcount == 0:
+        return False
+    cursor.execute("UPDATE gato SET adotado = TRUE WHERE id = %s", (gato_id,))
+    cursor.execute("UPDATE hospedagem SET data_saida = CURRENT_DATE "
+                   "WHERE gato_id = %s AND data_saida IS NULL", (gato_id,))
+    return True
+
+
+TRANSACOES = {
+    'doacao': transacao_doacao,
+    'contato': transacao_contato,
+    'hospedagem_entrada': transacao_hospedagem_entrada,
+    'hospedagem_saida': transacao_hospedagem_saida,
+    'procedimento': transacao_procedimento,
+    'adocao': transacao_adocao,
+}
+
+
+def _novo_resultado():
+    return {'latencias_ms': [], 'erros': Counter()}
+
+
+def executar_cliente(numero, mix, duracao, isolamento, tentativas, pausa_ms):
+    """Roda transações do mix até o fim da duração; devolve latências e erros por tipo.
+
+    Deadlocks e falhas de serialização são refeitos até `tentativas` vezes; a latência
+    de uma transação inclui as tentativas refeitas.
+    """
+    semente = geracao.semente_fragmento('oltp', numero)
+    rng = random.Random(semente)
+    fake = Faker('pt_BR')
+    fake.seed_instance(semente)
+    tipos, pesos = list(mix), list(mix.values())
+    resultados = {tipo: _novo_resultado() for tipo in tipos}
+
+    conexao = psycopg2.connect(**popular_bd.DB_CONFIG)
+    conexao.set_session(isolation_level=ISOLAMENTOS[isolamento])
+    fim = time.monotonic() + duracao
+    try:
+        with conexao.cursor() as cursor:
+            while time.monotonic() < fim:
+                tipo = rng.choices(tipos, pesos)[0]
+                resultado = resultados[tipo]
+                inicio = time.perf_counter()
+                for _ in range(tentativas):
+                    try:
+                        cursor.execute("SET LOCAL application_name = %s", (PREFIXO_APLICACAO + tipo,))
+                        efetivada = TRANSACOES[tipo](cursor, rng, fake)
+                        conexao.commit()
+                    except psycopg2.errors.DeadlockDetected:
+                        conexao.rollback()
+                        resultado['erros']['deadlocks'] += 1
+                    except psycopg2.errors.SerializationFailure:
+                        conexao.rollback()
+                        resultado['erros']['falhas_serializacao'] += 1
+                    except psycopg2.IntegrityError:
+                        conexao.rollback()
+                        resultado['erros']['violacoes'] += 1
+                        break
+                    else:
+                        resultado['latencias_ms'].append((time.perf_counter() - inicio) * 1000)
+                        if not efetivada:
+                            resultado['erros']['sem_efeito'] += 1
+                        break
+                else:
+                    resultado['erros']['desistencias'] += 1
+                if pausa_ms:
+                    time.sleep(rng.expovariate(1000 / pausa_ms))
+    finally:
+        conexao.close()
+    return resultados
+
+
+def _inicializar_processo(semente, registros):
+    """Copia a semente e os registros de chaves para o processo filho"""
+    geracao.configurar_geracao(semente)
+    for nome, valor in registros.items():
+        setattr(popular_bd, nome, valor)
+
+
+class MonitorLocks(threading.Thread):
+    """Amostra pg_stat_activity e conta as transações do simulador esperando por lock.
+
+    Cada transação que aparece esperando em alguma amostra conta uma vez; o tempo de
+    espera é estimado pelo número de amostras vezes o intervalo.
+    """
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+        self.transacoes = {}  # tipo -> {(pid, início da transação)}
+        self.amostras = Counter()
+
+    def run(self):
+        conexao = psycopg2.connect(**popular_bd.DB_CONFIG)
+        conexao.autocommit = True
+        try:
+            with conexao.cursor() as cursor:
+                while not self.parar.wait(self.intervalo):
+                    cursor.execute("""
+                        SELECT substr(application_name, %s), pid, xact_start
+                        FROM pg_stat_activity
+                        WHERE wait_event_type = 'Lock' AND starts_with(application_name, %s)
+                    """, (len(PREFIXO_APLICACAO) + 1, PREFIXO_APLICACAO))
+                    for tipo, pid, inicio in cursor.fetchall():
+                        self.transacoes.setdefault(tipo, set()).add((pid, inicio))
+                        self.amostras[tipo] += 1
+        finally:
+            conexao.close()
+
+    def resumo(self, tipo):
+        return len(self.transacoes.get(tipo, ())), self.amostras[tipo] * self.intervalo
+
+
+def estatisticas_banco(conexao):
+    """Contador de deadlocks do banco (pg_stat_database).
+
+    As falhas de serialização vêm dos contadores por tipo de transação: a coluna
+    conflicts conta só conflitos de recuperação em réplicas e é sempre 0 no primário.
+    """
+    with conexao.cursor() as cursor:
+        cursor.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        deadlocks, = cursor.fetchone()
+    conexao.commit()
+    return {'deadlocks': deadlocks}
+
+
+def percentis(latencias_ms):
+    if len(latencias_ms) < 2:
+        valor = latencias_ms[0] if latencias_ms else 0.0
+        return {'p50_ms': valor, 'p95_ms': valor, 'p99_ms': valor, 'media_ms': valor}
+    cortes = statistics.quantiles(latencias_ms, n=100, method='inclusive')
+    return {
+        'p50_ms': cortes[49],
+        'p95_ms': cortes[94],
+        'p99_ms': cortes[98],
+        'media_ms': statistics.fmean(latencias_ms),
+    }
+
+
+def consolidar(resultados_clientes, duracao, monitor):
+    """Junta os resultados dos clientes num relatório por tipo de transação"""
+    por_tipo = {}
+    for resultados in resultados_clientes:
+        for tipo, resultado in resultados.items():
+            total = por_tipo.setdefault(tipo, _novo_resultado())
+            total['latencias_ms'].extend(resultado['latencias_ms'])
+            total['erros'].update(resultado['erros'])
+
+    relatorio = {}
+    for tipo, total in por_tipo.items():
+        esperas, segundos_espera = monitor.resumo(tipo)
+        relatorio[tipo] = {
+            'confirmadas': len(total['latencias_ms']),
+            'tps': len(total['latencias_ms']) / duracao,
+            **percentis(total['latencias_ms']),
+            'sem_efeito': total['erros']['sem_efeito'],
+            'deadlocks': total['erros']['deadlocks'],
+            'falhas_serializacao': total['erros']['falhas_serializacao'],
+            'violacoes': total['erros']['violacoes'],
+            'desistencias': total['erros']['desistencias'],
+            'esperas_lock': esperas,
+            'espera_lock_s': segundos_espera,
+        }
+    return relatorio
+
+
+def imprimir_relatorio(relatorio):
+    print(f"\n{'Transação':<20} {'TPS':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'Deadlocks':>10} {'Serializ.':>10} {'Esperas lock':>13} {'Sem efeito':>11}")
+    for tipo, r in relatorio.items():
+        print(f"{tipo:<20} {r['tps']:>8.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['deadlocks']:>10} {r['falhas_serializacao']:>10} {r['esperas_lock']:>13} "
+              f"{r['sem_efeito']:>11}")
+
+
+def _mix(texto):
+    """Converte 'tipo=peso,...' de --mix em {tipo: peso}"""
+    mix = {}
+    for parte in texto.split(','):
+        tipo, _, peso = parte.strip().partition('=')
+        if tipo not in TRANSACOES:
+            raise argparse.ArgumentTypeError(f"Transação desconhecida: {tipo} (use {', '.join(TRANSACOES)})")
+        try:
+            mix[tipo] = float(peso)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Use o formato tipo=peso: {parte}")
+    return {tipo: peso for tipo, peso in mix.items() if peso > 0}
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Simula transações concorrentes sobre o banco populado")
+    parser.add_argument('--clientes', type=int, default=8, help="Clientes simultâneos (uma conexão cada)")
+    parser.add_argument('--duracao', type=float, default=30.0, help="Segundos de simulação")
+    parser.add_argument('--mix', type=_mix, default=MIX_PADRAO,
+                        help="Pesos das transações, ex.: doacao=30,contato=25,adocao=10 "
+                             f"(tipos: {', '.join(TRANSACOES)})")
+    parser.add_argument('--isolamento', choices=list(ISOLAMENTOS), default='read_committed')
+    parser.add_argument('--tentativas', type=int, default=3,
+                        help="Vezes que uma transação é tentada após deadlock ou falha de serialização")
+    parser.add_argument('--pausa-ms', type=float, default=0.0,
+                        help="Pausa média entre transações de um cliente (exponencial)")
+    parser.add_argument('--processos', action='store_true',
+                        help="Roda os clientes em processos em vez de threads (evita disputa pelo GIL)")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--intervalo-amostra', type=float, default=0.05,
+                        help="Intervalo em segundos entre as amostras de esperas por lock")
+    parser.add_argument('--saida', help="Grava o relatório em JSON")
+    args = parser.parse_args()
+    if not args.mix:
+        parser.error("--mix precisa de pelo menos uma transação com peso positivo")
+    if args.tentativas < 1:
+        parser.error("--tentativas precisa ser pelo menos 1")
+    return args
+
+
+def main():
+    args = ler_argumentos()
+    conexao = psycopg2.connect(**popular_bd.DB_CONFIG)
+    try:
+        popular_bd.reidratar_registros(conexao)
+        if not popular_bd.gatos_ids or not popular_bd.pessoas_cpfs:
+            print("O banco está vazio; popule-o antes com popular_bd.py")
+            return
+        antes = estatisticas_banco(conexao)
+        geracao.configurar_geracao(args.semente)
+
+        monitor = MonitorLocks(args.intervalo_amostra)
+        monitor.start()
+        print(f"Simulando {args.clientes} clientes por {args.duracao:.0f}s "
+              f"({'processos' if args.processos else 'threads'}, {ISOLAMENTOS[args.isolamento]})...")
+        parametros = (args.mix, args.duracao, args.isolamento, args.tentativas, args.pausa_ms)
+        if args.processos:
+            registros = {nome: getattr(popular_bd, nome) for nome in popular_bd.NOMES_REGISTROS}
+            executor = ProcessPoolExecutor(args.clientes, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=_inicializar_processo,
+                                           initargs=(args.semente, registros))
+        else:
+            executor = ThreadPoolExecutor(args.clientes)
+        inicio = time.perf_counter()
+        with executor:
+            futuros = [executor.submit(executar_cliente, numero, *parametros) for numero in range(args.clientes)]
+            resultados_clientes = [futuro.result() for futuro in futuros]
+        duracao = time.perf_counter() - inicio
+        monitor.parar.set()
+        monitor.join()
+        depois = estatisticas_banco(conexao)
+    finally:
+        conexao.close()
+
+    relatorio = consolidar(resultados_clientes, duracao, monitor)
+    imprimir_relatorio(relatorio)
+    total = sum(r['confirmadas'] for r in relatorio.values())
+    banco = {chave: depois[chave] - antes[chave] for chave in antes}
+    print(f"\nTotal: {total} transações em {duracao:.1f}s ({total / duracao:.1f} TPS); "
+          f"deadlocks no banco (pg_stat_database): {banco['deadlocks']}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'clientes': args.clientes, 'duracao_s': duracao, 'mix': args.mix,
+                       'isolamento': args.isolamento, 'processos': args.processos,
+                       'semente': args.semente, 'banco': banco, 'transacoes': relatorio},
+                      f, ensure_ascii=False, indent=2)
+        print(f"Relatório gravado em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import re
+import unicodedata
+
+# Cada gerador recebe a posição da linha na tabela (0, 1, 2, ...) e devolve um valor
+# diferente para cada posição, sem tentar de novo e sem guardar os valores já usados.
+# As permutações são fixas (não dependem da semente) para que cargas incrementais que
+# continuam a numeração de uma carga anterior também não repitam valores.
+
+_MODULO_CPF = 10 ** 9
+_A_CPF = 387_420_489  # 3^18, primo com 10: (A * i + B) mod 10^9 é uma permutação
+_B_CPF = 123_456_789
+
+_MODULO_CRMV = 10 ** 6
+_A_CRMV = 531_441  # 3^12
+_B_CRMV = 271_828
+
+DOMINIOS_EMAIL = ('example.com', 'example.org', 'example.net', 'exemplo.com.br')
+UFS_CRMV = ('SP', 'RJ', 'MG', 'RS', 'PR', 'SC', 'BA', 'GO', 'PE', 'CE')
+
+_ALFABETO_36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _digito_verificador(digitos):
+    peso_inicial = len(digitos) + 1
+    soma = sum(int(d) * peso for d, peso in zip(digitos, range(peso_inicial, 1, -1)))
+    resto = soma % 11
+    return '0' if resto < 2 else str(11 - resto)
+
+
+def cpf(posicao):
+    """CPF de 11 dígitos com dígitos verificadores válidos, único para posições < 10^9"""
+    if not 0 <= posicao < _MODULO_CPF:
+        raise ValueError(f"Posição fora do espaço de CPFs: {posicao}")
+    base = f"{(_A_CPF * posicao + _B_CPF) % _MODULO_CPF:09d}"
+    primeiro = _digito_verificador(base)
+    return base + primeiro + _digito_verificador(base + primeiro)
+
+
+def _base36(numero):
+    if numero == 0:
+        return '0'
+    digitos = []
+    while numero:
+        numero, resto = divmod(numero, 36)
+        digitos.append(_ALFABETO_36[resto])
+    return ''.join(reversed(digitos))
+
+
+def email(posicao, nome):
+    """E-mail derivado do nome, com a posição em base 36 garantindo unicidade.
+
+    Só usa caracteres aceitos por chk_email_valido:
+    ^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,}$
+    """
+    ascii_ = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    usuario = re.sub(r'[^a-z0-9]+', '.', ascii_.lower()).strip('.') or 'pessoa'
+    dominio = DOMINIOS_EMAIL[posicao % len(DOMINIOS_EMAIL)]
+    return f"{usuario}.{_base36(posicao)}@{dominio}"
+
+
+def crmv(posicao):
+    """CRMV no formato número-UF (chk_crmv_formato), único para qualquer posição"""
+    if posicao < _MODULO_CRMV:
+        numero = (_A_CRMV * posicao + _B_CRMV) % _MODULO_CRMV
+    else:
+        # Fora da permutação os números são >= 10^6 e não colidem com os de cima
+        numero = posicao
+    return f"{numero}-{UFS_CRMV[posicao % len(UFS_CRMV)]}"
+
+
+def nome_com_sufixo(prefixo, frase, posicao):
+    """Nome de campanha ou evento único pela posição (uq_campanha_nome_data, uq_evento_nome_data)"""
+    return f"{prefixo} {frase} {posicao + 1}"
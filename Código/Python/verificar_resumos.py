@@ -0,0 +1,76 @@
+import argparse
+import sys
+
+import psycopg2
+from psycopg2 import sql
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'postgres',
+    'user': 'postgres',
+    'password': 'mysecretpassword',
+    'port': 5432
+}
+
+# Cada resumo_X é comparado com a visão recalculo_X, que refaz o agregado completo
+RESUMOS = ('gasto_tipo', 'gasto_gato', 'procedimento_tipo', 'adocao_ano', 'ocupacao_lar')
+
+EXEMPLOS = 5
+
+
+def comparar_resumo(cur, resumo):
+    """Devolve (linhas que faltam no resumo, linhas que sobram nele), até EXEMPLOS de cada"""
+    tabela = sql.Identifier(f'resumo_{resumo}')
+    visao = sql.Identifier(f'recalculo_{resumo}')
+    diferencas = []
+    for origem, destino in ((visao, tabela), (tabela, visao)):
+        cur.execute(sql.SQL("SELECT * FROM (SELECT * FROM {} EXCEPT ALL SELECT * FROM {}) d LIMIT %s")
+                    .format(origem, destino), (EXEMPLOS,))
+        diferencas.append(cur.fetchall())
+    return diferencas
+
+
+def verificar(con):
+    """Compara todos os resumos com o recálculo completo; devolve True se todos batem"""
+    cur = con.cursor()
+    # Uma única foto do banco para todas as comparações
+    cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    consistente = True
+    for resumo in RESUMOS:
+        faltando, sobrando = comparar_resumo(cur, resumo)
+        if not faltando and not sobrando:
+            print(f"resumo_{resumo}: OK")
+            continue
+        consistente = False
+        print(f"resumo_{resumo}: DIVERGENTE")
+        for linha in faltando:
+            print(f"  esperado, ausente no resumo: {linha}")
+        for linha in sobrando:
+            print(f"  no resumo, ausente no recálculo: {linha}")
+    con.rollback()
+    cur.close()
+    return consistente
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere as tabelas de resumo contra o recálculo completo")
+    parser.add_argument('--corrigir', action='store_true',
+                        help="Recalcula todos os resumos (recalcular_resumos) se houver divergência")
+    args = parser.parse_args()
+
+    con = psycopg2.connect(**DB_CONFIG)
+    try:
+        if verificar(con):
+            return
+        if not args.corrigir:
+            sys.exit(1)
+        with con.cursor() as cur:
+            cur.execute("SELECT recalcular_resumos()")
+        con.commit()
+        print("Resumos recalculados")
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # backend opcional: só é necessário com --backend numpy
+    np = None
+
+TAMANHO_POOL = 256
+
+
+def disponivel():
+    return np is not None
+
+
+def gerador_numpy(rng):
+    """Cria um gerador NumPy determinístico a partir do random.Random do fragmento"""
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+def pool(funcao, tamanho=TAMANHO_POOL):
+    """Amostra de valores do Faker usada para sortear campos de texto em lote"""
+    return np.array([funcao() for _ in range(tamanho)], dtype=object)
+
+
+def sortear(gnp, valores, n, pesos=None):
+    """Sorteia n valores de uma lista ou pool, opcionalmente com pesos"""
+    valores = np.asarray(valores, dtype=object)
+    if pesos is not None:
+        pesos = np.asarray(pesos, dtype=float)
+        pesos = pesos / pesos.sum()
+    return valores[gnp.choice(len(valores), size=n, p=pesos)].tolist()
+
+
+def sortear_chaves(gnp, registro, n):
+    """Sorteia n chaves (com repetição) de um registro de chaves"""
+    indices = gnp.integers(0, len(registro), size=n)
+    return [registro[i] for i in indices.tolist()]
+
+
+def inteiros(gnp, minimo, maximo, n):
+    """n inteiros uniformes em [minimo, maximo]"""
+    return gnp.integers(minimo, maximo + 1, size=n).tolist()
+
+
+def sorteio_booleano(gnp, probabilidade, n):
+    """Máscara com True em cada posição com a probabilidade informada"""
+    return gnp.random(n) < probabilidade
+
+
+def datas_recentes(gnp, dias, n):
+    """n datas uniformes entre hoje - dias e hoje (como fake.date_between('-Nd', 'today'))"""
+    hoje = np.datetime64(date.today(), 'D')
+    deslocamentos = gnp.integers(0, dias + 1, size=n).astype('timedelta64[D]')
+    return (hoje - deslocamentos).tolist()
+
+
+def datas_hora_recentes(gnp, dias, n):
+    """n instantes uniformes, com resolução de microssegundos, nos últimos `dias` dias.
+
+    Com segundos inteiros, (pessoa_cpf, data_hora) de contato e as outras PKs com
+    data_hora repetiriam em cargas grandes e abortariam a carga.
+    """
+    agora = np.datetime64(datetime.now(), 'us')
+    deslocamentos = gnp.integers(0, dias * 86400 * 10**6 + 1, size=n).astype('timedelta64[us]')
+    return (agora - deslocamentos).tolist()
+
+
+def valores_monetarios(gnp, minimo, maximo, n):
+    """n valores em reais sorteados em centavos, já com duas casas decimais"""
+    centavos = gnp.integers(round(minimo * 100), round(maximo * 100) + 1, size=n)
+    return [Decimal(c).scaleb(-2) for c in centavos.tolist()]
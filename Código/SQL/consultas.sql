@@ -60,7 +60,7 @@ SELECT 'devolucao'           AS tabela, COUNT(*) AS qtde FROM devolucao;
 -- Gatos disponíveis para adoção 
 SELECT g.id, g.nome, g.idade, g.cor, g.raca, g.condicao_saude
 FROM gato g
-WHERE (g.adotado IS NULL OR g.adotado = FALSE)
+WHERE g.adotado IS NOT TRUE  -- falso ou nulo; casa com idx_gato_disponivel
 ORDER BY g.id;
 
 -- Gatos atualmente hospedados e o lar onde estão
@@ -77,6 +77,11 @@ WITH ocup AS (
   WHERE data_saida IS NULL
   GROUP BY lar_temporario_id
 )
+SELECT l.id AS lar_id, l.capacidade_maxima, COALESCE(o.ocupacao, 0) AS ocupacao_atual,
+       l.capacidade_maxima - COALESCE(o.ocupacao, 0) AS vagas
+FROM lar_temporario l
+LEFT JOIN ocup o ON o.lar_temporario_id = l.id
+ORDER BY l.id;
 
 -- Gastos por tipo
 SELECT tipo, COUNT(*) AS qtd, SUM(valor) AS total
@@ -97,6 +102,23 @@ FROM procedimento
 GROUP BY tipo
 ORDER BY qtd DESC;
 
+-- Gastos por tipo no ano corrente
+-- (com as tabelas particionadas só as partições do ano são lidas)
+SELECT tipo, COUNT(*) AS qtd, SUM(valor) AS total
+FROM gasto
+WHERE data >= date_trunc('year', CURRENT_DATE)
+  AND data < date_trunc('year', CURRENT_DATE) + INTERVAL '1 year'
+GROUP BY tipo
+ORDER BY total DESC;
+
+-- Doações por mês no ano corrente
+SELECT date_trunc('month', data)::DATE AS mes, COUNT(*) AS qtd_doacoes, SUM(valor) AS total
+FROM doacao
+WHERE data >= date_trunc('year', CURRENT_DATE)
+  AND data < date_trunc('year', CURRENT_DATE) + INTERVAL '1 year'
+GROUP BY 1
+ORDER BY mes;
+
 -- Adoções por ano
 SELECT EXTRACT(YEAR FROM data)::INT AS ano, COUNT(*) AS qtd_adocoes
 FROM adocao
@@ -0,0 +1,31 @@
+--------------------------- CONSULTAS SOBRE OS RESUMOS ---------------------------
+-- Mesmos resultados das consultas de consultas.sql, lidos das tabelas de resumo
+-- (resumos.sql): o custo depende do número de grupos, não do tamanho das tabelas.
+
+-- Capacidade total de lares e ocupação atual
+SELECT l.id AS lar_id, l.capacidade_maxima, COALESCE(o.ocupacao, 0) AS ocupacao_atual,
+       l.capacidade_maxima - COALESCE(o.ocupacao, 0) AS vagas
+FROM lar_temporario l
+LEFT JOIN resumo_ocupacao_lar o ON o.lar_temporario_id = l.id
+ORDER BY l.id;
+
+-- Gastos por tipo
+SELECT tipo, qtd, total
+FROM resumo_gasto_tipo
+ORDER BY total DESC;
+
+-- Gastos por gato
+SELECT g.id AS gato_id, g.nome, r.qtd AS qtd_gastos, r.total AS total_gasto
+FROM resumo_gasto_gato r
+JOIN gato g ON g.id = r.gato_id
+ORDER BY total_gasto DESC NULLS LAST;
+
+-- Procedimentos veterinários por tipo
+SELECT tipo, qtd, custo_total
+FROM resumo_procedimento_tipo
+ORDER BY qtd DESC;
+
+-- Adoções por ano
+SELECT ano, qtd AS qtd_adocoes
+FROM resumo_adocao_ano
+ORDER BY ano DESC;
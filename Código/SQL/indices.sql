@@ -0,0 +1,38 @@
+-- Pacote opcional de índices para as chaves estrangeiras e os filtros das consultas.
+-- Aplicado pelo resetar_bd.py com --indices, ou direto no psql depois de criar as tabelas.
+
+-- Chaves estrangeiras usadas em junções e filtros de consultas.sql. Sem elas, os
+-- ON DELETE CASCADE / SET NULL a partir de gato e pessoa também fazem varreduras.
+CREATE INDEX IF NOT EXISTS idx_gasto_gato_id ON gasto (gato_id);
+CREATE INDEX IF NOT EXISTS idx_gasto_lar_id ON gasto (lar_id);
+CREATE INDEX IF NOT EXISTS idx_hospedagem_gato_id ON hospedagem (gato_id);
+CREATE INDEX IF NOT EXISTS idx_procedimento_veterinario_cpf ON procedimento (veterinario_cpf);
+CREATE INDEX IF NOT EXISTS idx_doacao_pessoa_cpf ON doacao (pessoa_cpf);
+CREATE INDEX IF NOT EXISTS idx_adocao_adotante_cpf ON adocao (adotante_cpf);
+CREATE INDEX IF NOT EXISTS idx_devolucao_adotante_cpf ON devolucao (adotante_cpf);
+CREATE INDEX IF NOT EXISTS idx_cuida_lar_voluntario_cpf ON cuida_lar (voluntario_cpf);
+CREATE INDEX IF NOT EXISTS idx_voluntarios_evento_voluntario_cpf ON voluntarios_evento (voluntario_cpf);
+CREATE INDEX IF NOT EXISTS idx_gatos_evento_gato_id ON gatos_evento (gato_id);
+CREATE INDEX IF NOT EXISTS idx_participantes_campanha_id ON participantes (campanha_id);
+CREATE INDEX IF NOT EXISTS idx_triagem_responsavel_cpf ON triagem (responsavel_cpf);
+
+-- Chaves estrangeiras fora das consultas, mas com ON DELETE SET NULL: sem índice, cada
+-- pessoa, endereço ou voluntário removido varre a tabela que o referencia (pessoa, a
+-- maior delas, no caso de endereco).
+CREATE INDEX IF NOT EXISTS idx_campanha_vencedor_cpf ON campanha (vencedor_cpf);
+CREATE INDEX IF NOT EXISTS idx_pessoa_endereco_id ON pessoa (endereco_id);
+CREATE INDEX IF NOT EXISTS idx_gato_endereco_resgate_id ON gato (endereco_resgate_id);
+CREATE INDEX IF NOT EXISTS idx_evento_endereco_id ON evento (endereco_id);
+CREATE INDEX IF NOT EXISTS idx_lar_temporario_responsavel_cpf ON lar_temporario (responsavel_cpf);
+
+-- Hospedagens em aberto: "Gatos atualmente hospedados" (ordenada por data_entrada DESC)
+-- e a ocupação dos lares leem só este índice, que é pequeno porque cobre apenas as
+-- estadias sem data de saída.
+CREATE INDEX IF NOT EXISTS idx_hospedagem_ativa
+ON hospedagem (data_entrada DESC, gato_id) INCLUDE (lar_temporario_id)
+WHERE data_saida IS NULL;
+
+-- Gatos disponíveis para adoção (adotado falso ou nulo), em ordem de id
+CREATE INDEX IF NOT EXISTS idx_gato_disponivel
+ON gato (id)
+WHERE adotado IS NOT TRUE;
@@ -0,0 +1,218 @@
+-- Tabelas de resumo opcionais para os agregados de consultas.sql.
+-- Aplicado pelo resetar_bd.py com --resumos, ou direto no psql depois de criar as tabelas.
+--
+-- Cada resumo tem uma visão recalculo_* com o agregado completo (a definição de
+-- referência) e uma tabela resumo_* com as mesmas colunas, mantida por triggers
+-- por comando: cada INSERT/UPDATE/DELETE (ou bloco de COPY) aplica só a diferença
+-- das linhas alteradas, lidas das tabelas de transição. As consultas do painel
+-- (consultas_resumos.sql) leem um registro por grupo em vez de varrer a tabela base.
+
+---------------------------- DEFINIÇÕES DE REFERÊNCIA ----------------------------
+
+CREATE VIEW recalculo_gasto_tipo AS
+SELECT tipo, COUNT(*) AS qtd, SUM(valor) AS total
+FROM gasto
+GROUP BY tipo;
+
+CREATE VIEW recalculo_gasto_gato AS
+SELECT gato_id, COUNT(*) AS qtd, SUM(valor) AS total
+FROM gasto
+WHERE gato_id IS NOT NULL
+GROUP BY gato_id;
+
+CREATE VIEW recalculo_procedimento_tipo AS
+SELECT tipo, COUNT(*) AS qtd, SUM(COALESCE(custo, 0)) AS custo_total
+FROM procedimento
+GROUP BY tipo;
+
+CREATE VIEW recalculo_adocao_ano AS
+SELECT EXTRACT(YEAR FROM data)::INT AS ano, COUNT(*) AS qtd
+FROM adocao
+GROUP BY 1;
+
+CREATE VIEW recalculo_ocupacao_lar AS
+SELECT lar_temporario_id, COUNT(*) AS ocupacao
+FROM hospedagem
+WHERE data_saida IS NULL
+GROUP BY lar_temporario_id;
+
+---------------------------------- RESUMOS ----------------------------------
+
+CREATE TABLE resumo_gasto_tipo (
+    tipo VARCHAR(50) NOT NULL PRIMARY KEY,
+    qtd BIGINT NOT NULL,
+    total DECIMAL NOT NULL
+);
+
+CREATE TABLE resumo_gasto_gato (
+    gato_id INT NOT NULL PRIMARY KEY,
+    qtd BIGINT NOT NULL,
+    total DECIMAL NOT NULL
+);
+
+CREATE TABLE resumo_procedimento_tipo (
+    tipo VARCHAR(50) NOT NULL PRIMARY KEY,
+    qtd BIGINT NOT NULL,
+    custo_total DECIMAL NOT NULL
+);
+
+CREATE TABLE resumo_adocao_ano (
+    ano INT NOT NULL PRIMARY KEY,
+    qtd BIGINT NOT NULL
+);
+
+CREATE TABLE resumo_ocupacao_lar (
+    lar_temporario_id INT NOT NULL PRIMARY KEY,
+    ocupacao BIGINT NOT NULL
+);
+
+-- Reconstrói todos os resumos a partir das visões (usado depois de cargas com os
+-- triggers desligados e para corrigir divergências)
+CREATE OR REPLACE FUNCTION recalcular_resumos() RETURNS void AS $$
+BEGIN
+    TRUNCATE resumo_gasto_tipo, resumo_gasto_gato, resumo_procedimento_tipo,
+             resumo_adocao_ano, resumo_ocupacao_lar;
+    INSERT INTO resumo_gasto_tipo SELECT * FROM recalculo_gasto_tipo;
+    INSERT INTO resumo_gasto_gato SELECT * FROM recalculo_gasto_gato;
+    INSERT INTO resumo_procedimento_tipo SELECT * FROM recalculo_procedimento_tipo;
+    INSERT INTO resumo_adocao_ano SELECT * FROM recalculo_adocao_ano;
+    INSERT INTO resumo_ocupacao_lar SELECT * FROM recalculo_ocupacao_lar;
+END;
+$$ LANGUAGE plpgsql;
+
+---------------------------------- TRIGGERS ----------------------------------
+-- As funções somam as linhas novas (INSERT e UPDATE) e subtraem as antigas (DELETE
+-- e UPDATE); grupos que chegam a zero são removidos para o resumo continuar igual à
+-- visão. Os grupos são atualizados em ordem de chave para que transações concorrentes
+-- travem as linhas do resumo sempre na mesma ordem.
+
+CREATE OR REPLACE FUNCTION resumir_gasto() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumo_gasto_tipo AS r (tipo, qtd, total)
+        SELECT tipo, COUNT(*), SUM(valor) FROM novos GROUP BY tipo ORDER BY tipo
+        ON CONFLICT (tipo) DO UPDATE
+        SET qtd = r.qtd + EXCLUDED.qtd, total = r.total + EXCLUDED.total;
+
+        INSERT INTO resumo_gasto_gato AS r (gato_id, qtd, total)
+        SELECT gato_id, COUNT(*), SUM(valor) FROM novos WHERE gato_id IS NOT NULL
+        GROUP BY gato_id ORDER BY gato_id
+        ON CONFLICT (gato_id) DO UPDATE
+        SET qtd = r.qtd + EXCLUDED.qtd, total = r.total + EXCLUDED.total;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO resumo_gasto_tipo AS r (tipo, qtd, total)
+        SELECT tipo, -COUNT(*), -SUM(valor) FROM antigos GROUP BY tipo ORDER BY tipo
+        ON CONFLICT (tipo) DO UPDATE
+        SET qtd = r.qtd + EXCLUDED.qtd, total = r.total + EXCLUDED.total;
+
+        INSERT INTO resumo_gasto_gato AS r (gato_id, qtd, total)
+        SELECT gato_id, -COUNT(*), -SUM(valor) FROM antigos WHERE gato_id IS NOT NULL
+        GROUP BY gato_id ORDER BY gato_id
+        ON CONFLICT (gato_id) DO UPDATE
+        SET qtd = r.qtd + EXCLUDED.qtd, total = r.total + EXCLUDED.total;
+
+        DELETE FROM resumo_gasto_tipo WHERE tipo IN (SELECT tipo FROM antigos) AND qtd = 0;
+        DELETE FROM resumo_gasto_gato WHERE gato_id IN (SELECT gato_id FROM antigos) AND qtd = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumir_procedimento() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumo_procedimento_tipo AS r (tipo, qtd, custo_total)
+        SELECT tipo, COUNT(*), SUM(COALESCE(custo, 0)) FROM novos GROUP BY tipo ORDER BY tipo
+        ON CONFLICT (tipo) DO UPDATE
+        SET qtd = r.qtd + EXCLUDED.qtd, custo_total = r.custo_total + EXCLUDED.custo_total;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO resumo_procedimento_tipo AS r (tipo, qtd, custo_total)
+        SELECT tipo, -COUNT(*), -SUM(COALESCE(custo, 0)) FROM antigos GROUP BY tipo ORDER BY tipo
+        ON CONFLICT (tipo) DO UPDATE
+        SET qtd = r.qtd + EXCLUDED.qtd, custo_total = r.custo_total + EXCLUDED.custo_total;
+
+        DELETE FROM resumo_procedimento_tipo WHERE tipo IN (SELECT tipo FROM antigos) AND qtd = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumir_adocao() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumo_adocao_ano AS r (ano, qtd)
+        SELECT EXTRACT(YEAR FROM data)::INT, COUNT(*) FROM novos GROUP BY 1 ORDER BY 1
+        ON CONFLICT (ano) DO UPDATE SET qtd = r.qtd + EXCLUDED.qtd;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO resumo_adocao_ano AS r (ano, qtd)
+        SELECT EXTRACT(YEAR FROM data)::INT, -COUNT(*) FROM antigos GROUP BY 1 ORDER BY 1
+        ON CONFLICT (ano) DO UPDATE SET qtd = r.qtd + EXCLUDED.qtd;
+
+        DELETE FROM resumo_adocao_ano
+        WHERE ano IN (SELECT EXTRACT(YEAR FROM data)::INT FROM antigos) AND qtd = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION resumir_hospedagem() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO resumo_ocupacao_lar AS r (lar_temporario_id, ocupacao)
+        SELECT lar_temporario_id, COUNT(*) FROM novos WHERE data_saida IS NULL
+        GROUP BY lar_temporario_id ORDER BY lar_temporario_id
+        ON CONFLICT (lar_temporario_id) DO UPDATE SET ocupacao = r.ocupacao + EXCLUDED.ocupacao;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO resumo_ocupacao_lar AS r (lar_temporario_id, ocupacao)
+        SELECT lar_temporario_id, -COUNT(*) FROM antigos WHERE data_saida IS NULL
+        GROUP BY lar_temporario_id ORDER BY lar_temporario_id
+        ON CONFLICT (lar_temporario_id) DO UPDATE SET ocupacao = r.ocupacao + EXCLUDED.ocupacao;
+
+        DELETE FROM resumo_ocupacao_lar
+        WHERE lar_temporario_id IN (SELECT lar_temporario_id FROM antigos) AND ocupacao = 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Tabelas de transição só podem ser usadas em triggers de um único evento,
+-- por isso cada tabela tem um trigger por evento, todos com a mesma função.
+
+CREATE TRIGGER trg_resumo_gasto_ins AFTER INSERT ON gasto
+REFERENCING NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_gasto();
+CREATE TRIGGER trg_resumo_gasto_upd AFTER UPDATE ON gasto
+REFERENCING OLD TABLE AS antigos NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_gasto();
+CREATE TRIGGER trg_resumo_gasto_del AFTER DELETE ON gasto
+REFERENCING OLD TABLE AS antigos FOR EACH STATEMENT EXECUTE FUNCTION resumir_gasto();
+
+CREATE TRIGGER trg_resumo_procedimento_ins AFTER INSERT ON procedimento
+REFERENCING NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_procedimento();
+CREATE TRIGGER trg_resumo_procedimento_upd AFTER UPDATE ON procedimento
+REFERENCING OLD TABLE AS antigos NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_procedimento();
+CREATE TRIGGER trg_resumo_procedimento_del AFTER DELETE ON procedimento
+REFERENCING OLD TABLE AS antigos FOR EACH STATEMENT EXECUTE FUNCTION resumir_procedimento();
+
+CREATE TRIGGER trg_resumo_adocao_ins AFTER INSERT ON adocao
+REFERENCING NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_adocao();
+CREATE TRIGGER trg_resumo_adocao_upd AFTER UPDATE ON adocao
+REFERENCING OLD TABLE AS antigos NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_adocao();
+CREATE TRIGGER trg_resumo_adocao_del AFTER DELETE ON adocao
+REFERENCING OLD TABLE AS antigos FOR EACH STATEMENT EXECUTE FUNCTION resumir_adocao();
+
+CREATE TRIGGER trg_resumo_hospedagem_ins AFTER INSERT ON hospedagem
+REFERENCING NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_hospedagem();
+CREATE TRIGGER trg_resumo_hospedagem_upd AFTER UPDATE ON hospedagem
+REFERENCING OLD TABLE AS antigos NEW TABLE AS novos FOR EACH STATEMENT EXECUTE FUNCTION resumir_hospedagem();
+CREATE TRIGGER trg_resumo_hospedagem_del AFTER DELETE ON hospedagem
+REFERENCING OLD TABLE AS antigos FOR EACH STATEMENT EXECUTE FUNCTION resumir_hospedagem();
+
+-- Preenche os resumos com os dados que já existirem quando o script for aplicado
+SELECT recalcular_resumos();
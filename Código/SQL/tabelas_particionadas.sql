@@ -0,0 +1,139 @@
+-- Variante particionada do esquema para as tabelas de maior volume.
+-- Aplicado pelo resetar_bd.py com --particionado, logo depois de tabelas_postgresql.sql:
+-- contato, doacao, gasto e procedimento são recriadas particionadas por mês na coluna
+-- de data. Consultas limitadas a um período só leem as partições do período, e dados
+-- antigos são arquivados desanexando a partição (particoes.py --arquivar).
+
+DROP TABLE contato, doacao, gasto, procedimento;
+
+-- Tabela para registrar doações.
+-- A chave primária inclui a coluna de particionamento, como exige o PostgreSQL.
+CREATE TABLE doacao (
+    id SERIAL,
+    data DATE NOT NULL,
+    valor DECIMAL(10, 2) NOT NULL,
+    forma_pagamento VARCHAR(50),
+    pessoa_cpf VARCHAR(11),
+    PRIMARY KEY (id, data),
+    FOREIGN KEY (pessoa_cpf) REFERENCES pessoa(cpf) ON DELETE RESTRICT,
+    CONSTRAINT chk_valor_positivo CHECK (valor > 0),
+    CONSTRAINT chk_data_doacao CHECK (data <= CURRENT_DATE),
+    CONSTRAINT chk_forma_pagamento CHECK (forma_pagamento IS NULL OR forma_pagamento IN ('DINHEIRO', 'PIX', 'CARTAO_CREDITO', 'CARTAO_DEBITO', 'TRANSFERENCIA', 'OUTROS'))
+) PARTITION BY RANGE (data);
+
+-- Tabela para registrar contatos feitos.
+CREATE TABLE contato (
+    pessoa_cpf VARCHAR(11) NOT NULL,
+    data_hora TIMESTAMP NOT NULL,
+    assunto TEXT,
+    PRIMARY KEY (pessoa_cpf, data_hora),
+    FOREIGN KEY (pessoa_cpf) REFERENCES pessoa(cpf) ON DELETE CASCADE
+) PARTITION BY RANGE (data_hora);
+
+-- Tabela para registrar gastos relacionados a um gato ou a um lar.
+CREATE TABLE gasto (
+    id SERIAL,
+    data DATE NOT NULL,
+    valor DECIMAL(10, 2) NOT NULL,
+    tipo VARCHAR(50) NOT NULL,
+    descricao TEXT,
+    lar_id INT,
+    gato_id INT,
+    PRIMARY KEY (id, data),
+    FOREIGN KEY (lar_id) REFERENCES lar_temporario(id) ON DELETE SET NULL,
+    FOREIGN KEY (gato_id) REFERENCES gato(id) ON DELETE SET NULL,
+    CONSTRAINT chk_gasto_valor CHECK (valor >= 0),
+    CONSTRAINT chk_gasto_data CHECK (data <= CURRENT_DATE),
+    CONSTRAINT chk_gasto_referencia CHECK ((lar_id IS NOT NULL AND gato_id IS NULL) OR (lar_id IS NULL AND gato_id IS NOT NULL)),
+    CONSTRAINT chk_gasto_tipo CHECK (tipo IN ('ALIMENTACAO', 'VETERINARIO', 'MEDICAMENTO', 'HIGIENE', 'TRANSPORTE', 'MANUTENCAO', 'OUTROS'))
+) PARTITION BY RANGE (data);
+
+-- Tabela para os procedimentos veterinários realizados em um gato.
+CREATE TABLE procedimento (
+    gato_id INT NOT NULL,
+    veterinario_cpf VARCHAR(11) NOT NULL,
+    data_hora TIMESTAMP NOT NULL,
+    tipo VARCHAR(50) NOT NULL,
+    custo DECIMAL(10, 2),
+    descricao TEXT,
+    PRIMARY KEY (gato_id, veterinario_cpf, data_hora),
+    FOREIGN KEY (gato_id) REFERENCES gato(id) ON DELETE CASCADE,
+    FOREIGN KEY (veterinario_cpf) REFERENCES veterinario(cpf) ON DELETE RESTRICT,
+    CONSTRAINT chk_procedimento_custo CHECK (custo IS NULL OR custo >= 0),
+    CONSTRAINT chk_procedimento_data CHECK (data_hora <= CURRENT_TIMESTAMP),
+    CONSTRAINT chk_procedimento_tipo CHECK (tipo IN ('CONSULTA', 'VACINACAO', 'CASTRACAO', 'CIRURGIA', 'EXAME', 'EMERGENCIA', 'TRATAMENTO', 'OUTROS'))
+) PARTITION BY RANGE (data_hora);
+
+-- Partição padrão de cada tabela (tabela_padrao): recebe as linhas de meses que ainda
+-- não têm partição, para que inserções da aplicação e do simulador_oltp.py não falhem
+-- quando a janela pré-criada acabar. Ela deve ficar vazia: o job de manutenção do
+-- README cria os meses seguintes antes que cheguem.
+CREATE TABLE doacao_padrao PARTITION OF doacao DEFAULT;
+CREATE TABLE contato_padrao PARTITION OF contato DEFAULT;
+CREATE TABLE gasto_padrao PARTITION OF gasto DEFAULT;
+CREATE TABLE procedimento_padrao PARTITION OF procedimento DEFAULT;
+
+-- Cria, se ainda não existir, a partição mensal de `tabela` que contém `dia` e
+-- devolve o nome dela (tabela_pAAAA_MM). Usada pelo popular_bd antes de gravar cada
+-- mês novo e por particoes.py.
+-- O PostgreSQL recusa criar a partição se a partição padrão já tiver linhas do mês;
+-- nesse caso a padrão é desanexada, as linhas do mês passam para a partição nova e a
+-- padrão é anexada de novo.
+CREATE OR REPLACE FUNCTION garantir_particao(tabela TEXT, dia DATE) RETURNS TEXT AS $$
+DECLARE
+    inicio DATE := date_trunc('month', dia)::DATE;
+    fim DATE := (date_trunc('month', dia) + INTERVAL '1 month')::DATE;
+    nome TEXT := format('%s_p%s', tabela, to_char(inicio, 'YYYY_MM'));
+    padrao TEXT := tabela || '_padrao';
+    coluna TEXT;
+    pendentes BOOLEAN := FALSE;
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN nome;
+    END IF;
+    IF to_regclass(padrao) IS NOT NULL THEN
+        SELECT a.attname INTO coluna
+        FROM pg_partitioned_table p
+        JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+        WHERE p.partrelid = to_regclass(tabela);
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= %L AND %I < %L)',
+                       padrao, coluna, inicio, coluna, fim) INTO pendentes;
+    END IF;
+    IF pendentes THEN
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', tabela, padrao);
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       nome, tabela, inicio, fim);
+        EXECUTE format('WITH movidas AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+                       'INSERT INTO %I SELECT * FROM movidas',
+                       padrao, coluna, inicio, coluna, fim, nome);
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I DEFAULT', tabela, padrao);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                       nome, tabela, inicio, fim);
+    END IF;
+    RETURN nome;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Cria as partições mensais de `tabela` de `inicio` até `fim` (inclusive)
+CREATE OR REPLACE FUNCTION criar_particoes(tabela TEXT, inicio DATE, fim DATE) RETURNS INT AS $$
+DECLARE
+    mes DATE := date_trunc('month', inicio)::DATE;
+    criadas INT := 0;
+BEGIN
+    WHILE mes <= fim LOOP
+        PERFORM garantir_particao(tabela, mes);
+        criadas := criadas + 1;
+        mes := (mes + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN criadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partições para os dois últimos anos e o próximo; meses fora dessa janela são
+-- criados sob demanda pelo popular_bd ou com particoes.py --criar, e até lá caem na
+-- partição padrão. Para manter a janela, agende (cron, pg_cron) a cada mês:
+--   SELECT criar_particoes(tabela, CURRENT_DATE, (CURRENT_DATE + INTERVAL '1 year')::DATE)
+--   FROM unnest(ARRAY['contato', 'doacao', 'gasto', 'procedimento']) AS tabela;
+SELECT criar_particoes(tabela, (CURRENT_DATE - INTERVAL '2 years')::DATE, (CURRENT_DATE + INTERVAL '1 year')::DATE)
+FROM unnest(ARRAY['contato', 'doacao', 'gasto', 'procedimento']) AS tabela;